@@ -0,0 +1,173 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional
+from exceptions import ServiceOverloadedException, AssignmentTimeoutException
+
+
+class AssignmentExecutor:
+    """Runs blocking assignment work off the asyncio event loop
+
+    Modes:
+        inline  - run in the calling thread (blocks the event loop)
+        thread  - run in a thread pool
+        process - run in a process pool; work that cannot be pickled
+                  (e.g. open upload files) still goes to a thread pool
+
+    At most max_workers calls run at once and at most max_queue more may wait
+    for a worker; beyond that run() raises ServiceOverloadedException. A call
+    that takes longer than timeout seconds raises AssignmentTimeoutException.
+    Python cannot interrupt a running worker, so its slot is only released
+    once the work really finishes.
+    """
+
+    MODES = ('inline', 'thread', 'process')
+
+    def __init__(
+        self,
+        mode: str = 'thread',
+        max_workers: Optional[int] = None,
+        max_queue: int = 32,
+        timeout: Optional[float] = None
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {', '.join(self.MODES)}")
+        self.mode = mode
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> 'AssignmentExecutor':
+        """Build from SECRET_SANTA_EXECUTOR, _MAX_WORKERS, _MAX_QUEUE and _TIMEOUT_SECONDS"""
+        max_workers = os.environ.get('SECRET_SANTA_MAX_WORKERS')
+        timeout = os.environ.get('SECRET_SANTA_TIMEOUT_SECONDS')
+        return cls(
+            mode=os.environ.get('SECRET_SANTA_EXECUTOR', 'thread'),
+            max_workers=int(max_workers) if max_workers else None,
+            max_queue=int(os.environ.get('SECRET_SANTA_MAX_QUEUE', '32')),
+            timeout=float(timeout) if timeout else None
+        )
+
+    @property
+    def pending(self) -> int:
+        """Calls currently running or waiting for a worker"""
+        return self._pending
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run func on the configured backend; it must be picklable in process mode"""
+        return await self._submit(self._pool(picklable=True), func, args, kwargs)
+
+    async def run_local(self, func: Callable, *args, **kwargs):
+        """Run func in this process, on a thread unless the mode is inline"""
+        return await self._submit(self._pool(picklable=False), func, args, kwargs)
+
+    async def run_batch(self, calls: List[Callable]) -> List[Any]:
+        """Run many independent picklable calls as one request
+
+        The batch takes a single slot and fans out over the mode's pool
+        (inline mode runs the calls in turn). Each result is the call's
+        return value or the exception it raised.
+        """
+        self._acquire()
+        try:
+            if self.mode == 'inline':
+                results = []
+                for call in calls:
+                    try:
+                        results.append(call())
+                    except Exception as e:
+                        results.append(e)
+                return results
+            
+            pool = self._pool(picklable=True)
+            futures = [asyncio.wrap_future(pool.submit(call)) for call in calls]
+            try:
+                return await asyncio.wait_for(
+                    asyncio.gather(*futures, return_exceptions=True), self.timeout
+                )
+            except asyncio.TimeoutError:
+                for future in futures:
+                    future.cancel()
+                raise AssignmentTimeoutException(
+                    f"Batch did not finish within {self.timeout:g} seconds"
+                )
+        finally:
+            self._release()
+
+    async def prewarm(self, func: Callable[[], Any]):
+        """Start every worker of the main pool now and run func once in each
+
+        Used at startup so that the first request does not pay for starting
+        threads or processes and importing the assignment code in them.
+        """
+        pool = self._pool(picklable=True)
+        if pool is None:
+            func()
+            return
+        await asyncio.gather(*(asyncio.wrap_future(pool.submit(func)) for _ in range(self.max_workers)))
+
+    def shutdown(self, wait: bool = False):
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+        self._thread_pool = None
+        self._process_pool = None
+
+    def _processes(self) -> Executor:
+        if self._process_pool is None:
+            # Imported here: multiprocessing is only needed once a process pool is used
+            from concurrent.futures import ProcessPoolExecutor
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._process_pool
+
+    def _pool(self, picklable: bool) -> Optional[Executor]:
+        if self.mode == 'inline':
+            return None
+        if self.mode == 'process' and picklable:
+            return self._processes()
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix='secret-santa'
+            )
+        return self._thread_pool
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise ServiceOverloadedException(
+                    "Server is busy generating other assignments, please retry shortly"
+                )
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def _submit(self, pool: Optional[Executor], func: Callable, args: tuple, kwargs: dict):
+        self._acquire()
+        if pool is None:
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._release()
+        
+        try:
+            future = pool.submit(partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise AssignmentTimeoutException(
+                f"Assignment generation did not finish within {self.timeout:g} seconds"
+            )
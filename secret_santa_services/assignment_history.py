@@ -1,23 +1,123 @@
-from typing import Dict, List, Set, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from models import Assignment
+from email_interner import EmailInterner
+
+# Exclusions per giver; small ones are kept as tuples, which are far smaller
+# than sets and just as fast to probe at this size
+_SMALL_EXCLUSIONS = 8
+
+Exclusions = Union[Tuple[int, ...], frozenset]
+Pair = Tuple[str, str]
 
 
 class AssignmentHistory:
+    """Index of previous years' assignments
+
+    Every year inside the lookback window is merged once, at construction, into
+    a per-giver exclusion index keyed by integer employee ids, so can_assign is
+    an O(1) lookup however many years were loaded.
+    """
+
+    def __init__(
+        self,
+        previous_assignments: List[Assignment] = None,
+        previous_years: Optional[Dict[int, List[Assignment]]] = None,
+        lookback_years: Optional[int] = None,
+        interner: Optional[EmailInterner] = None
+    ):
+        """
+        previous_assignments: last year's draw, always inside the window
+        previous_years: older draws keyed by year
+        lookback_years: number of most recent years to exclude (None = all)
+        """
+        self._build(
+            self.pairs(previous_assignments) if previous_assignments else None,
+            {year: self.pairs(assignments) for year, assignments in (previous_years or {}).items()},
+            lookback_years,
+            interner
+        )
+
+    @classmethod
+    def from_pairs(
+        cls,
+        recent_pairs: Optional[Iterable[Pair]] = None,
+        year_pairs: Optional[Dict[int, Iterable[Pair]]] = None,
+        lookback_years: Optional[int] = None,
+        interner: Optional[EmailInterner] = None
+    ) -> 'AssignmentHistory':
+        """Build from (giver_email, receiver_email) pairs instead of models"""
+        history = cls.__new__(cls)
+        history._build(recent_pairs, year_pairs or {}, lookback_years, interner)
+        return history
 
-    def __init__(self, previous_assignments: List[Assignment] = None):
-    
-        self._history: Dict[str, str] = {}
-        if previous_assignments:
-            self._load_history(previous_assignments)
+    @staticmethod
+    def pairs(assignments: Iterable[Assignment]) -> Iterator[Pair]:
+        """(giver_email, receiver_email) for each assignment"""
+        return ((a.employee_email, a.secret_child_email) for a in assignments)
 
-    def _load_history(self, assignments: List[Assignment]):
-        """Load previous assignments into history"""
-        for assignment in assignments:
-            self._history[assignment.employee_email] = assignment.secret_child_email
+    def _build(
+        self,
+        recent_pairs: Optional[Iterable[Pair]],
+        year_pairs: Dict[int, Iterable[Pair]],
+        lookback_years: Optional[int],
+        interner: Optional[EmailInterner]
+    ):
+        self.interner = interner or EmailInterner()
+        self.lookback_years = lookback_years
+        self._exclusions: Dict[int, Exclusions] = {}
+        self._latest: Dict[int, int] = {}
+        
+        years: List[Iterable[Pair]] = []
+        if recent_pairs is not None:
+            years.append(recent_pairs)
+        for year in sorted(year_pairs, reverse=True):
+            years.append(year_pairs[year])
+        if lookback_years is not None:
+            years = years[:lookback_years]
+        
+        self._load_history(years)
+
+    def _load_history(self, years: List[Iterable[Pair]]):
+        """Load previous assignments into history, most recent year first"""
+        merged: Dict[int, Set[int]] = {}
+        intern = self.interner.intern
+        for pairs in years:
+            for giver_email, receiver_email in pairs:
+                giver = intern(giver_email)
+                receiver = intern(receiver_email)
+                merged.setdefault(giver, set()).add(receiver)
+                self._latest.setdefault(giver, receiver)
+        
+        for giver, receivers in merged.items():
+            if len(receivers) <= _SMALL_EXCLUSIONS:
+                self._exclusions[giver] = tuple(receivers)
+            else:
+                self._exclusions[giver] = frozenset(receivers)
 
     def can_assign(self, giver_email: str, receiver_email: str) -> bool:
-        return self._history.get(giver_email) != receiver_email
+        giver = self.interner.get(giver_email)
+        if giver is None:
+            return True
+        receiver = self.interner.get(receiver_email)
+        return receiver is None or receiver not in self._exclusions.get(giver, ())
+
+    def can_assign_ids(self, giver_id: int, receiver_id: int) -> bool:
+        """can_assign() for ids taken from self.interner"""
+        return receiver_id not in self._exclusions.get(giver_id, ())
+
+    def exclusions_for_id(self, giver_id: int) -> Exclusions:
+        """Receiver ids a giver may not be assigned, as a container to probe"""
+        return self._exclusions.get(giver_id, ())
 
     def get_previous_child(self, giver_email: str) -> Optional[str]:
-        """Get previous secret child for a giver"""
-        return self._history.get(giver_email)
+        """Get the most recent previous secret child for a giver"""
+        giver = self.interner.get(giver_email)
+        receiver = self._latest.get(giver) if giver is not None else None
+        return self.interner.email(receiver) if receiver is not None else None
+
+    def get_excluded_children(self, giver_email: str) -> List[str]:
+        """Get every secret child a giver had inside the lookback window"""
+        giver = self.interner.get(giver_email)
+        if giver is None:
+            return []
+        return [self.interner.email(r) for r in self._exclusions.get(giver, ())]
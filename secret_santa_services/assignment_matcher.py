@@ -0,0 +1,168 @@
+from typing import Callable, List, Optional, Set
+
+
+class MatchingResult:
+    """Outcome of an exact matching run
+
+    Either receivers (receivers[giver] -> receiver) is set, or blocking_givers
+    holds a Hall violator: a set of givers whose allowed receivers, taken
+    together, are fewer than the givers themselves.
+    """
+
+    def __init__(self, receivers: Optional[List[int]] = None, blocking_givers: Optional[List[int]] = None):
+        self.receivers = receivers
+        self.blocking_givers = blocking_givers or []
+
+    @property
+    def feasible(self) -> bool:
+        return self.receivers is not None
+
+
+class AssignmentMatcher:
+    """Hopcroft–Karp over the allowed giver -> receiver graph
+
+    The allowed graph is the complement of a sparse forbidden graph (self, same
+    name, history), so it is never materialised. Each search keeps the
+    receivers it has not visited yet in a set: an allowed receiver is removed
+    the first time it is seen and a forbidden one is only re-checked by the
+    givers that forbid it, so one phase costs O(V + forbidden pairs) and the
+    whole run O(E√V) in the worst case.
+    """
+
+    _UNREACHED = float('inf')
+
+    def __init__(self, size: int, allowed: Callable[[int, int], bool]):
+        self.size = size
+        self.allowed = allowed
+
+    def solve(self, initial: Optional[List[int]] = None, unmatched: Optional[Set[int]] = None) -> MatchingResult:
+        """Find a perfect matching, starting from an optional partial one
+
+        initial[giver] is a receiver to keep unless the giver is listed in
+        unmatched or the pair is not allowed.
+        """
+        n = self.size
+        self._match_giver = [-1] * n
+        self._match_receiver = [-1] * n
+        
+        if initial is not None:
+            unmatched = unmatched or set()
+            for giver, receiver in enumerate(initial):
+                if giver not in unmatched and self._match_receiver[receiver] == -1 \
+                        and self.allowed(giver, receiver):
+                    self._match_giver[giver] = receiver
+                    self._match_receiver[receiver] = giver
+        
+        while self._build_layers():
+            for giver in range(n):
+                if self._match_giver[giver] == -1:
+                    self._augment(giver)
+        
+        free = [g for g in range(n) if self._match_giver[g] == -1]
+        if free:
+            return MatchingResult(blocking_givers=self._hall_violator(free[0]))
+        return MatchingResult(receivers=self._match_giver)
+
+    def _build_layers(self) -> bool:
+        """BFS from every free giver; returns True if a free receiver is reachable"""
+        n = self.size
+        self._dist = [self._UNREACHED] * n
+        self._layers = {}
+        queue = [g for g in range(n) if self._match_giver[g] == -1]
+        for giver in queue:
+            self._dist[giver] = 0
+        
+        unseen = set(range(n))
+        found_layer = self._UNREACHED
+        index = 0
+        while index < len(queue):
+            giver = queue[index]
+            index += 1
+            depth = self._dist[giver]
+            if depth > found_layer:
+                break
+            
+            reached = [r for r in unseen if self.allowed(giver, r)]
+            unseen.difference_update(reached)
+            self._layers.setdefault(depth, set()).update(reached)
+            for receiver in reached:
+                owner = self._match_receiver[receiver]
+                if owner == -1:
+                    found_layer = min(found_layer, depth)
+                elif self._dist[owner] == self._UNREACHED:
+                    self._dist[owner] = depth + 1
+                    queue.append(owner)
+        
+        return found_layer != self._UNREACHED
+
+    def _augment(self, root: int) -> bool:
+        """Iterative layered DFS for one vertex-disjoint augmenting path"""
+        stack = [root]
+        chosen: List[int] = []
+        skipped: List[List[int]] = [[]]
+        
+        while stack:
+            giver = stack[-1]
+            depth = self._dist[giver]
+            pool = self._layers.get(depth)
+            advanced = False
+            
+            while pool:
+                receiver = pool.pop()
+                if not self.allowed(giver, receiver):
+                    skipped[-1].append(receiver)
+                    continue
+                
+                owner = self._match_receiver[receiver]
+                if owner == -1:
+                    chosen.append(receiver)
+                    for g, r in zip(stack, chosen):
+                        self._match_giver[g] = r
+                        self._match_receiver[r] = g
+                    for frame_depth, frame_skipped in zip((self._dist[g] for g in stack), skipped):
+                        self._layers[frame_depth].update(frame_skipped)
+                    return True
+                
+                if self._dist[owner] != depth + 1:
+                    continue
+                
+                chosen.append(receiver)
+                stack.append(owner)
+                skipped.append([])
+                advanced = True
+                break
+            
+            if not advanced:
+                # Dead end for this phase
+                if pool is not None:
+                    pool.update(skipped[-1])
+                self._dist[giver] = self._UNREACHED
+                stack.pop()
+                skipped.pop()
+                if chosen:
+                    chosen.pop()
+        
+        return False
+
+    def _hall_violator(self, free_giver: int) -> List[int]:
+        """Givers reachable from a free giver by alternating paths
+
+        Every receiver they can reach is matched to another giver in the set,
+        so the set has exactly one more giver than allowed receivers.
+        """
+        givers = [free_giver]
+        seen_givers = {free_giver}
+        unseen = set(range(self.size))
+        index = 0
+        while index < len(givers):
+            giver = givers[index]
+            index += 1
+            reached = [r for r in unseen if self.allowed(giver, r)]
+            unseen.difference_update(reached)
+            for receiver in reached:
+                owner = self._match_receiver[receiver]
+                if owner != -1 and owner not in seen_givers:
+                    seen_givers.add(owner)
+                    givers.append(owner)
+        
+        return sorted(givers)
@@ -15,8 +15,8 @@ class AssignmentValidator:
         if giver.name == receiver.name:
             return False, f"Cannot assign {giver.name} ({giver.email}) to {receiver.name} ({receiver.email}) - same name"
         
-        # Rule 2: Cannot have same assignment as previous year
+        # Rule 2: Cannot repeat an assignment from the history window
         if not history.can_assign(giver.email, receiver.email):
-            return False, f"{giver.name} had {receiver.name} as their secret child last year"
+            return False, f"{giver.name} had {receiver.name} as their secret child in a previous year"
         
         return True, ""
@@ -0,0 +1,41 @@
+"""Rows per second for CSV employee parsing: per-row pydantic vs bulk validation
+
+Run from secret_santa_services/:
+    python -m benchmarks.bench_csv_validation [--rows 10000 100000]
+"""
+import argparse
+import time
+from csv_handler import CSVHandler
+
+
+def build_csv(rows: int) -> bytes:
+    lines = ["Employee_Name,Employee_EmailID"]
+    lines.extend(f"Employee {i},employee.{i}@acme.com" for i in range(rows))
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+def rows_per_second(parse, payload: bytes, rows: int, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse([payload])
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"{'rows':>10} {'per-row rows/s':>16} {'bulk rows/s':>14} {'speedup':>8}")
+    for rows in args.rows:
+        payload = build_csv(rows)
+        per_row = rows_per_second(lambda s: list(CSVHandler.iter_employees(s)), payload, rows, args.repeat)
+        bulk = rows_per_second(CSVHandler.parse_employees, payload, rows, args.repeat)
+        print(f"{rows:>10} {per_row:>16,.0f} {bulk:>14,.0f} {bulk / per_row:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
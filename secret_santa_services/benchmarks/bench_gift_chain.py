@@ -0,0 +1,68 @@
+"""Single-cycle draws: time and repairs against roster size
+
+For each size and constraint density (see run_benchmarks.SCENARIOS, plus
+'one-name', where 45% of the roster shares a single name), times the
+assignment stage of a plain draw and of a single_cycle draw over the same
+roster and history, with the repairs and draws each chain needed. Time per
+employee staying flat as the roster grows is the linear scaling.
+
+Run from secret_santa_services/:
+    python -m benchmarks.bench_gift_chain [--sizes 1000 10000 100000]
+"""
+import argparse
+import random
+import time
+from models import Employee
+from assignment_history import AssignmentHistory
+from employee_repository import EmployeeRepository
+from secret_santa_assigner import SecretSantaAssigner
+from benchmarks.run_benchmarks import SCENARIOS
+from benchmarks.synthetic import make_employees, make_history
+
+# Share of the 'one-name' roster with the same name; the only chains alternate
+# between them and everybody else
+ONE_NAME_RATIO = 0.45
+
+
+def one_name_employees(size: int):
+    shared = int(size * ONE_NAME_RATIO)
+    return [
+        Employee.model_construct(name="Shared Name" if i < shared else f"Employee {i}", email=f"employee.{i}@acme.com")
+        for i in range(size)
+    ]
+
+
+def cases(size: int, seed: int):
+    """(scenario, employees, history) for each constraint density"""
+    for scenario, (years, duplicate_ratio) in SCENARIOS.items():
+        employees = make_employees(size, duplicate_ratio, seed)
+        yield scenario, employees, AssignmentHistory(previous_years=make_history(employees, years, seed))
+    yield 'one-name', one_name_employees(size), AssignmentHistory()
+
+
+def timed_draw(repository: EmployeeRepository, history: AssignmentHistory, single_cycle: bool, seed: int):
+    assigner = SecretSantaAssigner(repository, history, random.Random(seed), single_cycle=single_cycle)
+    start = time.perf_counter()
+    assigner.assign_indexed()
+    return time.perf_counter() - start, assigner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    print(f"{'employees':>10} {'scenario':<8} {'plain ms':>9} {'chain ms':>9} {'chain us/emp':>13} "
+          f"{'repairs':>8} {'draws':>8}")
+    for size in args.sizes:
+        for scenario, employees, history in cases(size, args.seed):
+            repository = EmployeeRepository(employees)
+            plain, _ = timed_draw(repository, history, False, args.seed)
+            chain, assigner = timed_draw(repository, history, True, args.seed)
+            print(f"{size:>10} {scenario:<8} {plain * 1000:>9.1f} {chain * 1000:>9.1f} "
+                  f"{chain / size * 1e6:>13.2f} {assigner.repairs:>8} {assigner.attempts_used:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""History CSV loading: full Assignment models vs streamed giver/receiver pairs
+
+Builds a previous-assignments CSV holding several years of single-cycle
+draws and times loading it into an AssignmentHistory both ways, with the
+tracemalloc peak of each.
+
+Run from secret_santa_services/:
+    python -m benchmarks.bench_history_loading [--employees 10000 --years 5]
+"""
+import argparse
+import time
+import tracemalloc
+from assignment_history import AssignmentHistory
+from csv_handler import CSVHandler
+from benchmarks.synthetic import make_employees, make_history
+
+
+def build_csv(employees: int, years: int) -> bytes:
+    history = make_history(make_employees(employees), years)
+    lines = ["Employee_Name,Employee_EmailID,Secret_Child_Name,Secret_Child_EmailID"]
+    for assignments in history.values():
+        lines.extend(
+            f"{a.employee_name},{a.employee_email},{a.secret_child_name},{a.secret_child_email}"
+            for a in assignments
+        )
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+def chunks(payload: bytes, size: int = 64 * 1024):
+    for start in range(0, len(payload), size):
+        yield payload[start:start + size]
+
+
+def load_models(payload: bytes) -> AssignmentHistory:
+    return AssignmentHistory(CSVHandler.parse_previous_assignments(chunks(payload)))
+
+
+def load_pairs(payload: bytes) -> AssignmentHistory:
+    return AssignmentHistory.from_pairs(CSVHandler.iter_history_pairs(chunks(payload)))
+
+
+def measure(load, payload: bytes):
+    start = time.perf_counter()
+    load(payload)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    load(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--years', type=int, default=5)
+    args = parser.parse_args()
+    
+    print(f"{'employees':>10} {'rows':>9} {'models ms':>10} {'models MiB':>11} {'pairs ms':>9} {'pairs MiB':>10}")
+    for employees in args.employees:
+        payload = build_csv(employees, args.years)
+        models_time, models_peak = measure(load_models, payload)
+        pairs_time, pairs_peak = measure(load_pairs, payload)
+        print(f"{employees:>10} {employees * args.years:>9} {models_time * 1000:>10.1f} "
+              f"{models_peak / 2 ** 20:>11.1f} {pairs_time * 1000:>9.1f} {pairs_peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""/assign vs /assign/fast: end-to-end latency for large JSON rosters
+
+Posts the same roster to both endpoints through the ASGI app (no network)
+and reports the median latency over the runs. A fresh seed per request
+keeps the result cache out of the picture.
+
+Run from secret_santa_services/:
+    python -m benchmarks.bench_json_endpoint [--employees 1000 10000 100000 --runs 3]
+"""
+import argparse
+import json
+import statistics
+import time
+from fastapi.testclient import TestClient
+from main import app
+from benchmarks.synthetic import make_employees
+
+ENDPOINTS = ('/assign', '/assign/fast')
+
+
+def payload(employees: int, seed: int) -> bytes:
+    roster = [{"name": emp.name, "email": emp.email} for emp in make_employees(employees)]
+    return json.dumps({"current_employees": roster, "seed": seed}).encode('utf-8')
+
+
+def measure(client: TestClient, endpoint: str, employees: int, runs: int) -> float:
+    timings = []
+    for run in range(runs):
+        body = payload(employees, seed=run + 1)
+        start = time.perf_counter()
+        response = client.post(endpoint, content=body, headers={"Content-Type": "application/json"})
+        response.json()
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+    
+    client = TestClient(app)
+    print(f"{'employees':>10} " + ' '.join(f"{endpoint + ' ms':>16}" for endpoint in ENDPOINTS) + f" {'speedup':>8}")
+    for employees in args.employees:
+        timings = [measure(client, endpoint, employees, args.runs) for endpoint in ENDPOINTS]
+        print(f"{employees:>10} " + ' '.join(f"{t * 1000:>16.1f}" for t in timings)
+              + f" {timings[0] / timings[1]:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
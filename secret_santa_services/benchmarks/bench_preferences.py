@@ -0,0 +1,53 @@
+"""Soft-preference optimisation: solution quality against runtime
+
+For each roster size, runs seeded draws with an increasing search budget
+(iterations per employee) and reports the score as a share of the upper
+bound (every pair meeting every preference), the time spent optimising and
+whether the time budget cut the search short. Budget 0 is the plain draw.
+
+Run from secret_santa_services/:
+    python -m benchmarks.bench_preferences [--sizes 1000 10000] [--budgets 0 10 50 200]
+"""
+import argparse
+import random
+import time
+from assignment_history import AssignmentHistory
+from employee_repository import EmployeeRepository
+from models import OptimizationSettings
+from secret_santa_assigner import SecretSantaAssigner
+from benchmarks.synthetic import make_org
+
+
+def run(employees, iterations_per_employee: int, time_budget_ms: int, seed: int):
+    settings = OptimizationSettings(
+        iterations=iterations_per_employee * len(employees), time_budget_ms=time_budget_ms
+    )
+    assigner = SecretSantaAssigner(
+        EmployeeRepository(employees), AssignmentHistory(), random.Random(seed), settings
+    )
+    start = time.perf_counter()
+    assigner.assign()
+    elapsed = time.perf_counter() - start
+    upper = len(employees) * (settings.cross_department + settings.cross_office + settings.avoid_manager)
+    return assigner.score / upper, elapsed, assigner.optimizer.truncated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--budgets', type=int, nargs='+', default=[0, 5, 20, 50, 200],
+                        help="iterations per employee")
+    parser.add_argument('--time-budget-ms', type=int, default=60000)
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args()
+    
+    print(f"{'size':>8} {'iter/emp':>9} {'score':>7} {'seconds':>8} {'truncated':>10}")
+    for size in args.sizes:
+        employees = make_org(size, seed=args.seed)
+        for budget in args.budgets:
+            share, elapsed, truncated = run(employees, budget, args.time_budget_ms, args.seed)
+            print(f"{size:>8} {budget:>9} {share:>7.1%} {elapsed:>8.3f} {str(truncated):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Result serialisation: AssignmentResponse JSON vs CSV vs the compact encodings
+
+Solves one draw per roster size and times turning it into each response
+body, from a fresh DrawResult each time so the Assignment models are built
+only by the formats that need them. Sizes are shown plain and gzipped.
+
+Run from secret_santa_services/:
+    python -m benchmarks.bench_result_formats [--employees 1000 10000 100000]
+"""
+import argparse
+import gzip
+import random
+import time
+from models import AssignmentResponse
+from employee_repository import EmployeeRepository
+from assignment_history import AssignmentHistory
+from secret_santa_assigner import SecretSantaAssigner
+from secret_santa_service import DrawResult
+from csv_handler import CSVHandler
+import compact_format
+from benchmarks.synthetic import make_employees
+
+
+def response_json(draw: DrawResult) -> bytes:
+    return AssignmentResponse(
+        success=True,
+        message="Assignments generated successfully",
+        assignments=draw.assignments,
+        total_assignments=draw.total_assignments,
+        seed=draw.seed,
+        algorithm_version=draw.algorithm_version,
+        digest=draw.digest
+    ).model_dump_json().encode('utf-8')
+
+
+def csv_rows(draw: DrawResult) -> bytes:
+    return b''.join(CSVHandler.iter_csv_rows(draw.indexed.rows()))
+
+
+FORMATS = {
+    'response json': response_json,
+    'csv': csv_rows,
+    'compact json': compact_format.encode_compact_json,
+    'roster binary': lambda draw: compact_format.encode_roster(draw.indexed),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    
+    print(f"{'employees':>10} {'format':<14} {'ms':>9} {'KiB':>10} {'gzip KiB':>10}")
+    for employees in args.employees:
+        repository = EmployeeRepository(make_employees(employees))
+        indexed = SecretSantaAssigner(repository, AssignmentHistory(), random.Random(0)).assign_indexed()
+        for name, encode in FORMATS.items():
+            draw = DrawResult(indexed, 0, 1, '0' * 32)
+            start = time.perf_counter()
+            body = encode(draw)
+            elapsed = time.perf_counter() - start
+            print(f"{employees:>10} {name:<14} {elapsed * 1000:>9.1f} {len(body) / 1024:>10.1f} "
+                  f"{len(gzip.compress(body, compact_format.GZIP_LEVEL)) / 1024:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Cold-start benchmark for the API
+
+Starts fresh interpreters that import main under ``python -X importtime``
+and report per-module import times (self and cumulative, in ms, median
+over the runs), the total time to import main, and the time from a cold
+interpreter to the first answered /assign request.
+
+Run from secret_santa_services/:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --top 30 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_FIRST_REQUEST = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+employees = [{"name": f"Employee {i}", "email": f"employee{i}@acme.com"} for i in range(10)]
+assert client.post("/assign", json={"current_employees": employees}).status_code == 200
+answered = time.perf_counter()
+print(json.dumps({"import_main": imported - start, "first_request": answered - start}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """module -> (self microseconds, cumulative microseconds)"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def project_modules() -> List[str]:
+    return sorted(name[:-3] for name in os.listdir(SERVICE_DIR) if name.endswith('.py'))
+
+
+def run_once(env: dict) -> Tuple[Dict[str, Tuple[int, int]], dict]:
+    imports = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=SERVICE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    first = subprocess.run(
+        [sys.executable, '-c', _FIRST_REQUEST],
+        cwd=SERVICE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(imports.stderr), json.loads(first.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API import time and time to first request")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=20, help="slowest modules to list")
+    parser.add_argument('--output', help="write the JSON report here")
+    args = parser.parse_args()
+    
+    runs = [run_once(dict(os.environ)) for _ in range(args.runs)]
+    
+    modules = {}
+    for name in set().union(*(imports for imports, _ in runs)):
+        samples = [imports[name] for imports, _ in runs if name in imports]
+        modules[name] = {
+            'self_ms': statistics.median(s[0] for s in samples) / 1000,
+            'cumulative_ms': statistics.median(s[1] for s in samples) / 1000,
+        }
+    totals = {
+        key: statistics.median(timings[key] for _, timings in runs) * 1000
+        for key in ('import_main', 'first_request')
+    }
+    
+    print(f"import main:   {totals['import_main']:8.1f}ms")
+    print(f"first /assign: {totals['first_request']:8.1f}ms (from a cold interpreter)\n")
+    print(f"{'module':<40} {'self ms':>9} {'cumul ms':>9}")
+    ours = set(project_modules())
+    slowest = sorted(modules.items(), key=lambda item: item[1]['self_ms'], reverse=True)[:args.top]
+    for name, timing in slowest:
+        print(f"{name:<40} {timing['self_ms']:>9.2f} {timing['cumulative_ms']:>9.2f}")
+    print(f"\n{'project module':<40} {'self ms':>9} {'cumul ms':>9}")
+    for name in sorted(ours & set(modules)):
+        timing = modules[name]
+        print(f"{name:<40} {timing['self_ms']:>9.2f} {timing['cumulative_ms']:>9.2f}")
+    lazy = sorted(ours - set(modules) - {'main'})
+    if lazy:
+        print(f"\nnot imported at startup: {', '.join(lazy)}")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'runs': args.runs, 'totals_ms': totals,
+                       'modules': modules}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
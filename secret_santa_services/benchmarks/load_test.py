@@ -0,0 +1,298 @@
+"""Load test: concurrent /assign and /assign/csv traffic against a local uvicorn
+
+Starts the API under uvicorn on a free local port (or targets --url), then
+keeps --concurrency requests in flight for --duration seconds (or until
+--requests are sent). Each request picks an endpoint by --mix, a roster size
+from --sizes, and is a hard draw (duplicate names plus several years of
+history) with probability --hard-ratio. Payloads are built once up front;
+every request gets a fresh seed so the result cache does not answer it
+unless --fixed-seed is given.
+
+Reports throughput, error rate and p50/p95/p99 latency overall and per
+scenario, and writes them as JSON with --output. Everything runs on this
+machine; nothing is fetched from the network.
+
+Run from secret_santa_services/:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 32 --duration 30 --sizes 100 5000 --hard-ratio 0.2
+    python -m benchmarks.load_test --workers 4 --server-env SECRET_SANTA_EXECUTOR=process --output load.json
+    python -m benchmarks.load_test --url http://127.0.0.1:8000   # a server that is already running
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.synthetic import make_employees, make_history, employees_csv
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Hard draws: share of duplicated names and years of history
+HARD_DUPLICATE_RATIO = 0.2
+HARD_HISTORY_YEARS = 5
+
+
+class Payload:
+    """One prepared request body; seed is filled in per request"""
+
+    def __init__(self, endpoint: str, size: int, hard: bool, body: bytes, previous_csv: Optional[bytes] = None):
+        self.endpoint = endpoint
+        self.size = size
+        self.hard = hard
+        self.body = body
+        self.previous_csv = previous_csv
+
+    @property
+    def scenario(self) -> str:
+        return f"{self.endpoint} n={self.size} {'hard' if self.hard else 'easy'}"
+
+    def request(self, client: httpx.AsyncClient, seed: int):
+        if self.endpoint == '/assign/csv':
+            files = {'employees_file': ('employees.csv', self.body, 'text/csv')}
+            if self.previous_csv is not None:
+                files['previous_assignments_file'] = ('previous.csv', self.previous_csv, 'text/csv')
+            return client.post(self.endpoint, files=files, data={'seed': str(seed)})
+        # The JSON body is prepared without its closing brace
+        body = self.body + f',"seed":{seed}}}'.encode('utf-8')
+        return client.post(self.endpoint, content=body, headers={'Content-Type': 'application/json'})
+
+
+def build_payloads(endpoints: List[str], sizes: List[int], hard_ratio: float, seed: int) -> List[Payload]:
+    payloads = []
+    for size in sizes:
+        for hard in ([False, True] if hard_ratio > 0 else [False]):
+            employees = make_employees(size, HARD_DUPLICATE_RATIO if hard else 0.0, seed)
+            history = make_history(employees, HARD_HISTORY_YEARS if hard else 0, seed)
+            for endpoint in endpoints:
+                if endpoint == '/assign/csv':
+                    previous = None
+                    if history:
+                        last_year = history[max(history)]
+                        lines = ["Employee_Name,Employee_EmailID,Secret_Child_Name,Secret_Child_EmailID"]
+                        lines.extend(
+                            f"{a.employee_name},{a.employee_email},{a.secret_child_name},{a.secret_child_email}"
+                            for a in last_year
+                        )
+                        previous = ("\n".join(lines) + "\n").encode('utf-8')
+                    payloads.append(Payload(endpoint, size, hard, employees_csv(employees), previous))
+                else:
+                    body = {
+                        "current_employees": [{"name": emp.name, "email": emp.email} for emp in employees],
+                        "previous_years": {
+                            str(year): [a.model_dump() for a in assignments] for year, assignments in history.items()
+                        },
+                    }
+                    payloads.append(Payload(endpoint, size, hard, json.dumps(body).encode('utf-8')[:-1]))
+    return payloads
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'/assign=3,/assign/csv=1' -> endpoint weights"""
+    weights = {}
+    for part in mix.split(','):
+        endpoint, _, weight = part.partition('=')
+        weights[endpoint.strip()] = float(weight or 1)
+    return weights
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    command = [
+        sys.executable, '-m', 'uvicorn', 'main:app',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers), '--log-level', 'warning'
+    ]
+    return subprocess.Popen(command, cwd=SERVICE_DIR, env=dict(os.environ, **env))
+
+
+def wait_ready(url: str, server: Optional[subprocess.Popen], timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server is not None and server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not become healthy within {timeout:g}s")
+
+
+async def run_load(
+    url: str,
+    payloads: List[Payload],
+    weights: Dict[str, float],
+    hard_ratio: float,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int],
+    fixed_seed: Optional[int],
+    seed: int,
+    timeout: float
+) -> Tuple[List[tuple], float]:
+    """Returns (scenario, status or None, latency seconds, error) per request and the wall time"""
+    rng = random.Random(seed)
+    by_endpoint = defaultdict(lambda: defaultdict(list))
+    for payload in payloads:
+        by_endpoint[payload.endpoint][payload.hard].append(payload)
+    endpoints = list(weights)
+    endpoint_weights = [weights[endpoint] for endpoint in endpoints]
+    
+    samples = []
+    sent = 0
+    deadline = time.perf_counter() + duration
+    
+    def next_payload() -> Optional[Payload]:
+        nonlocal sent
+        if time.perf_counter() >= deadline or (max_requests is not None and sent >= max_requests):
+            return None
+        sent += 1
+        endpoint = rng.choices(endpoints, endpoint_weights)[0]
+        hard = hard_ratio > 0 and rng.random() < hard_ratio
+        return rng.choice(by_endpoint[endpoint][hard])
+
+    async def worker(client: httpx.AsyncClient):
+        while True:
+            payload = next_payload()
+            if payload is None:
+                return
+            request_seed = fixed_seed if fixed_seed is not None else rng.randrange(2 ** 62)
+            start = time.perf_counter()
+            try:
+                response = await payload.request(client, request_seed)
+                await response.aread()
+                samples.append((payload.scenario, response.status_code, time.perf_counter() - start, None))
+            except httpx.HTTPError as e:
+                samples.append((payload.scenario, None, time.perf_counter() - start, type(e).__name__))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def percentile(ordered: List[float], share: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(share * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: List[tuple], elapsed: float) -> dict:
+    latencies = sorted(latency for _, _, latency, _ in samples)
+    errors = [s for s in samples if s[1] is None or s[1] >= 400]
+    return {
+        'requests': len(samples),
+        'errors': len(errors),
+        'error_rate': len(errors) / len(samples) if samples else 0.0,
+        'throughput_rps': len(samples) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': (latencies[-1] if latencies else 0.0) * 1000,
+        },
+        'status': dict(Counter(str(status if status is not None else error) for _, status, _, error in samples)),
+    }
+
+
+def report(samples: List[tuple], elapsed: float) -> dict:
+    scenarios = defaultdict(list)
+    for sample in samples:
+        scenarios[sample[0]].append(sample)
+    return {
+        'elapsed_seconds': elapsed,
+        'overall': summarize(samples, elapsed),
+        'scenarios': {name: summarize(rows, elapsed) for name, rows in sorted(scenarios.items())},
+    }
+
+
+def print_report(result: dict):
+    print(f"{'scenario':<32} {'reqs':>6} {'err %':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(result['scenarios'].items()) + [('overall', result['overall'])]
+    for name, summary in rows:
+        latency = summary['latency_ms']
+        print(f"{name:<32} {summary['requests']:>6} {summary['error_rate'] * 100:>6.1f} "
+              f"{summary['throughput_rps']:>8.1f} {latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help="target a running server instead of starting uvicorn")
+    parser.add_argument('--workers', type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument('--server-env', action='append', default=[], metavar='KEY=VALUE',
+                        help="environment for the server, e.g. SECRET_SANTA_EXECUTOR=process")
+    parser.add_argument('--concurrency', type=int, default=8, help="requests in flight")
+    parser.add_argument('--duration', type=float, default=10, help="seconds to send requests for")
+    parser.add_argument('--requests', type=int, help="stop after this many requests")
+    parser.add_argument('--warmup', type=int, default=5, help="requests sent before measuring")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 2000], help="roster sizes")
+    parser.add_argument('--mix', default='/assign=3,/assign/csv=1', help="endpoint weights")
+    parser.add_argument('--hard-ratio', type=float, default=0.2, help="share of hard draws")
+    parser.add_argument('--fixed-seed', type=int, help="send this seed every time, letting the cache answer")
+    parser.add_argument('--timeout', type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report here")
+    args = parser.parse_args()
+    
+    weights = parse_mix(args.mix)
+    server_env = dict(item.split('=', 1) for item in args.server_env)
+    payloads = build_payloads(list(weights), args.sizes, args.hard_ratio, args.seed)
+    
+    server = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.workers, server_env)
+    try:
+        wait_ready(url, server)
+        if args.warmup:
+            asyncio.run(run_load(url, payloads, weights, args.hard_ratio, min(args.concurrency, args.warmup),
+                                 float('inf'), args.warmup, args.fixed_seed, args.seed + 1, args.timeout))
+        samples, elapsed = asyncio.run(run_load(
+            url, payloads, weights, args.hard_ratio, args.concurrency, args.duration, args.requests,
+            args.fixed_seed, args.seed, args.timeout
+        ))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+    
+    result = report(samples, elapsed)
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'config': {
+                    'url': args.url, 'workers': args.workers, 'server_env': server_env,
+                    'concurrency': args.concurrency, 'duration': args.duration, 'requests': args.requests,
+                    'sizes': args.sizes, 'mix': weights, 'hard_ratio': args.hard_ratio,
+                    'fixed_seed': args.fixed_seed, 'seed': args.seed,
+                },
+                **result,
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
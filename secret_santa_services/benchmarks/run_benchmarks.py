@@ -0,0 +1,211 @@
+"""Benchmark suite for the assignment pipeline
+
+Times each stage separately (CSV parse, roster validation, assignment, CSV
+generation) over seeded synthetic rosters of several sizes and constraint
+densities, records peak memory, attempts used and failure rate, and compares
+the timings against a stored baseline.
+
+Run from secret_santa_services/:
+    python -m benchmarks.run_benchmarks                       # quick sizes
+    python -m benchmarks.run_benchmarks --sizes 10 1000 1000000
+    python -m benchmarks.run_benchmarks --save-baseline       # refresh baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from assignment_history import AssignmentHistory
+from csv_handler import CSVHandler
+from employee_repository import EmployeeRepository
+from exceptions import AssignmentFailedException
+from secret_santa_assigner import SecretSantaAssigner
+from benchmarks.synthetic import make_employees, make_history, employees_csv
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+SCENARIOS = {
+    # name: (years of history, share of employees with a duplicated name)
+    'plain': (0, 0.0),
+    'history': (1, 0.0),
+    'dense': (5, 0.2),
+}
+
+STAGES = ('csv_parse', 'validation', 'assignment', 'csv_generate')
+
+
+def measure(func: Callable, trace_memory: bool):
+    """Run func once; returns (result, seconds, peak bytes or None)"""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run_case(size: int, scenario: str, trials: int, seed: int, trace_memory: bool) -> dict:
+    years, duplicate_ratio = SCENARIOS[scenario]
+    employees = make_employees(size, duplicate_ratio, seed)
+    history_years = make_history(employees, years, seed)
+    payload = employees_csv(employees)
+    
+    def trial(trace: bool) -> Tuple[Dict[str, float], Dict[str, Optional[int]], Optional[int]]:
+        """One pass over the stages: (seconds, peak bytes) per stage and attempts, or None attempts on failure"""
+        seconds: Dict[str, float] = {}
+        peaks: Dict[str, Optional[int]] = {}
+        
+        parsed, seconds['csv_parse'], peaks['csv_parse'] = measure(
+            lambda: CSVHandler.parse_employees([payload]), trace
+        )
+        
+        def validate():
+            return EmployeeRepository(parsed), AssignmentHistory(previous_years=history_years)
+        (repository, history), seconds['validation'], peaks['validation'] = measure(validate, trace)
+        
+        assigner = SecretSantaAssigner(repository, history)
+        try:
+            assignments, seconds['assignment'], peaks['assignment'] = measure(assigner.assign, trace)
+        except AssignmentFailedException:
+            return seconds, peaks, None
+        
+        _, seconds['csv_generate'], peaks['csv_generate'] = measure(
+            lambda: sum(map(len, CSVHandler.iter_csv(assignments))), trace
+        )
+        return seconds, peaks, assigner.attempts_used
+    
+    # Timed trials run untraced, since tracemalloc slows everything down.
+    # Peak memory comes from one extra pass up front whose timings are not
+    # kept; it (untraced with --no-memory) also warms the code up.
+    _, peaks, _ = trial(trace_memory)
+    
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    attempts: List[int] = []
+    failures = 0
+    for _ in range(trials):
+        seconds, _, used = trial(False)
+        if used is None:
+            failures += 1
+            continue
+        for stage, elapsed in seconds.items():
+            timings[stage].append(elapsed)
+        attempts.append(used)
+    
+    return {
+        'size': size,
+        'scenario': scenario,
+        'trials': trials,
+        'failure_rate': failures / trials,
+        'attempts_max': max(attempts) if attempts else None,
+        'stages': {
+            stage: {
+                'seconds_min': min(values) if values else None,
+                'seconds_mean': sum(values) / len(values) if values else None,
+                'peak_bytes': peaks.get(stage),
+            }
+            for stage, values in timings.items()
+        },
+    }
+
+
+def compare(results: List[dict], baseline: List[dict], tolerance: float) -> List[str]:
+    """Stages whose best time got more than tolerance slower than the baseline"""
+    previous = {
+        (case['scenario'], case['size'], stage): timing['seconds_min']
+        for case in baseline
+        for stage, timing in case['stages'].items()
+    }
+    regressions = []
+    for case in results:
+        for stage, timing in case['stages'].items():
+            before = previous.get((case['scenario'], case['size'], stage))
+            now = timing['seconds_min']
+            # Ignore sub-millisecond noise on tiny rosters
+            if before is None or now is None or now - before < 0.001:
+                continue
+            if now > before * (1 + tolerance):
+                regressions.append(
+                    f"{case['scenario']}/{case['size']}/{stage}: {before * 1000:.2f}ms -> {now * 1000:.2f}ms"
+                )
+        before_failures = next(
+            (b['failure_rate'] for b in baseline
+             if (b['scenario'], b['size']) == (case['scenario'], case['size'])),
+            None
+        )
+        if before_failures is not None and case['failure_rate'] > before_failures:
+            regressions.append(
+                f"{case['scenario']}/{case['size']}: failure rate {before_failures:.0%} -> {case['failure_rate']:.0%}"
+            )
+    return regressions
+
+
+def print_table(results: List[dict]):
+    print(f"{'scenario':<9} {'size':>8} " + ' '.join(f"{stage:>14}" for stage in STAGES)
+          + f" {'peak MiB':>9} {'attempts':>8} {'fail':>5}")
+    for case in results:
+        cells = []
+        for stage in STAGES:
+            seconds = case['stages'][stage]['seconds_min']
+            cells.append(f"{seconds * 1000:>12.2f}ms" if seconds is not None else f"{'-':>14}")
+        peaks = [s['peak_bytes'] for s in case['stages'].values() if s['peak_bytes'] is not None]
+        peak = f"{max(peaks) / 2 ** 20:>9.1f}" if peaks else f"{'-':>9}"
+        print(f"{case['scenario']:<9} {case['size']:>8} " + ' '.join(cells)
+              + f" {peak} {case['attempts_max'] or '-':>8} {case['failure_rate']:>5.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Secret Santa assignment pipeline")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--trials', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc peak memory")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', help="write the JSON report here")
+    args = parser.parse_args()
+    
+    results = []
+    for scenario in args.scenarios:
+        for size in args.sizes:
+            # Very large rosters get one trial; they dominate the run time
+            trials = args.trials if size <= 100000 else 1
+            results.append(run_case(size, scenario, trials, args.seed, not args.no_memory))
+    
+    print_table(results)
+    report = {'python': sys.version.split()[0], 'seed': args.seed, 'results': results}
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Seeded synthetic rosters and histories for benchmarks"""
+import random
+from typing import Dict, List
+from models import Employee, Assignment
+
+
+def make_employees(count: int, duplicate_name_ratio: float = 0.0, seed: int = 0) -> List[Employee]:
+    """Employees with unique emails; about duplicate_name_ratio of them share a name"""
+    rng = random.Random(seed)
+    shared_names = max(1, int(count * duplicate_name_ratio) // 4)
+    employees = []
+    for i in range(count):
+        if rng.random() < duplicate_name_ratio:
+            name = f"Shared Name {rng.randrange(shared_names)}"
+        else:
+            name = f"Employee {i}"
+        employees.append(Employee.model_construct(name=name, email=f"employee.{i}@acme.com"))
+    return employees
+
+
+def make_history(employees: List[Employee], years: int, seed: int = 0) -> Dict[int, List[Assignment]]:
+    """One random single-cycle draw per year, keyed by year"""
+    rng = random.Random(seed + 1)
+    history = {}
+    for year in range(2024, 2024 - years, -1):
+        order = employees.copy()
+        rng.shuffle(order)
+        history[year] = [
+            Assignment.model_construct(
+                employee_name=giver.name,
+                employee_email=giver.email,
+                secret_child_name=receiver.name,
+                secret_child_email=receiver.email
+            )
+            for giver, receiver in zip(order, order[1:] + order[:1])
+        ]
+    return history
+
+
+def employees_csv(employees: List[Employee]) -> bytes:
+    lines = ["Employee_Name,Employee_EmailID"]
+    lines.extend(f"{emp.name},{emp.email}" for emp in employees)
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+def make_org(count: int, departments: int = 8, offices: int = 3, team_size: int = 8, seed: int = 0) -> List[Employee]:
+    """Employees with a department, an office and a manager (one per team_size people)
+
+    Departments and offices are skewed so that cross-department and
+    cross-office pairs are not trivially available to everyone.
+    """
+    rng = random.Random(seed)
+    employees = []
+    for i in range(count):
+        manager = (i // team_size) * team_size
+        employees.append(Employee.model_construct(
+            name=f"Employee {i}",
+            email=f"employee.{i}@acme.com",
+            department=f"Department {min(int(rng.expovariate(0.5)), departments - 1)}",
+            office=f"Office {min(int(rng.expovariate(1.0)), offices - 1)}",
+            manager_email=f"employee.{manager}@acme.com" if manager != i else None
+        ))
+    return employees
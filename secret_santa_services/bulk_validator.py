@@ -0,0 +1,183 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from email_validator import SPECIAL_USE_DOMAIN_NAMES
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from models import Employee, Assignment
+from exceptions import InvalidEmployeeDataException
+
+# Plain ASCII addresses that EmailStr certainly accepts: a dot-atom local part
+# and a dotted domain with an alphabetic TLD. Anything else is handed to
+# EmailStr itself, so the fast path never rejects a valid address.
+EMAIL_PATTERN = re.compile(
+    r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(?:\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*"
+    r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}"
+)
+
+_EMAIL_ADAPTER = TypeAdapter(EmailStr)
+
+# Limits email_validator (behind EmailStr) enforces on top of the syntax
+_MAX_LOCAL_LENGTH = 64
+_MAX_EMAIL_LENGTH = 254
+_SPECIAL_USE_DOMAINS = frozenset(SPECIAL_USE_DOMAIN_NAMES)
+
+# Invalid rows listed in an error message before it is truncated
+MAX_REPORTED_ROWS = 20
+
+
+class BulkValidator:
+    """Column-at-a-time validation for large uploads
+
+    Applies the same rules as the Employee / Assignment models (non-empty
+    stripped names, EmailStr emails) to whole columns, with a precompiled
+    pattern settling the common case, reports every invalid row with its line
+    number, and builds the models with model_construct so they are not
+    validated a second time.
+    """
+
+    @staticmethod
+    def normalize_email(email: str) -> Optional[str]:
+        """Normalise one email the way EmailStr does, or None if it is invalid"""
+        if EMAIL_PATTERN.fullmatch(email) is not None and len(email) <= _MAX_EMAIL_LENGTH:
+            local, _, domain = email.rpartition('@')
+            domain = domain.lower()
+            # EmailStr decodes punycode (xn--) labels to Unicode, so those take the slow path
+            if len(local) <= _MAX_LOCAL_LENGTH and 'xn--' not in domain and not BulkValidator._special_use(domain):
+                return f"{local}@{domain}"
+        try:
+            return _EMAIL_ADAPTER.validate_python(email)
+        except ValidationError:
+            return None
+
+    @staticmethod
+    def _special_use(domain: str) -> bool:
+        """Whether domain is or is under a special-use name (test, localhost, ...), which EmailStr refuses"""
+        labels = domain.split('.')
+        return any('.'.join(labels[i:]) in _SPECIAL_USE_DOMAINS for i in range(len(labels)))
+
+    @staticmethod
+    def check_emails(emails: Sequence[str]) -> Tuple[List[str], List[int]]:
+        """Normalise a column of emails the way EmailStr does
+
+        Returns the normalised column and the positions of invalid emails.
+        """
+        normalize = BulkValidator.normalize_email
+        normalized = []
+        invalid = []
+        for i, email in enumerate(emails):
+            value = normalize(email)
+            if value is None:
+                normalized.append(email)
+                invalid.append(i)
+            else:
+                normalized.append(value)
+        return normalized, invalid
+
+    @staticmethod
+    def empty_values(values: Sequence[str]) -> List[int]:
+        """Positions of values that are empty once whitespace is stripped"""
+        return [i for i, value in enumerate(values) if not value or value.isspace()]
+
+    @staticmethod
+    def validate_employees(
+        line_numbers: Sequence[int],
+        names: Sequence[str],
+        emails: Sequence[str],
+        departments: Optional[Sequence[str]] = None,
+        offices: Optional[Sequence[str]] = None,
+        managers: Optional[Sequence[str]] = None
+    ) -> List[Employee]:
+        """Validate name/email columns and build trusted Employee models
+
+        departments, offices and managers are the optional soft-preference
+        columns; empty values mean not set.
+        """
+        normalized, invalid = BulkValidator.check_emails(emails)
+        errors = {}
+        for i in BulkValidator.empty_values(names):
+            errors.setdefault(i, []).append("employee name cannot be empty")
+        for i in invalid:
+            errors.setdefault(i, []).append(f"invalid email '{emails[i]}'")
+        
+        manager_emails = None
+        if managers and any(managers):
+            manager_emails = []
+            for i, manager in enumerate(managers):
+                value = BulkValidator.normalize_email(manager) if manager else None
+                if manager and value is None:
+                    errors.setdefault(i, []).append(f"invalid manager email '{manager}'")
+                manager_emails.append(value)
+        BulkValidator._raise_for(errors, line_numbers, "employee")
+        
+        construct = Employee.model_construct
+        if not (departments and any(departments)) and not (offices and any(offices)) and manager_emails is None:
+            return [
+                construct(name=name.strip(), email=email)
+                for name, email in zip(names, normalized)
+            ]
+        
+        count = len(names)
+        departments = departments or [''] * count
+        offices = offices or [''] * count
+        manager_emails = manager_emails or [None] * count
+        return [
+            construct(
+                name=name.strip(), email=email,
+                department=department or None, office=office or None, manager_email=manager
+            )
+            for name, email, department, office, manager in zip(
+                names, normalized, departments, offices, manager_emails
+            )
+        ]
+
+    @staticmethod
+    def validate_assignments(
+        line_numbers: Sequence[int],
+        giver_names: Sequence[str],
+        giver_emails: Sequence[str],
+        child_names: Sequence[str],
+        child_emails: Sequence[str]
+    ) -> List[Assignment]:
+        """Validate the four assignment columns and build trusted Assignment models"""
+        giver_normalized, giver_invalid = BulkValidator.check_emails(giver_emails)
+        child_normalized, child_invalid = BulkValidator.check_emails(child_emails)
+        errors = {}
+        for i in giver_invalid:
+            errors.setdefault(i, []).append(f"invalid employee email '{giver_emails[i]}'")
+        for i in child_invalid:
+            errors.setdefault(i, []).append(f"invalid secret child email '{child_emails[i]}'")
+        BulkValidator._raise_for(errors, line_numbers, "assignment")
+        
+        construct = Assignment.model_construct
+        return [
+            construct(
+                employee_name=giver_name,
+                employee_email=giver_email,
+                secret_child_name=child_name,
+                secret_child_email=child_email
+            )
+            for giver_name, giver_email, child_name, child_email in zip(
+                giver_names, giver_normalized, child_names, child_normalized
+            )
+        ]
+
+    @staticmethod
+    def _raise_for(errors: dict, line_numbers: Sequence[int], kind: str):
+        if errors:
+            BulkValidator.raise_for_lines(
+                {line_numbers[i]: messages for i, messages in errors.items()}, len(errors), kind
+            )
+
+    @staticmethod
+    def raise_for_lines(errors: Dict[int, List[str]], total: int, kind: str):
+        """Raise for invalid rows given as line number -> messages
+
+        errors may hold only the first few rows of a stream; total is the
+        number of invalid rows overall.
+        """
+        lines = sorted(errors)[:MAX_REPORTED_ROWS]
+        details = [f"line {line}: {', '.join(errors[line])}" for line in lines]
+        if total > len(lines):
+            details.append(f"and {total - len(lines)} more")
+        raise InvalidEmployeeDataException(
+            f"{total} invalid {kind} row(s): {'; '.join(details)}"
+        )
@@ -0,0 +1,156 @@
+import gzip
+import json
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from typing import List, Optional, Tuple
+from models import Employee
+from compact_roster import IndexedAssignments
+
+# The roster once plus receivers[giver] as positions in it, as JSON
+COMPACT_JSON = 'application/vnd.secret-santa.compact+json'
+# The same as a little-endian binary; see encode_roster()
+ROSTER_BINARY = 'application/vnd.secret-santa.roster'
+
+ROSTER_MAGIC = b'SSR1'
+_HEADER = struct.Struct('<4sIII')
+
+# Bodies smaller than this are sent as they are even when gzip is accepted
+MIN_GZIP_BYTES = 1024
+GZIP_LEVEL = 5
+
+
+def _parse_accept(header: str) -> List[Tuple[str, float]]:
+    ranges = []
+    for part in header.split(','):
+        media_type, *params = [item.strip() for item in part.split(';')]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_type.lower(), quality))
+    return ranges
+
+
+def negotiate(accept: Optional[str], offered: List[str]) -> str:
+    """The offered media type the Accept header prefers; offered[0] when it has no preference
+
+    Unknown types are ignored rather than refused, so clients that send no
+    or an unrelated Accept header keep getting the default.
+    """
+    if not accept:
+        return offered[0]
+    best, best_quality = offered[0], 0.0
+    for media_type in offered:
+        main_type = media_type.split('/')[0]
+        quality = None
+        for accepted, accepted_quality in _parse_accept(accept):
+            if accepted == media_type:
+                quality = accepted_quality
+                break
+            if accepted in ('*/*', f"{main_type}/*") and quality is None:
+                quality = accepted_quality
+        if quality is not None and quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    return any(
+        encoding == 'gzip' and quality > 0
+        for encoding, quality in _parse_accept(accept_encoding or '')
+    )
+
+
+def compress(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """gzip body when the client accepts it and it is worth it; returns (body, Content-Encoding)"""
+    if len(body) < MIN_GZIP_BYTES or not accepts_gzip(accept_encoding):
+        return body, None
+    return gzip.compress(body, GZIP_LEVEL), 'gzip'
+
+
+def encode_compact_json(draw) -> bytes:
+    """A DrawResult as JSON with the roster once and a receiver index per giver"""
+    indexed = draw.indexed
+    return json.dumps({
+        "success": True,
+        "message": "Assignments generated successfully",
+        "total_assignments": len(indexed),
+        "seed": draw.seed,
+        "algorithm_version": draw.algorithm_version,
+        "digest": draw.digest,
+        "score": draw.score,
+        "employees": [[emp.name, emp.email] for emp in indexed.employees],
+        "receivers": list(indexed.receivers),
+    }, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def encode_roster(indexed: IndexedAssignments) -> bytes:
+    """Binary draw: header, int32 receivers, uint32 name and email offsets, UTF-8 names and emails
+
+    Layout, all little-endian:
+        b'SSR1', uint32 n, uint32 names size, uint32 emails size
+        int32[n]     receivers, position of each giver's secret child
+        uint32[n+1]  offsets of each name in the names blob
+        uint32[n+1]  offsets of each email in the emails blob
+        names blob, emails blob
+    The fixed-width arrays come first so readers can map them without copying.
+    """
+    names = [emp.name.encode('utf-8') for emp in indexed.employees]
+    emails = [emp.email.encode('utf-8') for emp in indexed.employees]
+    name_offsets = array('I', accumulate(map(len, names), initial=0))
+    email_offsets = array('I', accumulate(map(len, emails), initial=0))
+    receivers = indexed.receivers if isinstance(indexed.receivers, array) else array('i', indexed.receivers)
+    return b''.join((
+        _HEADER.pack(ROSTER_MAGIC, len(names), name_offsets[-1], email_offsets[-1]),
+        _little_endian(receivers),
+        _little_endian(name_offsets),
+        _little_endian(email_offsets),
+        b''.join(names),
+        b''.join(emails),
+    ))
+
+
+def _read_array(typecode: str, data: bytes, start: int, count: int) -> Tuple[array, int]:
+    values = array(typecode)
+    end = start + count * values.itemsize
+    values.frombytes(data[start:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
+
+
+def decode_roster(data: bytes) -> IndexedAssignments:
+    """Inverse of encode_roster()"""
+    magic, n, names_size, emails_size = _HEADER.unpack_from(data)
+    if magic != ROSTER_MAGIC:
+        raise ValueError("Not a Secret Santa roster")
+    receivers, position = _read_array('i', data, _HEADER.size, n)
+    name_offsets, position = _read_array('I', data, position, n + 1)
+    email_offsets, position = _read_array('I', data, position, n + 1)
+    if len(data) != position + names_size + emails_size:
+        raise ValueError("Truncated Secret Santa roster")
+    name_bytes = data[position:position + names_size]
+    email_bytes = data[position + names_size:]
+    employees = [
+        Employee.model_construct(
+            name=name_bytes[name_offsets[i]:name_offsets[i + 1]].decode('utf-8'),
+            email=email_bytes[email_offsets[i]:email_offsets[i + 1]].decode('utf-8')
+        )
+        for i in range(n)
+    ]
+    return IndexedAssignments(employees, receivers)
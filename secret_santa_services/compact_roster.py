@@ -0,0 +1,118 @@
+from array import array
+from typing import Iterator, List, Sequence, Tuple
+from models import Employee, Assignment
+from employee_repository import EmployeeRepository
+from assignment_history import AssignmentHistory
+
+
+class CompactRoster:
+    """Integer view of a roster for the assignment hot path
+
+    Employees are addressed by their position 0..N-1. Names come as the
+    repository's name-group ids and emails are interned to the history's
+    employee ids, both held in array buffers, so checking a pair compares ints
+    instead of strings and a draw allocates nothing per pair until the final
+    result is materialised.
+
+    Positions follow the canonical (email-sorted) order rather than upload
+    order, so a seeded draw does not depend on how the roster was sorted.
+    Results are handed back in upload order.
+    """
+
+    def __init__(self, repository: EmployeeRepository, history: AssignmentHistory):
+        employees = repository.get_all_employees()
+        order = sorted(range(len(employees)), key=lambda i: employees[i].email)
+        self._upload_employees = employees
+        # Canonical position -> upload index, and back
+        self._upload_index = array('i', order)
+        self._positions = array('i', [0]) * len(order)
+        for position, index in enumerate(order):
+            self._positions[index] = position
+        employees = [employees[i] for i in order]
+        self.employees = employees
+        self.size = len(employees)
+        self.name_groups = array('i', (repository.name_group_ids[i] for i in order))
+        
+        intern = history.interner.intern
+        self.history_ids = array('i', (intern(emp.email) for emp in employees))
+        self._exclusions = [history.exclusions_for_id(hid) for hid in self.history_ids]
+
+    def allowed(self, giver: int, receiver: int) -> bool:
+        """Integer form of AssignmentValidator's rules (self, same name, history)"""
+        return (
+            giver != receiver
+            and self.name_groups[giver] != self.name_groups[receiver]
+            and self.history_ids[receiver] not in self._exclusions[giver]
+        )
+
+    def materialize(self, receivers) -> List[Assignment]:
+        """Build the pydantic result once; the employees are already validated"""
+        return self.indexed(receivers).materialize()
+
+    def indexed(self, receivers) -> 'IndexedAssignments':
+        """The result in upload order as the roster plus a receiver permutation, without per-pair objects"""
+        upload_index = self._upload_index
+        return IndexedAssignments(
+            self._upload_employees,
+            array('i', (upload_index[receivers[position]] for position in self._positions))
+        )
+
+
+class IndexedAssignments:
+    """A draw as the roster once plus receivers[giver] -> receiver positions
+
+    Serializers can work from this directly; Assignment models are only
+    built when asked for.
+    """
+
+    def __init__(self, employees: List[Employee], receivers: Sequence[int]):
+        self.employees = employees
+        self.receivers = receivers
+
+    @classmethod
+    def from_assignments(cls, assignments: List[Assignment]) -> 'IndexedAssignments':
+        positions = {a.employee_email: i for i, a in enumerate(assignments)}
+        employees = [
+            Employee.model_construct(name=a.employee_name, email=a.employee_email) for a in assignments
+        ]
+        return cls(employees, array('i', (positions[a.secret_child_email] for a in assignments)))
+
+    def __len__(self) -> int:
+        return len(self.employees)
+
+    def reordered(self, emails: Sequence[str]) -> 'IndexedAssignments':
+        """The same pairs with the givers in the order of emails"""
+        positions = {emp.email: i for i, emp in enumerate(self.employees)}
+        order = [positions[email] for email in emails]
+        new_positions = array('i', [0]) * len(order)
+        for i, position in enumerate(order):
+            new_positions[position] = i
+        receivers = self.receivers
+        return IndexedAssignments(
+            [self.employees[position] for position in order],
+            array('i', (new_positions[receivers[position]] for position in order))
+        )
+
+    def pairs(self) -> Iterator[Tuple[str, str]]:
+        """(giver_email, receiver_email) for each giver"""
+        employees = self.employees
+        return ((giver.email, employees[receiver].email) for giver, receiver in zip(employees, self.receivers))
+
+    def rows(self) -> Iterator[Tuple[str, str, str, str]]:
+        """(giver name, giver email, receiver name, receiver email) for each giver"""
+        employees = self.employees
+        for giver, receiver in zip(employees, self.receivers):
+            child = employees[receiver]
+            yield giver.name, giver.email, child.name, child.email
+
+    def materialize(self) -> List[Assignment]:
+        construct = Assignment.model_construct
+        return [
+            construct(
+                employee_name=giver_name,
+                employee_email=giver_email,
+                secret_child_name=child_name,
+                secret_child_email=child_email
+            )
+            for giver_name, giver_email, child_name, child_email in self.rows()
+        ]
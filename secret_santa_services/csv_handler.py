@@ -1,73 +1,253 @@
+import codecs
 import csv
 import io
-from typing import List
+import sys
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
 from models import Employee, Assignment
+from exceptions import InvalidEmployeeDataException
+from bulk_validator import BulkValidator, MAX_REPORTED_ROWS
+import metrics
+
+# Either the whole CSV as text or an iterable of raw byte chunks
+CSVSource = Union[str, Iterable[bytes]]
+
+EMPLOYEE_COLUMNS = ['Employee_Name', 'Employee_EmailID']
+# Read when present; used by soft preferences
+EMPLOYEE_OPTIONAL_COLUMNS = ['Department', 'Office', 'Manager_EmailID']
+ASSIGNMENT_COLUMNS = ['Employee_Name', 'Employee_EmailID', 'Secret_Child_Name', 'Secret_Child_EmailID']
+# The only assignment columns the history index needs
+PAIR_COLUMNS = ['Employee_EmailID', 'Secret_Child_EmailID']
 
 
 class CSVHandler:
     """Handles CSV file parsing and generation"""
 
+    chunk_size = 64 * 1024
+
     @staticmethod
-    def parse_employees(csv_content: str) -> List[Employee]:
+    def iter_file_chunks(file: BinaryIO, chunk_size: int = None) -> Iterator[bytes]:
+        """Read a binary file object in fixed-size chunks"""
+        chunk_size = chunk_size or CSVHandler.chunk_size
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def iter_lines(source: CSVSource, encoding: str = 'utf-8-sig') -> Iterator[str]:
+        """Decode a CSV source incrementally into lines, keeping line endings
+
+        Only the current chunk and one partial line are held in memory.
+        """
+        if isinstance(source, str):
+            yield from io.StringIO(source, newline='')
+            return
+        
+        decoder = codecs.getincrementaldecoder(encoding)()
+        pending = ''
+        for chunk in source:
+            pending += decoder.decode(chunk)
+            lines = pending.split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+
+    @staticmethod
+    def iter_rows(source: CSVSource, required_columns: List[str], optional_columns: List[str] = ()) -> Iterator[tuple]:
+        """Yield (line_number, values) with values ordered as required_columns + optional_columns
+
+        The header is read and checked once, from the first line; the
+        delimiter (comma, tab or semicolon) is taken from it too. Optional
+        columns missing from the header, or from a short row, read as ''.
+        """
+        lines = CSVHandler.iter_lines(source)
+        header_line = next(lines, '')
+        delimiter = max(',\t;', key=header_line.count)
+        header = next(csv.reader([header_line], delimiter=delimiter), [])
+        header = [column.strip() for column in header]
+        
+        missing = [column for column in required_columns if column not in header]
+        if missing:
+            raise InvalidEmployeeDataException(
+                f"CSV must contain {' and '.join(repr(c) for c in required_columns)} columns"
+            )
+        positions = [header.index(column) for column in required_columns]
+        width = max(positions) + 1
+        optional_positions = [header.index(column) if column in header else None for column in optional_columns]
+        
+        reader = csv.reader(lines, delimiter=delimiter)
+        for row in reader:
+            if not row:
+                continue
+            line_number = reader.line_num + 1
+            if len(row) < width:
+                raise InvalidEmployeeDataException(f"Missing values on line {line_number}")
+            values = [row[position].strip() for position in positions]
+            if optional_positions:
+                values.extend(
+                    row[position].strip() if position is not None and position < len(row) else ''
+                    for position in optional_positions
+                )
+            yield line_number, values
+
+    @staticmethod
+    def iter_employees(source: CSVSource) -> Iterator[Employee]:
+        try:
+            for _, (name, email) in CSVHandler.iter_rows(source, EMPLOYEE_COLUMNS):
+                yield Employee(name=name, email=email)
+        except csv.Error as e:
+            raise InvalidEmployeeDataException(f"CSV parsing error: {str(e)}")
+        except UnicodeDecodeError as e:
+            raise InvalidEmployeeDataException(f"CSV is not valid UTF-8: {str(e)}")
+
+    @staticmethod
+    def parse_employees(csv_content: CSVSource) -> List[Employee]:
+        """Parse and bulk-validate employees, reporting every invalid row at once"""
         try:
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            
-            employees = []
-            for row in reader:
-                if 'Employee_Name' not in row or 'Employee_EmailID' not in row:
-                    raise InvalidEmployeeDataException(
-                        "CSV must contain 'Employee_Name' and 'Employee_EmailID' columns"
-                    )
-                
-                employees.append(Employee(
-                    name=row['Employee_Name'].strip(),
-                    email=row['Employee_EmailID'].strip()
-                ))
-            
-            if not employees:
-                raise InvalidEmployeeDataException("CSV file contains no employee data")
-            
-            return employees
-            
+            with metrics.span('csv_parse'):
+                line_numbers, names, emails, *attributes = CSVHandler._read_columns(
+                    csv_content, EMPLOYEE_COLUMNS, EMPLOYEE_OPTIONAL_COLUMNS
+                )
         except csv.Error as e:
             raise InvalidEmployeeDataException(f"CSV parsing error: {str(e)}")
-        except KeyError as e:
-            raise InvalidEmployeeDataException(f"Missing required column: {str(e)}")
+        except UnicodeDecodeError as e:
+            raise InvalidEmployeeDataException(f"CSV is not valid UTF-8: {str(e)}")
+        
+        if not line_numbers:
+            raise InvalidEmployeeDataException("CSV file contains no employee data")
+        with metrics.span('csv_validation'):
+            return BulkValidator.validate_employees(line_numbers, names, emails, *attributes)
 
     @staticmethod
-    def parse_previous_assignments(csv_content: str) -> List[Assignment]:
+    def iter_previous_assignments(source: CSVSource) -> Iterator[Assignment]:
         try:
-            csv_file = io.StringIO(csv_content)
-            reader = csv.DictReader(csv_file)
-            
-            assignments = []
-            for row in reader:
-                assignments.append(Assignment(
-                    employee_name=row['Employee_Name'].strip(),
-                    employee_email=row['Employee_EmailID'].strip(),
-                    secret_child_name=row['Secret_Child_Name'].strip(),
-                    secret_child_email=row['Secret_Child_EmailID'].strip()
-                ))
-            
-            return assignments
-            
-        except (csv.Error, KeyError) as e:
+            for _, values in CSVHandler.iter_rows(source, ASSIGNMENT_COLUMNS):
+                yield Assignment(
+                    employee_name=values[0],
+                    employee_email=values[1],
+                    secret_child_name=values[2],
+                    secret_child_email=values[3]
+                )
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise InvalidEmployeeDataException(f"Previous assignments parsing error: {str(e)}")
+        except InvalidEmployeeDataException as e:
             raise InvalidEmployeeDataException(f"Previous assignments parsing error: {str(e)}")
 
     @staticmethod
-    def generate_csv(assignments: List[Assignment]) -> str:
-        output = io.StringIO()
-        fieldnames = ['Employee_Name', 'Employee_EmailID', 'Secret_Child_Name', 'Secret_Child_EmailID']
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        
-        writer.writeheader()
+    def parse_previous_assignments(csv_content: CSVSource) -> List[Assignment]:
+        """Parse and bulk-validate previous assignments"""
+        try:
+            with metrics.span('csv_parse_history'):
+                columns = CSVHandler._read_columns(csv_content, ASSIGNMENT_COLUMNS)
+                return BulkValidator.validate_assignments(*columns)
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise InvalidEmployeeDataException(f"Previous assignments parsing error: {str(e)}")
+        except InvalidEmployeeDataException as e:
+            raise InvalidEmployeeDataException(f"Previous assignments parsing error: {str(e)}")
+
+    @staticmethod
+    def iter_history_pairs(source: CSVSource) -> Iterator[Tuple[str, str]]:
+        """Stream unique (giver_email, receiver_email) pairs from a previous assignments CSV
+
+        Only the two email columns are read (names may be missing from the
+        file entirely); emails are normalised like EmailStr and interned, so
+        memory grows with the number of distinct pairs, not the file size.
+        Invalid rows are reported together once the whole file was read.
+        """
+        normalize = BulkValidator.normalize_email
+        seen = set()
+        errors: Dict[int, List[str]] = {}
+        invalid_rows = 0
+        try:
+            for line_number, (giver_email, child_email) in CSVHandler.iter_rows(source, PAIR_COLUMNS):
+                giver = normalize(giver_email)
+                child = normalize(child_email)
+                if giver is None or child is None:
+                    invalid_rows += 1
+                    if len(errors) < MAX_REPORTED_ROWS:
+                        errors[line_number] = [
+                            f"invalid {kind} email '{email}'"
+                            for kind, email, value in (
+                                ("employee", giver_email, giver), ("secret child", child_email, child)
+                            )
+                            if value is None
+                        ]
+                    continue
+                pair = (sys.intern(giver), sys.intern(child))
+                if pair not in seen:
+                    seen.add(pair)
+                    yield pair
+            if invalid_rows:
+                BulkValidator.raise_for_lines(errors, invalid_rows, "assignment")
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise InvalidEmployeeDataException(f"Previous assignments parsing error: {str(e)}")
+        except InvalidEmployeeDataException as e:
+            raise InvalidEmployeeDataException(f"Previous assignments parsing error: {str(e)}")
+
+    @staticmethod
+    def parse_history_pairs(csv_content: CSVSource) -> List[Tuple[str, str]]:
+        """iter_history_pairs() collected into a list"""
+        with metrics.span('csv_parse_history'):
+            return list(CSVHandler.iter_history_pairs(csv_content))
+
+    @staticmethod
+    def _read_columns(source: CSVSource, required_columns: List[str], optional_columns: List[str] = ()) -> List[list]:
+        """Collect line numbers and each column into separate lists"""
+        columns = [[] for _ in range(len(required_columns) + len(optional_columns) + 1)]
+        appenders = [column.append for column in columns]
+        for line_number, values in CSVHandler.iter_rows(source, required_columns, optional_columns):
+            appenders[0](line_number)
+            for append, value in zip(appenders[1:], values):
+                append(value)
+        return columns
+
+    @staticmethod
+    def iter_csv(assignments: Iterable[Assignment], chunk_size: int = None, encoding: str = 'utf-8') -> Iterator[bytes]:
+        """Yield the assignments CSV as encoded chunks of about chunk_size bytes
+
+        Rows are written as the assignments iterable produces them, so only
+        one chunk is ever buffered.
+        """
+        return CSVHandler.iter_csv_rows(CSVHandler._assignment_rows(assignments), chunk_size, encoding)
+
+    @staticmethod
+    def iter_csv_rows(rows: Iterable[Tuple[str, str, str, str]], chunk_size: int = None,
+                      encoding: str = 'utf-8') -> Iterator[bytes]:
+        """iter_csv() from (name, email, child name, child email) tuples, e.g. IndexedAssignments.rows()"""
+        chunk_size = chunk_size or CSVHandler.chunk_size
+        chunks = (text.encode(encoding) for text in CSVHandler._iter_csv_text(rows, chunk_size))
+        return metrics.timed_chunks('csv_generate', chunks, 'sent')
+
+    @staticmethod
+    def _assignment_rows(assignments: Iterable[Assignment]) -> Iterator[Tuple[str, str, str, str]]:
         for assignment in assignments:
-            writer.writerow({
-                'Employee_Name': assignment.employee_name,
-                'Employee_EmailID': assignment.employee_email,
-                'Secret_Child_Name': assignment.secret_child_name,
-                'Secret_Child_EmailID': assignment.secret_child_email
-            })
+            yield (
+                assignment.employee_name,
+                assignment.employee_email,
+                assignment.secret_child_name,
+                assignment.secret_child_email
+            )
+
+    @staticmethod
+    def _iter_csv_text(rows: Iterable[Tuple[str, str, str, str]], chunk_size: int) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(ASSIGNMENT_COLUMNS)
+        
+        for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= chunk_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
         
-        return output.getvalue()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def generate_csv(assignments: List[Assignment]) -> str:
+        return ''.join(CSVHandler._iter_csv_text(CSVHandler._assignment_rows(assignments), CSVHandler.chunk_size))
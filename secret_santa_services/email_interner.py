@@ -0,0 +1,29 @@
+from typing import Dict, List, Optional
+
+
+class EmailInterner:
+    """Maps employee emails to dense integer ids (0, 1, 2, ...)"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._emails: List[str] = []
+
+    def intern(self, email: str) -> int:
+        """Get the id for an email, assigning the next free id if it is new"""
+        employee_id = self._ids.get(email)
+        if employee_id is None:
+            employee_id = len(self._emails)
+            self._ids[email] = employee_id
+            self._emails.append(email)
+        return employee_id
+
+    def get(self, email: str) -> Optional[int]:
+        """Get the id for an email without interning it"""
+        return self._ids.get(email)
+
+    def email(self, employee_id: int) -> str:
+        """Get the email behind an id"""
+        return self._emails[employee_id]
+
+    def __len__(self) -> int:
+        return len(self._emails)
@@ -1,5 +1,7 @@
+from array import array
 from typing import List, Dict, Optional
 from models import Employee
+from exceptions import InsufficientEmployeesException, DuplicateEmailException
 
 
 class EmployeeRepository:
@@ -11,25 +13,56 @@ class EmployeeRepository:
             DuplicateEmailException: If duplicate emails found
         """
         self.employees = employees
+        self._email_to_employee: Dict[str, Employee] = {}
+        # name_group_ids[i] is shared by every employee with employees[i]'s name
+        self.name_group_ids = array('i')
+        self._name_group_sizes: List[int] = []
         self._validate_employees()
-        self._email_to_employee: Dict[str, Employee] = {
-            emp.email: emp for emp in employees
-        }
 
     def _validate_employees(self):
-        """Validate employee data"""
+        """Validate employee data in a single hashing pass
+
+        Every duplicate is collected before raising so one response reports
+        them all: exact duplicates, and emails that only differ in case or
+        surrounding whitespace.
+        """
         if len(self.employees) < 2:
             raise InsufficientEmployeesException(
                 "At least 2 employees are required for Secret Santa"
             )
         
-        # Check for duplicate emails
-        emails = [emp.email for emp in self.employees]
-        if len(emails) != len(set(emails)):
-            duplicates = [email for email in emails if emails.count(email) > 1]
-            raise DuplicateEmailException(
-                f"Duplicate email(s) found: {', '.join(set(duplicates))}"
-            )
+        by_email = self._email_to_employee
+        first_by_normalized: Dict[str, str] = {}
+        exact_duplicates: Dict[str, None] = {}
+        normalized_duplicates: Dict[str, List[str]] = {}
+        group_ids: Dict[str, int] = {}
+        group_sizes = self._name_group_sizes
+        
+        for emp in self.employees:
+            email = emp.email
+            if email in by_email:
+                exact_duplicates[email] = None
+            else:
+                by_email[email] = emp
+                key = email.strip().casefold()
+                first = first_by_normalized.setdefault(key, email)
+                if first != email:
+                    normalized_duplicates.setdefault(key, [first]).append(email)
+            
+            group_id = group_ids.setdefault(emp.name, len(group_ids))
+            if group_id == len(group_sizes):
+                group_sizes.append(0)
+            group_sizes[group_id] += 1
+            self.name_group_ids.append(group_id)
+        
+        problems = []
+        if exact_duplicates:
+            problems.append(f"Duplicate email(s) found: {', '.join(exact_duplicates)}")
+        if normalized_duplicates:
+            variants = '; '.join(' / '.join(group) for group in normalized_duplicates.values())
+            problems.append(f"Email(s) differing only in case or whitespace: {variants}")
+        if problems:
+            raise DuplicateEmailException('. '.join(problems))
 
     def get_all_employees(self) -> List[Employee]:
         """Get all employees"""
@@ -42,3 +75,16 @@ class EmployeeRepository:
     def get_employee_count(self) -> int:
         """Get total number of employees"""
         return len(self.employees)
+
+    def get_name_group_count(self) -> int:
+        """Get number of distinct names"""
+        return len(self._name_group_sizes)
+
+    def get_duplicate_names(self) -> Dict[str, List[str]]:
+        """Get emails of employees sharing a name, for names used more than once"""
+        sizes = self._name_group_sizes
+        duplicates: Dict[str, List[str]] = {}
+        for emp, group_id in zip(self.employees, self.name_group_ids):
+            if sizes[group_id] > 1:
+                duplicates.setdefault(emp.name, []).append(emp.email)
+        return duplicates
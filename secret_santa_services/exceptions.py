@@ -21,3 +21,31 @@ class AssignmentFailedException(SecretSantaException):
 class DuplicateEmailException(SecretSantaException):
     """Raised when duplicate emails are found"""
     pass
+
+
+class InfeasibleAssignmentException(AssignmentFailedException):
+    """Raised when the constraints admit no valid assignment at all"""
+
+    def __init__(self, message: str, blocking_employees: list = None):
+        super().__init__(message)
+        self.blocking_employees = blocking_employees or []
+
+
+class ServiceOverloadedException(SecretSantaException):
+    """Raised when too many requests are already queued for a worker"""
+    pass
+
+
+class AssignmentTimeoutException(SecretSantaException):
+    """Raised when a request does not finish within its time limit"""
+    pass
+
+
+class UnsupportedAlgorithmException(SecretSantaException):
+    """Raised when a request asks for an unknown draw algorithm version"""
+    pass
+
+
+class ProfilingNotAllowedException(SecretSantaException):
+    """Raised when a request asks to be profiled without a valid profiling token"""
+    pass
@@ -0,0 +1,146 @@
+import json
+from typing import Any, Dict, List, Optional
+from pydantic import ValidationError
+from models import Assignment, AssignmentRequest
+from bulk_validator import BulkValidator
+from exceptions import InvalidEmployeeDataException
+
+try:
+    import orjson
+except ImportError:  # optional; the standard library does the same, only slower
+    orjson = None
+
+_EMPLOYEE_OPTIONAL_FIELDS = ('department', 'office', 'manager_email')
+_ASSIGNMENT_FIELDS = ('employee_name', 'employee_email', 'secret_child_name', 'secret_child_email')
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class _Fallback(Exception):
+    """The payload is not in the shape the fast path handles; let pydantic judge it"""
+
+
+def parse_assignment_request(body: bytes) -> AssignmentRequest:
+    """An AssignmentRequest from a JSON body, validating the large lists column-wise
+
+    The employee and history lists go through BulkValidator once and are
+    built with model_construct; the few scalar fields and optimize are
+    validated by AssignmentRequest itself with the lists left empty. A
+    payload the fast path rejects or does not recognise (wrong types,
+    invalid emails, empty names) is validated again by the full model, so
+    callers get the same ValidationError the standard /assign reports.
+
+    Raises ValueError for a body that is not JSON.
+    """
+    data = loads(body)
+    try:
+        return _parse(data)
+    except (_Fallback, InvalidEmployeeDataException):
+        return AssignmentRequest.model_validate(data)
+
+
+def _parse(data: Any) -> AssignmentRequest:
+    if not isinstance(data, dict):
+        raise _Fallback()
+    scalars = {
+        key: value for key, value in data.items()
+        if key not in ('current_employees', 'previous_assignments', 'previous_years')
+    }
+    request = AssignmentRequest.model_validate(dict(scalars, current_employees=[]))
+    
+    update = {'current_employees': _employees(data.get('current_employees'))}
+    previous = data.get('previous_assignments')
+    if previous is not None:
+        update['previous_assignments'] = _assignments(previous)
+    previous_years = data.get('previous_years')
+    if previous_years is not None:
+        if not isinstance(previous_years, dict):
+            raise _Fallback()
+        try:
+            update['previous_years'] = {
+                int(year): _assignments(assignments) for year, assignments in previous_years.items()
+            }
+        except ValueError:
+            raise _Fallback()
+    return request.model_copy(update=update)
+
+
+def _column(items: List[dict], field: str, required: bool = True) -> List[Optional[str]]:
+    values = [item.get(field) for item in items]
+    for value in values:
+        if not isinstance(value, str) and (required or value is not None):
+            raise _Fallback()
+    return values
+
+
+def _items(items: Any) -> List[dict]:
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise _Fallback()
+    return items
+
+
+def _employees(items: Any):
+    items = _items(items)
+    optional = {
+        field: _column(items, field, required=False)
+        for field in _EMPLOYEE_OPTIONAL_FIELDS
+        if any(field in item for item in items)
+    }
+    # EmailStr refuses an empty manager_email, which the CSV columns read as not set
+    if '' in optional.get('manager_email', ()):
+        raise _Fallback()
+    return BulkValidator.validate_employees(
+        range(len(items)),
+        _column(items, 'name'),
+        _column(items, 'email'),
+        optional.get('department'),
+        optional.get('office'),
+        optional.get('manager_email')
+    )
+
+
+def _assignments(items: Any) -> List[Assignment]:
+    items = _items(items)
+    return BulkValidator.validate_assignments(
+        range(len(items)), *(_column(items, field) for field in _ASSIGNMENT_FIELDS)
+    )
+
+
+def encode_assignment_response(draw) -> bytes:
+    """The AssignmentResponse JSON for a DrawResult, written straight from its indexed pairs"""
+    return dumps({
+        "success": True,
+        "message": "Assignments generated successfully",
+        "assignments": [
+            {
+                "employee_name": giver_name,
+                "employee_email": giver_email,
+                "secret_child_name": child_name,
+                "secret_child_email": child_email,
+            }
+            for giver_name, giver_email, child_name, child_email in draw.indexed.rows()
+        ],
+        "total_assignments": draw.total_assignments,
+        "seed": draw.seed,
+        "algorithm_version": draw.algorithm_version,
+        "digest": draw.digest,
+        "score": draw.score,
+    })
+
+
+def validation_errors(error: Exception) -> List[Dict[str, Any]]:
+    """RequestValidationError details for a failed parse_assignment_request(), located in the body"""
+    if isinstance(error, ValidationError):
+        return [dict(detail, loc=('body', *detail['loc'])) for detail in error.errors(include_url=False)]
+    return [{"type": "json_invalid", "loc": ("body",), "msg": "JSON decode error", "input": {},
+             "ctx": {"error": str(error)}}]
@@ -0,0 +1,105 @@
+import random
+from array import array
+from functools import partial
+from typing import List
+from compact_roster import CompactRoster
+from swap_search import find_swap
+
+
+class GiftChain:
+    """Single-cycle draws: joins the loops of a valid draw into one gift chain
+
+    A valid draw (receivers[giver] with every pair allowed) usually falls
+    into a few separate loops; a random one into about ln N. Swapping the
+    receivers of two givers on different loops, a -> ra and b -> rb becoming
+    a -> rb and b -> ra, splices the two loops into one. Every loop is
+    spliced into the largest one this way, accepted only when both new pairs
+    are allowed. With the usual constraints, even when almost half the
+    roster shares one name, a swap is found after a handful of random
+    probes, making a join expected O(N) on top of the draw itself.
+
+    Loops no swap could join with the rest are reported as stuck; see join().
+    """
+
+    # Random swap partners probed before falling back to a full scan
+    swap_samples = 32
+
+    def __init__(self, roster: CompactRoster, rng: random.Random):
+        self.roster = roster
+        self.rng = rng
+        # Loops spliced into the chain
+        self.joins = 0
+        # Givers on loops that could not be joined with the chain
+        self.stuck: List[int] = []
+
+    def join(self, receivers: array) -> array:
+        """Splice the loops of a valid draw into one cycle, in place, and return it
+        
+        stuck lists the givers of the loops left over; the draw is only a
+        single cycle when it is empty. It is always still a valid draw.
+        """
+        loops = sorted(self.loops(receivers), key=len)
+        chain = loops.pop()
+        self.stuck = []
+        
+        # A loop that fits nowhere yet may fit once others have joined
+        pending = loops
+        while pending:
+            deferred = []
+            for loop in pending:
+                if self._splice(receivers, loop, chain):
+                    chain.extend(loop)
+                    self.joins += 1
+                else:
+                    deferred.append(loop)
+            if len(deferred) == len(pending):
+                self.stuck = [giver for loop in deferred for giver in loop]
+                break
+            pending = deferred
+        return receivers
+
+    @staticmethod
+    def loops(receivers: array) -> List[List[int]]:
+        """The givers of each loop of a draw, in giving order"""
+        seen = bytearray(len(receivers))
+        loops = []
+        for start in range(len(receivers)):
+            if seen[start]:
+                continue
+            loop = []
+            giver = start
+            while not seen[giver]:
+                seen[giver] = 1
+                loop.append(giver)
+                giver = receivers[giver]
+            loops.append(loop)
+        return loops
+
+    @staticmethod
+    def order(receivers: array) -> array:
+        """The circle of a single-cycle draw: order[k] gives to order[k + 1]"""
+        order = array('i', [0]) * len(receivers)
+        giver = 0
+        for k in range(len(receivers)):
+            order[k] = giver
+            giver = receivers[giver]
+        return order
+
+    @staticmethod
+    def receivers(order: array) -> array:
+        """receivers[giver] -> receiver for a circle order"""
+        receivers = array('i', [0]) * len(order)
+        for giver, receiver in zip(order, order[1:] + order[:1]):
+            receivers[giver] = receiver
+        return receivers
+
+    def _splice(self, receivers: array, loop: List[int], chain: List[int]) -> bool:
+        """Join loop with chain by swapping receivers between one giver of each"""
+        return find_swap(self.rng, self.swap_samples, loop, chain, partial(self._try_swap, receivers))
+
+    def _try_swap(self, receivers: array, a: int, b: int) -> bool:
+        allowed = self.roster.allowed
+        if allowed(a, receivers[b]) and allowed(b, receivers[a]):
+            receivers[a], receivers[b] = receivers[b], receivers[a]
+            return True
+        return False
@@ -0,0 +1,139 @@
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from models import Assignment
+
+if TYPE_CHECKING:
+    import sqlite3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    draw_group TEXT NOT NULL DEFAULT '',
+    year INTEGER NOT NULL,
+    employee_email TEXT NOT NULL,
+    employee_name TEXT NOT NULL,
+    secret_child_email TEXT NOT NULL,
+    secret_child_name TEXT NOT NULL,
+    PRIMARY KEY (draw_group, year, employee_email)
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_giver ON assignments (draw_group, employee_email, year);
+CREATE INDEX IF NOT EXISTS idx_assignments_receiver ON assignments (draw_group, secret_child_email, year);
+"""
+
+
+class HistoryStore:
+    """SQLite file holding every committed draw, indexed by year, giver and receiver
+
+    Draws are kept per group (office, team, ...); the default group is ''.
+
+    One connection is shared by the process behind a lock; WAL mode lets
+    worker processes read while another one commits a draw. The store pickles
+    as its path, so process-pool workers reopen the same file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: Optional['sqlite3.Connection'] = None
+
+    @classmethod
+    def from_env(cls) -> Optional['HistoryStore']:
+        """Store at SECRET_SANTA_HISTORY_DB, or None when it is not set"""
+        path = os.environ.get('SECRET_SANTA_HISTORY_DB')
+        return cls(path) if path else None
+
+    def __reduce__(self):
+        return (HistoryStore, (self.path,))
+
+    def _connect(self) -> 'sqlite3.Connection':
+        if self._connection is None:
+            import sqlite3
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def save_draw(self, year: int, assignments: List[Assignment], group: str = ''):
+        """Store a year's draw, replacing any earlier draw for that year"""
+        rows = [
+            (group, year, a.employee_email, a.employee_name, a.secret_child_email, a.secret_child_name)
+            for a in assignments
+        ]
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "DELETE FROM assignments WHERE draw_group = ? AND year = ?", (group, year)
+                )
+                connection.executemany(
+                    "INSERT INTO assignments (draw_group, year, employee_email, employee_name, "
+                    "secret_child_email, secret_child_name) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+
+    def years(self, group: str = '') -> List[int]:
+        """Years with a stored draw, most recent first"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT DISTINCT year FROM assignments WHERE draw_group = ? ORDER BY year DESC",
+                (group,)
+            ).fetchall()
+        return [year for (year,) in rows]
+
+    def load_pairs(
+        self,
+        before_year: Optional[int] = None,
+        lookback_years: Optional[int] = None,
+        group: str = ''
+    ) -> Dict[int, List[Tuple[str, str]]]:
+        """(giver_email, receiver_email) pairs per year for the most recent years
+
+        Only years before before_year are read, and at most lookback_years of
+        them, so the cost follows the window rather than the whole history.
+        """
+        years = self.years(group)
+        if before_year is not None:
+            years = [year for year in years if year < before_year]
+        if lookback_years is not None:
+            years = years[:lookback_years]
+        if not years:
+            return {}
+        
+        pairs: Dict[int, List[Tuple[str, str]]] = {year: [] for year in years}
+        with self._lock:
+            cursor = self._connect().execute(
+                "SELECT year, employee_email, secret_child_email FROM assignments "
+                "WHERE draw_group = ? AND year BETWEEN ? AND ?",
+                (group, min(years), max(years))
+            )
+            for year, giver, receiver in cursor:
+                if year in pairs:
+                    pairs[year].append((giver, receiver))
+        return pairs
+
+    def previous_children(self, giver_email: str, group: str = '') -> List[Tuple[int, str]]:
+        """(year, secret_child_email) for every stored draw of one giver"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT year, secret_child_email FROM assignments "
+                "WHERE draw_group = ? AND employee_email = ? ORDER BY year DESC",
+                (group, giver_email)
+            ).fetchall()
+        return rows
+
+    def previous_santas(self, receiver_email: str, group: str = '') -> List[Tuple[int, str]]:
+        """(year, employee_email) for every stored draw that gave to one receiver"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT year, employee_email FROM assignments "
+                "WHERE draw_group = ? AND secret_child_email = ? ORDER BY year DESC",
+                (group, receiver_email)
+            ).fetchall()
+        return rows
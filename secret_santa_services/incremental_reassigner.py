@@ -0,0 +1,163 @@
+import random
+from typing import Dict, List, Optional, Set
+from models import Employee, Assignment
+from assignment_history import AssignmentHistory
+from assignment_validator import AssignmentValidator
+from exceptions import AssignmentFailedException, InvalidEmployeeDataException
+
+
+class IncrementalReassigner:
+    """Repairs an existing draw after people join or leave
+
+    Only the links next to a change are rewritten, so everyone else keeps the
+    secret child they already have:
+
+    - a joiner x is spliced into one link g -> r, giving g -> x -> r
+    - for a leaver y with p -> y -> c, p is bridged to c; if that pair breaks
+      a rule, one other link a -> b is swapped instead (p -> b, a -> c)
+
+    Candidate links are sampled at random and every new pair is checked with
+    AssignmentValidator, so each change rewrites at most two pairs. Splicing
+    and bridging keep a single gift chain intact; the swap fallback may split
+    it into two loops.
+    """
+
+    # Random links probed before falling back to a full scan
+    link_samples = 32
+
+    def __init__(
+        self,
+        assignments: List[Assignment],
+        history: AssignmentHistory,
+        rng: Optional[random.Random] = None
+    ):
+        self.history = history
+        self.validator = AssignmentValidator()
+        self.rng = rng or random.Random()
+        self._people: Dict[str, Employee] = {}
+        self._receiver_of: Dict[str, str] = {}
+        self._giver_of: Dict[str, str] = {}
+        self.changed: Set[str] = set()
+        
+        for a in assignments:
+            self._people[a.employee_email] = Employee.model_construct(name=a.employee_name, email=a.employee_email)
+            self._receiver_of[a.employee_email] = a.secret_child_email
+            self._giver_of[a.secret_child_email] = a.employee_email
+        
+        if set(self._receiver_of) != set(self._giver_of) or len(self._giver_of) != len(assignments):
+            raise InvalidEmployeeDataException(
+                "Current assignments must give every employee exactly one secret child and one Secret Santa"
+            )
+        self._givers: List[str] = list(self._receiver_of)
+        self._positions: Dict[str, int] = {email: i for i, email in enumerate(self._givers)}
+
+    def apply(self, joined: List[Employee] = None, left: List[str] = None) -> List[Assignment]:
+        """Add joiners, then remove leavers; returns the updated draw"""
+        joined = joined or []
+        left = left or []
+        
+        unknown = [email for email in left if email not in self._receiver_of]
+        if unknown:
+            raise InvalidEmployeeDataException(f"Not in the current draw: {', '.join(unknown)}")
+        existing = [emp.email for emp in joined if emp.email in self._receiver_of and emp.email not in left]
+        if existing:
+            raise InvalidEmployeeDataException(f"Already in the current draw: {', '.join(existing)}")
+        if len(self._givers) - len(set(left)) + len(joined) < 2:
+            raise InvalidEmployeeDataException("At least 2 employees must remain in the draw")
+        
+        # Joiners go in before the leavers come out, so removing never runs the
+        # draw down to a single person; someone leaving and joining again is
+        # taken out first to be added back fresh
+        leaving = list(dict.fromkeys(left))
+        returning = {emp.email for emp in joined} & set(leaving)
+        for email in leaving:
+            if email in returning:
+                self._remove(email)
+        for employee in joined:
+            self._add(employee)
+        for email in leaving:
+            if email not in returning:
+                self._remove(email)
+        
+        people = self._people
+        return [
+            Assignment.model_construct(
+                employee_name=people[giver].name,
+                employee_email=giver,
+                secret_child_name=people[receiver].name,
+                secret_child_email=receiver
+            )
+            for giver, receiver in ((g, self._receiver_of[g]) for g in self._givers)
+        ]
+
+    def _allowed(self, giver: str, receiver: str) -> bool:
+        is_valid, _ = self.validator.validate(self._people[giver], self._people[receiver], self.history)
+        return is_valid
+
+    def _link(self, giver: str, receiver: str):
+        self._receiver_of[giver] = receiver
+        self._giver_of[receiver] = giver
+        self.changed.add(giver)
+
+    def _random_links(self):
+        """Yield givers of existing links: random samples, then all from a random offset"""
+        givers = self._givers
+        for _ in range(min(self.link_samples, len(givers))):
+            yield givers[self.rng.randrange(len(givers))]
+        start = self.rng.randrange(len(givers))
+        for offset in range(len(givers)):
+            yield givers[(start + offset) % len(givers)]
+
+    def _remove(self, email: str):
+        santa = self._giver_of.pop(email)
+        child = self._receiver_of.pop(email)
+        self._forget(email)
+        self.changed.discard(email)
+        
+        if santa == email:
+            return
+        if santa != child and self._allowed(santa, child):
+            self._link(santa, child)
+            return
+        
+        # santa needs a new child and child a new Santa: swap with one link a -> b
+        self._receiver_of.pop(santa)
+        self._giver_of.pop(child)
+        for other in self._random_links():
+            if other == santa:
+                continue
+            other_child = self._receiver_of[other]
+            if self._allowed(santa, other_child) and self._allowed(other, child):
+                self._link(santa, other_child)
+                self._link(other, child)
+                return
+        
+        raise AssignmentFailedException(
+            f"Could not repair the draw after {email} left without reshuffling; "
+            "generate a new draw instead"
+        )
+
+    def _add(self, employee: Employee):
+        self._people[employee.email] = employee
+        for giver in self._random_links():
+            receiver = self._receiver_of[giver]
+            if self._allowed(giver, employee.email) and self._allowed(employee.email, receiver):
+                self._givers.append(employee.email)
+                self._positions[employee.email] = len(self._givers) - 1
+                self._link(giver, employee.email)
+                self._link(employee.email, receiver)
+                return
+        
+        del self._people[employee.email]
+        raise AssignmentFailedException(
+            f"Could not add {employee.email} to the draw without reshuffling; "
+            "generate a new draw instead"
+        )
+
+    def _forget(self, email: str):
+        """Drop a giver from the sampling list in O(1) by moving the last one into its slot"""
+        position = self._positions.pop(email)
+        last = self._givers.pop()
+        if last != email:
+            self._givers[position] = last
+            self._positions[last] = position
@@ -0,0 +1,335 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from compact_roster import IndexedAssignments
+from exceptions import InvalidEmployeeDataException, SecretSantaException, ServiceOverloadedException
+import metrics
+
+# Share of the progress bar reached when each stage starts
+STAGE_PROGRESS = {
+    'queued': 0.0,
+    'parse': 0.05,
+    'validate': 0.25,
+    'solve': 0.4,
+    'serialize': 0.85,
+    'done': 1.0,
+}
+
+# metrics.span stage -> job stage
+_SPAN_STAGES = {
+    'csv_parse': 'parse',
+    'csv_parse_history': 'parse',
+    'csv_validation': 'validate',
+    'validation': 'validate',
+    'history': 'validate',
+    'assignment': 'solve',
+    'persist': 'serialize',
+}
+
+# Assignments written between two progress updates while serialising
+_PROGRESS_ROWS = 10000
+
+RESULT_FILENAME = 'assignments.csv'
+
+
+class Job:
+    """State of one background draw; updated by the worker, read by status requests"""
+
+    def __init__(self, job_id: str, directory: str):
+        self.job_id = job_id
+        self.directory = directory
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.progress = 0.0
+        self.message: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.total_assignments: Optional[int] = None
+        self.seed: Optional[int] = None
+        self.algorithm_version: Optional[int] = None
+        self.digest: Optional[str] = None
+        self.score: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def result_path(self) -> str:
+        return os.path.join(self.directory, RESULT_FILENAME)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('succeeded', 'failed')
+
+    def advance(self, stage: str, progress: Optional[float] = None):
+        with self._lock:
+            self.status = 'running'
+            self.stage = stage
+            self.progress = max(self.progress, STAGE_PROGRESS[stage] if progress is None else progress)
+
+    def succeed(self, draw):
+        with self._lock:
+            self.status = 'succeeded'
+            self.stage = 'done'
+            self.progress = 1.0
+            self.message = "Assignments generated successfully"
+            self.finished_at = time.time()
+            self.total_assignments = draw.total_assignments
+            self.seed = draw.seed
+            self.algorithm_version = draw.algorithm_version
+            self.digest = draw.digest
+            self.score = draw.score
+
+    def fail(self, message: str):
+        with self._lock:
+            self.status = 'failed'
+            self.message = message
+            self.finished_at = time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "status": self.status,
+                "stage": self.stage,
+                "progress": round(self.progress, 3),
+                "message": self.message,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "total_assignments": self.total_assignments,
+                "seed": self.seed,
+                "algorithm_version": self.algorithm_version,
+                "digest": self.digest,
+                "score": self.score,
+            }
+
+
+class JobManager:
+    """Local queue of draws solved in the background, with results on disk
+
+    Submitting returns a Job straight away; worker threads take jobs from a
+    bounded in-process queue, run the draw through the service (parse,
+    validate, solve) and write the result CSV into the job's directory
+    (serialize), reporting the stage and progress as they go. Jobs bypass
+    the executor's request timeout, so a draw may take as long as it needs.
+
+    Finished jobs and their files are removed ttl_seconds after finishing.
+    shutdown() fails the jobs still queued rather than waiting for them.
+    """
+
+    def __init__(
+        self,
+        service,
+        directory: Optional[str] = None,
+        workers: int = 1,
+        max_queue: int = 16,
+        ttl_seconds: float = 3600
+    ):
+        self.service = service
+        self.directory = directory
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Set by shutdown(); each generation of worker threads watches its own
+        self._stopping = threading.Event()
+        # The job directory when it was created here, to be deleted on shutdown
+        self._temporary_directory: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, service) -> 'JobManager':
+        """Configured by SECRET_SANTA_JOB_DIR, _JOB_WORKERS, _JOB_QUEUE and _JOB_TTL_SECONDS"""
+        return cls(
+            service,
+            directory=os.environ.get('SECRET_SANTA_JOB_DIR') or None,
+            workers=int(os.environ.get('SECRET_SANTA_JOB_WORKERS', '1')),
+            max_queue=int(os.environ.get('SECRET_SANTA_JOB_QUEUE', '16')),
+            ttl_seconds=float(os.environ.get('SECRET_SANTA_JOB_TTL_SECONDS', '3600'))
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def submit_draw(self, **draw_kwargs) -> Job:
+        """Queue a generate_draw() call with an already validated roster"""
+        job = self._new_job()
+        return self._enqueue(job, lambda: self.service.generate_draw(**draw_kwargs))
+
+    def submit_json(self, body: bytes) -> Job:
+        """Queue a draw from an AssignmentRequest JSON body
+
+        The body is only parsed and validated in the job, so that a large
+        roster does not hold up the request that submits it.
+        """
+        def run():
+            import fast_json
+            
+            try:
+                request = fast_json.parse_assignment_request(body)
+            except ValueError as e:
+                raise InvalidEmployeeDataException(f"Invalid request: {e}")
+            return self.service.generate_draw(
+                employees=request.current_employees,
+                previous_assignments=request.previous_assignments,
+                previous_years=request.previous_years,
+                lookback_years=request.lookback_years,
+                seed=request.seed,
+                algorithm_version=request.algorithm_version,
+                year=request.year,
+                optimize=request.optimize,
+                single_cycle=request.single_cycle
+            )
+
+        return self._enqueue(self._new_job(), run)
+
+    def submit_csv(self, employees_file: BinaryIO, previous_file: Optional[BinaryIO] = None, **draw_kwargs) -> Job:
+        """Queue a draw from CSV uploads
+        
+        The uploads are copied into the job's directory first, since they
+        are gone once the request that carried them returns.
+        """
+        from csv_handler import CSVHandler
+        
+        job = self._new_job()
+        employees_path = self._save_upload(employees_file, job, 'employees.csv')
+        previous_path = self._save_upload(previous_file, job, 'previous.csv') if previous_file else None
+        
+        def run():
+            employees = CSVHandler.parse_employees(self._read_chunks(employees_path))
+            previous_pairs = None
+            if previous_path is not None:
+                previous_pairs = CSVHandler.parse_history_pairs(self._read_chunks(previous_path))
+            return self.service.generate_draw(employees, previous_pairs=previous_pairs, **draw_kwargs)
+
+        return self._enqueue(job, run)
+
+    def shutdown(self):
+        """Stop the workers, fail the jobs still queued and delete a temporary job directory
+
+        Does not wait: a job already running is left to its (daemon) thread.
+        """
+        with self._lock:
+            self._stopping.set()
+            self._stopping = threading.Event()
+            threads, self._threads = self._threads, []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].fail("The server shut down before the job ran")
+        for _ in threads:
+            try:
+                # Wakes a worker waiting for a job; one that is busy sees its stop event
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        if self._temporary_directory is not None:
+            shutil.rmtree(self._temporary_directory, ignore_errors=True)
+            self.directory = self._temporary_directory = None
+
+    def _new_job(self) -> Job:
+        self._expire()
+        if self.directory is None:
+            self.directory = self._temporary_directory = tempfile.mkdtemp(prefix='secret-santa-jobs-')
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, os.path.join(self.directory, job_id))
+        os.makedirs(job.directory)
+        return job
+
+    def _enqueue(self, job: Job, run: Callable) -> Job:
+        with self._lock:
+            self._jobs[job.job_id] = job
+        try:
+            self._queue.put_nowait((job, run))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.job_id]
+            shutil.rmtree(job.directory, ignore_errors=True)
+            raise ServiceOverloadedException("Too many draw jobs are queued, please retry shortly")
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work, args=(self._stopping,), name='secret-santa-jobs', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        return job
+
+    def _work(self, stopping: threading.Event):
+        while not stopping.is_set():
+            item = self._queue.get()
+            if item is None:
+                # Meant for an older generation when ours is still running
+                continue
+            job, run = item
+            self._run(job, run)
+
+    def _run(self, job: Job, run: Callable):
+        def on_span(stage: str):
+            if stage in _SPAN_STAGES:
+                job.advance(_SPAN_STAGES[stage])
+
+        try:
+            job.advance('parse')
+            with metrics.stage_listener(on_span):
+                draw = run()
+            job.advance('serialize')
+            self._write_result(job, draw.indexed)
+            job.succeed(draw)
+        except SecretSantaException as e:
+            job.fail(str(e))
+        except Exception as e:
+            job.fail(f"Internal server error: {str(e)}")
+
+    def _write_result(self, job: Job, assignments: IndexedAssignments):
+        """Write the result CSV next to its final name and move it in place once complete"""
+        from csv_handler import CSVHandler
+        
+        start = STAGE_PROGRESS['serialize']
+        total = max(len(assignments), 1)
+        
+        def rows() -> Iterator[Tuple[str, str, str, str]]:
+            for i, row in enumerate(assignments.rows()):
+                if i % _PROGRESS_ROWS == 0:
+                    job.advance('serialize', start + (1 - start) * i / total)
+                yield row
+
+        partial_path = job.result_path + '.partial'
+        with open(partial_path, 'wb') as f:
+            for chunk in CSVHandler.iter_csv_rows(rows()):
+                f.write(chunk)
+        os.replace(partial_path, job.result_path)
+
+    @staticmethod
+    def _save_upload(file: BinaryIO, job: Job, filename: str) -> str:
+        path = os.path.join(job.directory, filename)
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(file, f, 1024 * 1024)
+        return path
+
+    @staticmethod
+    def _read_chunks(path: str) -> Iterator[bytes]:
+        from csv_handler import CSVHandler
+        
+        with open(path, 'rb') as f:
+            yield from CSVHandler.iter_file_chunks(f)
+
+    def _expire(self):
+        """Forget finished jobs older than ttl_seconds and delete their files"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.finished and job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job in expired:
+                del self._jobs[job.job_id]
+        for job in expired:
+            shutil.rmtree(job.directory, ignore_errors=True)
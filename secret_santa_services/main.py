@@ -1,24 +1,80 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse, JSONResponse
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse, PlainTextResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-import io
 from typing import Optional
 
-from models import AssignmentRequest, AssignmentResponse, Employee, Assignment
+from models import (
+    AssignmentRequest,
+    AssignmentResponse,
+    ReassignmentRequest,
+    ReassignmentResponse,
+    BatchAssignmentRequest,
+    BatchAssignmentResponse,
+    GroupAssignmentResult,
+    OptimizationSettings,
+    JobStatus
+)
 from secret_santa_service import SecretSantaService
-from csv_handler import CSVHandler
+from request_profiler import RequestProfiler
+from job_manager import JobManager
+import compact_format
+import metrics
 from exceptions import (
     SecretSantaException,
     InvalidEmployeeDataException,
     InsufficientEmployeesException,
     AssignmentFailedException,
-    DuplicateEmailException
+    InfeasibleAssignmentException,
+    DuplicateEmailException,
+    ServiceOverloadedException,
+    AssignmentTimeoutException,
+    UnsupportedAlgorithmException,
+    ProfilingNotAllowedException
 )
 
+service = SecretSantaService()
+profiler = RequestProfiler.from_env()
+jobs = JobManager.from_env(service)
+
+
+def _cache_metrics():
+    if service.cache is None:
+        return []
+    stats = service.cache.stats()
+    return [
+        ("secret_santa_cache_hits", "counter", "Draws served from the result cache", stats["hits"]),
+        ("secret_santa_cache_misses", "counter", "Draws not found in the result cache", stats["misses"]),
+        ("secret_santa_cache_evictions", "counter", "Result cache evictions", stats["evictions"]),
+        ("secret_santa_cache_entries", "gauge", "Draws currently cached", stats["entries"]),
+    ]
+
+
+metrics.REGISTRY.add_collector(_cache_metrics)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if os.environ.get('SECRET_SANTA_PREWARM', '0') != '0':
+        # Pay the one-off costs now rather than on the first request: worker
+        # startup, the lazily imported CSV path and the OpenAPI schema
+        await service.prewarm()
+        import csv_handler  # noqa: F401
+        app.openapi()
+    yield
+    jobs.shutdown()
+    service.executor.shutdown()
+    if service.history_store is not None:
+        service.history_store.close()
+
+
 app = FastAPI(
     title="Secret Santa API",
     description="API for generating Secret Santa assignments",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -30,8 +86,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-service = SecretSantaService()
-
 
 @app.get("/")
 async def root():
@@ -41,8 +95,18 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /assign": "Generate assignments from JSON",
+            "POST /assign/fast": "Generate assignments from JSON, parsed and serialized in bulk for large rosters",
             "POST /assign/csv": "Generate assignments from CSV files",
-            "GET /health": "Health check"
+            "POST /assign/update": "Update an existing draw when employees join or leave",
+            "POST /assign/batch": "Generate many independent draws, one per group",
+            "GET /health": "Health check",
+            "GET /cache/stats": "Result cache hit/miss counters",
+            "GET /metrics": "Stage timings and counters in Prometheus text format",
+            "GET /profiles/{profile_id}": "Download a saved request profile (requires X-Profile-Token)",
+            "POST /jobs": "Queue a draw from JSON and return a job id at once",
+            "POST /jobs/csv": "Queue a draw from CSV files and return a job id at once",
+            "GET /jobs/{job_id}": "Job status, stage and progress",
+            "GET /jobs/{job_id}/result": "Download a finished job's CSV (supports Range requests)"
         }
     }
 
@@ -52,25 +116,194 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    if service.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **service.cache.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_profile_token: Optional[str] = Header(None)):
+    try:
+        profiler.check_token(x_profile_token)
+    except ProfilingNotAllowedException as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    path = profiler.path_for(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No saved profile '{profile_id}'")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
+async def _draw(label: str, x_profile_token: Optional[str], *args, **kwargs):
+    """Run a draw, under the profiler when this request asked for it or was sampled
+
+    Returns the draw and the profile id, or None when no profile was saved
+    for download (not profiled, or no SECRET_SANTA_PROFILE_DIR).
+    """
+    try:
+        profile = profiler.should_profile(x_profile_token)
+    except ProfilingNotAllowedException as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    if not profile:
+        return await service.generate_draw_async(*args, **kwargs), None
+    
+    draw, report = await service.profile_draw_async(*args, **kwargs)
+    path = await service.executor.run_local(profiler.record, report, label)
+    return draw, report.profile_id if path is not None else None
+
+
+def _draw_headers(draw, profile_id: Optional[str]) -> dict:
+    headers = {
+        "X-Draw-Seed": str(draw.seed),
+        "X-Draw-Algorithm-Version": str(draw.algorithm_version),
+        "X-Draw-Digest": draw.digest
+    }
+    if draw.score is not None:
+        headers["X-Draw-Score"] = f"{draw.score:g}"
+    if profile_id:
+        headers["X-Profile-Id"] = profile_id
+    return headers
+
+
+def _compact_response(draw, media_type: str, accept_encoding: Optional[str], headers: dict) -> Response:
+    """The draw in one of the compact_format encodings, gzipped when the client accepts it"""
+    if media_type == compact_format.ROSTER_BINARY:
+        body = compact_format.encode_roster(draw.indexed)
+    else:
+        body = compact_format.encode_compact_json(draw)
+    body, encoding = compact_format.compress(body, accept_encoding)
+    headers = dict(headers, Vary="Accept, Accept-Encoding")
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    metrics.PAYLOAD_BYTES.observe(len(body), 'sent')
+    return Response(body, media_type=media_type, headers=headers)
+
+
 @app.post("/assign", response_model=AssignmentResponse)
-async def create_assignments(request: AssignmentRequest):
+async def create_assignments(
+    request: AssignmentRequest,
+    response: Response,
+    x_profile_token: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Draw assignments for a JSON roster
+
+    Send Accept: application/vnd.secret-santa.compact+json or
+    application/vnd.secret-santa.roster for the compact encodings in
+    compact_format (roster once plus a receiver index per giver), gzipped
+    with Accept-Encoding: gzip.
+    """
+    return await _assign("POST /assign", request, response, x_profile_token, accept, accept_encoding)
+
+
+# OpenAPI request body of the endpoints that read an AssignmentRequest from the raw body
+_ASSIGNMENT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/AssignmentRequest"}}}
+    }
+}
+
+
+@app.post("/assign/fast", response_model=AssignmentResponse, openapi_extra=_ASSIGNMENT_REQUEST_BODY)
+async def create_assignments_fast(
+    request: Request,
+    response: Response,
+    x_profile_token: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """/assign for large rosters: same request and response, parsed and written in one pass each
+
+    The body is decoded with orjson when it is installed and the employee
+    and history lists are validated column-wise (see fast_json); the JSON
+    response is written straight from the draw instead of through
+    AssignmentResponse.
+    """
+    import fast_json
+    
+    body = await request.body()
+    metrics.PAYLOAD_BYTES.observe(len(body), 'received')
     try:
-        assignments = service.generate_assignments(
+        parsed = await service.executor.run_local(fast_json.parse_assignment_request, body)
+    except ValueError as e:
+        raise RequestValidationError(fast_json.validation_errors(e))
+    except ServiceOverloadedException as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except AssignmentTimeoutException as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    return await _assign(
+        "POST /assign/fast", parsed, response, x_profile_token, accept, accept_encoding, pre_serialized=True
+    )
+
+
+async def _assign(
+    label: str,
+    request: AssignmentRequest,
+    response: Response,
+    x_profile_token: Optional[str],
+    accept: Optional[str],
+    accept_encoding: Optional[str],
+    pre_serialized: bool = False
+):
+    media_type = compact_format.negotiate(
+        accept, ["application/json", compact_format.COMPACT_JSON, compact_format.ROSTER_BINARY]
+    )
+    try:
+        draw, profile_id = await _draw(
+            label, x_profile_token,
             employees=request.current_employees,
-            previous_assignments=request.previous_assignments
+            previous_assignments=request.previous_assignments,
+            previous_years=request.previous_years,
+            lookback_years=request.lookback_years,
+            seed=request.seed,
+            algorithm_version=request.algorithm_version,
+            year=request.year,
+            optimize=request.optimize,
+            single_cycle=request.single_cycle
         )
+        if media_type != "application/json":
+            return _compact_response(draw, media_type, accept_encoding, _draw_headers(draw, profile_id))
+        if pre_serialized:
+            import fast_json
+            
+            body = fast_json.encode_assignment_response(draw)
+            metrics.PAYLOAD_BYTES.observe(len(body), 'sent')
+            headers = {"X-Profile-Id": profile_id} if profile_id else None
+            return Response(body, media_type="application/json", headers=headers)
+        if profile_id:
+            response.headers["X-Profile-Id"] = profile_id
         
         return AssignmentResponse(
             success=True,
             message="Assignments generated successfully",
-            assignments=assignments,
-            total_assignments=len(assignments)
+            assignments=draw.assignments,
+            total_assignments=draw.total_assignments,
+            seed=draw.seed,
+            algorithm_version=draw.algorithm_version,
+            digest=draw.digest,
+            score=draw.score
         )
         
+    except HTTPException:
+        raise
     except InsufficientEmployeesException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except DuplicateEmailException as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ServiceOverloadedException as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except AssignmentTimeoutException as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except InfeasibleAssignmentException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except AssignmentFailedException as e:
         raise HTTPException(status_code=500, detail=str(e))
     except SecretSantaException as e:
@@ -79,44 +312,245 @@ async def create_assignments(request: AssignmentRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@app.post("/assign/batch", response_model=BatchAssignmentResponse)
+async def create_batch_assignments(request: BatchAssignmentRequest):
+    group_ids = [group.group_id for group in request.groups]
+    if len(set(group_ids)) != len(group_ids):
+        raise HTTPException(status_code=400, detail="Group ids must be unique within a batch")
+    
+    groups = {
+        group.group_id: dict(
+            employees=group.current_employees,
+            previous_assignments=group.previous_assignments,
+            previous_years=group.previous_years,
+            lookback_years=group.lookback_years,
+            seed=group.seed,
+            single_cycle=group.single_cycle,
+            algorithm_version=request.algorithm_version,
+            year=request.year
+        )
+        for group in request.groups
+    }
+    try:
+        outcomes = await service.generate_batch_async(groups)
+    except ServiceOverloadedException as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except AssignmentTimeoutException as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    
+    results = {}
+    failed = []
+    for group_id, outcome in outcomes.items():
+        if isinstance(outcome, Exception):
+            failed.append(group_id)
+            message = str(outcome) if isinstance(outcome, SecretSantaException) else f"Internal server error: {outcome}"
+            results[group_id] = GroupAssignmentResult(group_id=group_id, success=False, message=message)
+        else:
+            results[group_id] = GroupAssignmentResult(
+                group_id=group_id,
+                success=True,
+                message="Assignments generated successfully",
+                assignments=outcome.assignments,
+                total_assignments=len(outcome.assignments),
+                seed=outcome.seed,
+                algorithm_version=outcome.algorithm_version,
+                digest=outcome.digest
+            )
+    
+    return BatchAssignmentResponse(
+        success=not failed,
+        message=f"{len(results) - len(failed)} of {len(results)} group(s) assigned",
+        results=results,
+        failed_groups=failed
+    )
+
+
+@app.post("/assign/update", response_model=ReassignmentResponse)
+async def update_assignments(request: ReassignmentRequest):
+    try:
+        assignments, changed = await service.reassign_async(
+            current_assignments=request.current_assignments,
+            joined=request.joined,
+            left=request.left,
+            previous_assignments=request.previous_assignments,
+            previous_years=request.previous_years,
+            lookback_years=request.lookback_years,
+            seed=request.seed,
+            year=request.year
+        )
+        changed_emails = set(changed)
+        
+        return ReassignmentResponse(
+            success=True,
+            message=f"Assignments updated, {len(changed)} secret child(ren) changed",
+            assignments=assignments,
+            total_assignments=len(assignments),
+            changed_assignments=[a for a in assignments if a.employee_email in changed_emails]
+        )
+        
+    except ServiceOverloadedException as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except AssignmentTimeoutException as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except AssignmentFailedException as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except SecretSantaException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @app.post("/assign/csv")
 async def create_assignments_from_csv(
     employees_file: UploadFile = File(...),
-    previous_assignments_file: Optional[UploadFile] = File(None)
+    previous_assignments_file: Optional[UploadFile] = File(None),
+    seed: Optional[int] = Form(None, ge=0),
+    algorithm_version: int = Form(1),
+    year: Optional[int] = Form(None),
+    optimize: bool = Form(False),
+    single_cycle: bool = Form(False),
+    x_profile_token: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
 ):
+    """Draw assignments for a CSV roster; answers CSV, or a compact encoding as /assign does"""
+    media_type = compact_format.negotiate(
+        accept, ["text/csv", compact_format.COMPACT_JSON, compact_format.ROSTER_BINARY]
+    )
+    for upload in (employees_file, previous_assignments_file):
+        if upload is not None and upload.size is not None:
+            metrics.PAYLOAD_BYTES.observe(upload.size, 'received')
+    
+    # The CSV machinery is only loaded once a CSV request arrives
+    from csv_handler import CSVHandler
+    
     try:
-        # Read and parse employees CSV
-        employees_content = await employees_file.read()
-        employees_str = employees_content.decode('utf-8')
-        employees = CSVHandler.parse_employees(employees_str)
+        # Parse employees CSV straight from the spooled upload, chunk by chunk
+        employees = await service.executor.run_local(
+            CSVHandler.parse_employees,
+            CSVHandler.iter_file_chunks(employees_file.file)
+        )
         
-        # Read and parse previous assignments if provided
-        previous_assignments = None
+        # Stream only the giver/receiver pairs out of previous assignments, if provided
+        previous_pairs = None
         if previous_assignments_file:
-            prev_content = await previous_assignments_file.read()
-            prev_str = prev_content.decode('utf-8')
-            previous_assignments = CSVHandler.parse_previous_assignments(prev_str)
+            previous_pairs = await service.executor.run_local(
+                CSVHandler.parse_history_pairs,
+                CSVHandler.iter_file_chunks(previous_assignments_file.file)
+            )
         
         # Generate assignments
-        assignments = service.generate_assignments(employees, previous_assignments)
-        
-        # Generate CSV output
-        csv_output = CSVHandler.generate_csv(assignments)
+        draw, profile_id = await _draw(
+            "POST /assign/csv", x_profile_token,
+            employees, seed=seed, algorithm_version=algorithm_version, year=year, previous_pairs=previous_pairs,
+            optimize=OptimizationSettings() if optimize else None,
+            single_cycle=single_cycle
+        )
+        headers = _draw_headers(draw, profile_id)
+        if media_type != "text/csv":
+            return _compact_response(draw, media_type, accept_encoding, headers)
+        headers["Content-Disposition"] = "attachment; filename=secret_santa_assignments.csv"
         
-        # Return as downloadable file
+        # Stream the CSV output chunk by chunk, straight from the indexed draw
         return StreamingResponse(
-            io.StringIO(csv_output),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=secret_santa_assignments.csv"}
+            CSVHandler.iter_csv_rows(draw.indexed.rows()), media_type="text/csv", headers=headers
         )
         
+    except HTTPException:
+        raise
     except InvalidEmployeeDataException as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except UnsupportedAlgorithmException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except InsufficientEmployeesException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except DuplicateEmailException as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ServiceOverloadedException as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except AssignmentTimeoutException as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except InfeasibleAssignmentException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except AssignmentFailedException as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+def _job_status(job) -> JobStatus:
+    status = JobStatus(**job.snapshot())
+    if status.status == 'succeeded':
+        status.result_url = f"/jobs/{status.job_id}/result"
+    return status
+
+
+@app.post("/jobs", response_model=JobStatus, status_code=202, openapi_extra=_ASSIGNMENT_REQUEST_BODY)
+async def create_job(request: Request):
+    """Queue a draw from an /assign body; like /jobs/csv, it is parsed and validated in the job"""
+    body = await request.body()
+    metrics.PAYLOAD_BYTES.observe(len(body), 'received')
+    try:
+        job = await service.executor.run_local(jobs.submit_json, body)
+    except ServiceOverloadedException as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return _job_status(job)
+
+
+@app.post("/jobs/csv", response_model=JobStatus, status_code=202)
+async def create_csv_job(
+    employees_file: UploadFile = File(...),
+    previous_assignments_file: Optional[UploadFile] = File(None),
+    seed: Optional[int] = Form(None, ge=0),
+    algorithm_version: int = Form(1),
+    year: Optional[int] = Form(None),
+    optimize: bool = Form(False),
+    single_cycle: bool = Form(False)
+):
+    try:
+        # Only copies the uploads to the job directory; parsing happens in the job
+        job = await service.executor.run_local(
+            jobs.submit_csv,
+            employees_file.file,
+            previous_assignments_file.file if previous_assignments_file else None,
+            seed=seed,
+            algorithm_version=algorithm_version,
+            year=year,
+            optimize=OptimizationSettings() if optimize else None,
+            single_cycle=single_cycle
+        )
+    except ServiceOverloadedException as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job '{job_id}'")
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job '{job_id}'")
+    snapshot = job.snapshot()
+    if snapshot["status"] == 'failed':
+        raise HTTPException(status_code=409, detail=f"Job failed: {snapshot['message']}")
+    if snapshot["status"] != 'succeeded':
+        raise HTTPException(status_code=409, detail=f"Job is {snapshot['status']} ({snapshot['stage']})")
+    
+    # FileResponse answers Range requests, so large results can be resumed
+    return FileResponse(
+        job.result_path,
+        media_type="text/csv",
+        filename="secret_santa_assignments.csv",
+        headers={
+            "X-Draw-Seed": str(snapshot["seed"]),
+            "X-Draw-Algorithm-Version": str(snapshot["algorithm_version"]),
+            "X-Draw-Digest": snapshot["digest"]
+        }
+    )
@@ -0,0 +1,244 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Seconds; covers sub-millisecond stages up to the slowest 100k-employee draws
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Employees, pairs and similar counts
+SIZE_BUCKETS = (2, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000)
+BYTE_BUCKETS = (1024, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        # An unlabelled counter reports 0 before its first increment
+        self._values: Dict[Tuple[str, ...], float] = {} if labelnames else {(): 0}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *labels: str):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}_total{_format_labels(self.labelnames, labels)} {value:g}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense
+
+    observe() is a bisect and three additions under a lock, cheap enough
+    to call on every request.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = labelnames
+        # labels -> [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total:g}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}"
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics rendered in Prometheus text format
+
+    Collectors are callables that return (name, type, help, value) tuples at
+    render time, for values owned elsewhere such as the result cache.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, float]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()
+    ) -> Histogram:
+        metric = Histogram(name, documentation, buckets, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, float]]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            for name, metric_type, documentation, value in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.append(f"{name}{'_total' if metric_type == 'counter' else ''} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Keys of a draw's stats that are counts rather than stage timings
+DRAW_FIGURES = (
+    'attempts', 'repairs', 'employees', 'history_pairs', 'optimization_iterations', 'optimization_truncated'
+)
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'secret_santa_stage_seconds', 'Time spent in each stage of a request', TIME_BUCKETS, ('stage',)
+)
+ASSIGNMENT_ATTEMPTS = REGISTRY.histogram(
+    'secret_santa_assignment_attempts', 'Assignment attempts per draw (2 = the matcher had to finish)',
+    (1, 2, 3, 5, 10)
+)
+ASSIGNMENT_RETRIES = REGISTRY.counter(
+    'secret_santa_assignment_retries', 'Draws the swap repair could not finish on the first attempt'
+)
+SWAP_REPAIRS = REGISTRY.histogram(
+    'secret_santa_swap_repairs', 'Conflicting pairs repaired by swapping per draw', SIZE_BUCKETS
+)
+FAILURES = REGISTRY.counter(
+    'secret_santa_failures', 'Failed operations by exception type', ('operation', 'reason')
+)
+PAYLOAD_EMPLOYEES = REGISTRY.histogram(
+    'secret_santa_payload_employees', 'Employees per draw', SIZE_BUCKETS
+)
+PAYLOAD_HISTORY_PAIRS = REGISTRY.histogram(
+    'secret_santa_payload_history_pairs', 'Previous-year pairs passed in per draw', SIZE_BUCKETS
+)
+PAYLOAD_BYTES = REGISTRY.histogram(
+    'secret_santa_payload_bytes', 'CSV bytes received and sent', BYTE_BUCKETS, ('direction',)
+)
+
+
+# Per-thread callback told about every span as it starts (see stage_listener)
+_local = threading.local()
+
+
+@contextmanager
+def stage_listener(callback: Callable[[str], None]):
+    """Call callback(stage) whenever a span starts in this thread, e.g. to report job progress"""
+    previous = getattr(_local, 'listener', None)
+    _local.listener = callback
+    try:
+        yield
+    finally:
+        _local.listener = previous
+
+
+@contextmanager
+def span(stage: str, stats: Optional[Dict[str, float]] = None):
+    """Time the block into STAGE_SECONDS, and into stats[stage] when given"""
+    listener = getattr(_local, 'listener', None)
+    if listener is not None:
+        listener(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage)
+        if stats is not None:
+            stats[stage] = elapsed
+
+
+def timed_chunks(stage: str, chunks: Iterable[bytes], direction: str) -> Iterator[bytes]:
+    """Pass chunks through, timing only the time spent producing them
+
+    The total is recorded once the iterable is exhausted, together with the
+    number of bytes in PAYLOAD_BYTES.
+    """
+    elapsed = 0.0
+    size = 0
+    iterator = iter(chunks)
+    while True:
+        start = time.perf_counter()
+        chunk = next(iterator, None)
+        elapsed += time.perf_counter() - start
+        if chunk is None:
+            break
+        size += len(chunk)
+        yield chunk
+    STAGE_SECONDS.observe(elapsed, stage)
+    PAYLOAD_BYTES.observe(size, direction)
+
+
+def record_draw(stats: Dict[str, float], stages: bool = True):
+    """Record the figures a draw collected in its stats
+
+    Stage timings are normally recorded by span() as they happen; stages is
+    only needed for draws solved in another process, whose registry is lost.
+    """
+    if stages:
+        for key, value in stats.items():
+            if key not in DRAW_FIGURES:
+                STAGE_SECONDS.observe(value, key)
+    attempts = stats.get('attempts')
+    if attempts:
+        ASSIGNMENT_ATTEMPTS.observe(attempts)
+        if attempts > 1:
+            ASSIGNMENT_RETRIES.inc(attempts - 1)
+    if 'repairs' in stats:
+        SWAP_REPAIRS.observe(stats['repairs'])
+    if 'employees' in stats:
+        PAYLOAD_EMPLOYEES.observe(stats['employees'])
+    if 'history_pairs' in stats:
+        PAYLOAD_HISTORY_PAIRS.observe(stats['history_pairs'])
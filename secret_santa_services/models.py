@@ -1,11 +1,15 @@
-from pydantic import BaseModel, EmailStr, validator
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field, validator
+from typing import Dict, List, Optional
 
 
 class Employee(BaseModel):
     """Employee model representing an employee"""
     name: str
     email: EmailStr
+    # Optional attributes used only by soft preferences (see OptimizationSettings)
+    department: Optional[str] = None
+    office: Optional[str] = None
+    manager_email: Optional[EmailStr] = None
 
     @validator('name')
     def name_not_empty(cls, v):
@@ -22,10 +26,64 @@ class Assignment(BaseModel):
     secret_child_email: EmailStr
 
 
+class OptimizationSettings(BaseModel):
+    """Soft preferences to maximise on top of the hard rules
+
+    Each valid pair scores the weight of every preference it meets; the
+    search keeps the draw valid while raising the total score, until it has
+    run its iterations (default 20 per employee) or time_budget_ms is spent.
+    The time budget only applies to draws without a seed: a seeded draw
+    always runs its iterations, so that it can be regenerated exactly.
+    """
+    cross_department: float = Field(1.0, ge=0)
+    cross_office: float = Field(1.0, ge=0)
+    avoid_manager: float = Field(2.0, ge=0)
+    iterations: Optional[int] = Field(None, ge=0)
+    time_budget_ms: int = Field(1000, ge=1, le=60000)
+
+
 class AssignmentRequest(BaseModel):
     """Request model for creating Secret Santa assignments"""
     current_employees: List[Employee]
     previous_assignments: Optional[List[Assignment]] = None
+    previous_years: Optional[Dict[int, List[Assignment]]] = None
+    lookback_years: Optional[int] = Field(None, ge=1)
+    seed: Optional[int] = Field(None, ge=0)
+    algorithm_version: int = 1
+    year: Optional[int] = None
+    optimize: Optional[OptimizationSettings] = None
+    # One gift chain through everybody instead of possibly several loops
+    single_cycle: bool = False
+
+
+class GroupAssignmentRequest(BaseModel):
+    """One independent draw inside a batch"""
+    group_id: str = Field(..., min_length=1)
+    current_employees: List[Employee]
+    previous_assignments: Optional[List[Assignment]] = None
+    previous_years: Optional[Dict[int, List[Assignment]]] = None
+    lookback_years: Optional[int] = Field(None, ge=1)
+    seed: Optional[int] = Field(None, ge=0)
+    single_cycle: bool = False
+
+
+class BatchAssignmentRequest(BaseModel):
+    """Request model for many independent draws at once"""
+    groups: List[GroupAssignmentRequest] = Field(..., min_length=1)
+    algorithm_version: int = 1
+    year: Optional[int] = None
+
+
+class ReassignmentRequest(BaseModel):
+    """Request model for updating an existing draw after roster changes"""
+    current_assignments: List[Assignment]
+    joined: List[Employee] = []
+    left: List[EmailStr] = []
+    previous_assignments: Optional[List[Assignment]] = None
+    previous_years: Optional[Dict[int, List[Assignment]]] = None
+    lookback_years: Optional[int] = Field(None, ge=1)
+    seed: Optional[int] = Field(None, ge=0)
+    year: Optional[int] = None
 
 
 class AssignmentResponse(BaseModel):
@@ -34,3 +92,43 @@ class AssignmentResponse(BaseModel):
     message: str
     assignments: Optional[List[Assignment]] = None
     total_assignments: Optional[int] = None
+    seed: Optional[int] = None
+    algorithm_version: Optional[int] = None
+    digest: Optional[str] = None
+    # Total preference score, for optimised draws
+    score: Optional[float] = None
+
+
+class JobStatus(BaseModel):
+    """State of a background draw job"""
+    job_id: str
+    status: str
+    stage: str
+    progress: float
+    message: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+    total_assignments: Optional[int] = None
+    seed: Optional[int] = None
+    algorithm_version: Optional[int] = None
+    digest: Optional[str] = None
+    score: Optional[float] = None
+    result_url: Optional[str] = None
+
+
+class ReassignmentResponse(AssignmentResponse):
+    """Response model for an updated draw"""
+    changed_assignments: Optional[List[Assignment]] = None
+
+
+class GroupAssignmentResult(AssignmentResponse):
+    """Outcome of one draw inside a batch"""
+    group_id: str
+
+
+class BatchAssignmentResponse(BaseModel):
+    """Response model for a batch of draws, keyed by group id"""
+    success: bool
+    message: str
+    results: Dict[str, GroupAssignmentResult]
+    failed_groups: List[str] = []
@@ -0,0 +1,105 @@
+import io
+import logging
+import os
+import random
+import re
+import secrets
+import uuid
+from typing import Any, Callable, Optional, Tuple
+from exceptions import ProfilingNotAllowedException
+
+logger = logging.getLogger("secret_santa.profiling")
+
+_PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ProfileReport:
+    """Outcome of one profiled call: a text summary plus the raw pstats data"""
+
+    def __init__(self, summary: str, data: bytes):
+        self.profile_id = uuid.uuid4().hex
+        self.summary = summary
+        # Same format as cProfile.Profile.dump_stats(), readable by pstats/snakeviz
+        self.data = data
+
+
+def run_profiled(func: Callable, *args, top: int = 25, **kwargs) -> Tuple[Any, ProfileReport]:
+    """Call func under cProfile and return its result with a ProfileReport
+
+    Module-level so that it can be sent to a worker process: the profiler
+    has to run in the thread that does the work.
+    """
+    # Imported here so that services which never profile do not load them
+    import cProfile
+    import marshal
+    import pstats
+    
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    profiler.create_stats()
+    
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(top)
+    return result, ProfileReport(summary.getvalue(), marshal.dumps(profiler.stats))
+
+
+class RequestProfiler:
+    """Decides which requests to profile and keeps their reports
+
+    A request is profiled when it sends the X-Profile-Token header matching
+    token, or at random with probability sample_rate. Without a token no
+    client can ask for a profile, and a wrong token is refused. Reports are
+    logged and, when directory is set, saved there as <profile_id>.prof.
+
+    Requests that are not profiled cost one header check and, with a sample
+    rate, one random() call.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        sample_rate: float = 0.0,
+        directory: Optional[str] = None,
+        top: int = 25
+    ):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.top = top
+
+    @classmethod
+    def from_env(cls) -> 'RequestProfiler':
+        """Configured by SECRET_SANTA_PROFILE_TOKEN, _PROFILE_SAMPLE_RATE and _PROFILE_DIR"""
+        return cls(
+            token=os.environ.get('SECRET_SANTA_PROFILE_TOKEN') or None,
+            sample_rate=float(os.environ.get('SECRET_SANTA_PROFILE_SAMPLE_RATE', '0')),
+            directory=os.environ.get('SECRET_SANTA_PROFILE_DIR') or None
+        )
+
+    def check_token(self, token: Optional[str]):
+        if self.token is None or token is None or not secrets.compare_digest(token, self.token):
+            raise ProfilingNotAllowedException("Profiling is not enabled for this token")
+
+    def should_profile(self, token: Optional[str] = None) -> bool:
+        if token is not None:
+            self.check_token(token)
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record(self, report: ProfileReport, label: str) -> Optional[str]:
+        """Log the report and save it; returns the saved file's path, if any"""
+        logger.info("Profile %s for %s:\n%s", report.profile_id, label, report.summary)
+        if self.directory is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{report.profile_id}.prof")
+        with open(path, 'wb') as f:
+            f.write(report.data)
+        return path
+
+    def path_for(self, profile_id: str) -> Optional[str]:
+        """Path of a saved profile, or None when there is no such profile"""
+        if self.directory is None or not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.prof")
+        return path if os.path.exists(path) else None
@@ -0,0 +1,136 @@
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from models import Employee, Assignment, OptimizationSettings
+
+
+class ResultCache:
+    """Bounded LRU cache with a time-to-live
+
+    Entries are evicted least recently used first once there are more than
+    max_entries of them or their total weight (e.g. number of assignments)
+    exceeds max_weight, and expire ttl_seconds after being stored.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 300, max_weight: Optional[int] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_weight = max_weight
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['ResultCache']:
+        """Cache sized by SECRET_SANTA_CACHE_SIZE (0 disables it), _CACHE_TTL_SECONDS and _CACHE_MAX_PAIRS"""
+        max_entries = int(os.environ.get('SECRET_SANTA_CACHE_SIZE', '128'))
+        if max_entries <= 0:
+            return None
+        max_weight = os.environ.get('SECRET_SANTA_CACHE_MAX_PAIRS')
+        return cls(
+            max_entries=max_entries,
+            ttl_seconds=float(os.environ.get('SECRET_SANTA_CACHE_TTL_SECONDS', '300')),
+            max_weight=int(max_weight) if max_weight else 1_000_000
+        )
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, weight: int = 1):
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value, weight)
+            self._weight += weight
+            while len(self._entries) > self.max_entries or (
+                self.max_weight is not None and self._weight > self.max_weight
+            ):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._weight = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "weight": self._weight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, key: Hashable):
+        _, _, weight = self._entries.pop(key)
+        self._weight -= weight
+
+
+def draw_fingerprint(
+    employees: List[Employee],
+    previous_assignments: Optional[List[Assignment]],
+    previous_years: Optional[Dict[int, List[Assignment]]],
+    lookback_years: Optional[int],
+    seed: Optional[int],
+    algorithm_version: int,
+    year: int,
+    group: str,
+    previous_pairs: Optional[List[Tuple[str, str]]] = None,
+    optimize: Optional[OptimizationSettings] = None,
+    single_cycle: bool = False
+) -> str:
+    """Canonical hash of everything that determines a draw
+
+    The roster and every history year are sorted first, so the same people
+    and history in any order give the same fingerprint.
+    """
+    digest = hashlib.sha256()
+    
+    def feed(label: str, rows):
+        digest.update(f"[{label}]\n".encode('utf-8'))
+        for row in sorted(rows):
+            digest.update(('\x1f'.join(row) + '\x1e').encode('utf-8'))
+    
+    digest.update(f"{algorithm_version}|{seed}|{lookback_years}|{year}|{group}\n".encode('utf-8'))
+    if single_cycle:
+        digest.update(b"single_cycle\n")
+    if optimize is not None:
+        digest.update(f"optimize:{optimize.model_dump_json()}\n".encode('utf-8'))
+        feed("roster", (
+            (emp.email, emp.name, emp.department or '', emp.office or '', emp.manager_email or '')
+            for emp in employees
+        ))
+    else:
+        feed("roster", ((emp.email, emp.name) for emp in employees))
+    if previous_assignments or previous_pairs:
+        # Last year's pairs hash the same whether they came as models or as pairs
+        feed("previous", itertools.chain(
+            ((a.employee_email, a.secret_child_email) for a in previous_assignments or ()),
+            previous_pairs or ()
+        ))
+    for previous_year in sorted(previous_years or {}):
+        feed(str(previous_year), (
+            (a.employee_email, a.secret_child_email) for a in previous_years[previous_year]
+        ))
+    return digest.hexdigest()
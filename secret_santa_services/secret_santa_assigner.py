@@ -1,65 +1,191 @@
 import random
-from typing import List
-from models import Employee, Assignment
+from array import array
+from functools import partial
+from typing import List, Optional, Set, Tuple
+from models import Assignment, OptimizationSettings
 from employee_repository import EmployeeRepository
 from assignment_history import AssignmentHistory
-from assignment_validator import AssignmentValidator
+from assignment_matcher import AssignmentMatcher
+from compact_roster import CompactRoster, IndexedAssignments
+from preference_optimizer import PreferenceOptimizer
+from gift_chain import GiftChain
+from swap_search import find_swap
+from exceptions import AssignmentFailedException, InfeasibleAssignmentException
+
+# Version of the draw algorithm; a (roster, history, seed, version) tuple
+# always reproduces the same draw
+ALGORITHM_VERSION = 1
+SUPPORTED_ALGORITHM_VERSIONS = (1,)
 
 
 class SecretSantaAssigner:
-    """Core logic for assigning Secret Santa pairs"""
+    """Core logic for assigning Secret Santa pairs
+
+    Builds a valid derangement directly: one shuffle of the receivers, then
+    every giver holding a forbidden receiver is repaired by swapping receivers
+    with another giver so that both pairs become valid. With the usual sparse
+    constraints (self, same name, previous year) a swap partner is found after
+    a handful of random probes, so a draw costs expected O(N).
+
+    Givers that cannot be repaired by a single swap are handed to the exact
+    AssignmentMatcher together with the partial assignment, so a draw only
+    fails when no valid assignment exists.
+
+    With single_cycle the valid draw is then made one gift chain through
+    everybody by a GiftChain joining its loops.
+
+    With OptimizationSettings the valid draw is then improved for soft
+    preferences by a PreferenceOptimizer.
 
-    def __init__(self, repository: EmployeeRepository, history: AssignmentHistory):
+    The solver runs on a CompactRoster (integer ids in array buffers); pydantic
+    Assignment objects are only built for the final result.
+
+    All randomness comes from one random.Random, so a seeded assigner always
+    produces the same draw for the same roster and history. Any change to how
+    the draw consumes randomness must bump ALGORITHM_VERSION.
+    """
+
+    # Random swap partners probed before falling back to a full scan
+    swap_samples = 32
+    # Fresh draws tried before a single-cycle draw gives up
+    max_chain_attempts = 5
+
+    def __init__(
+        self,
+        repository: EmployeeRepository,
+        history: AssignmentHistory,
+        rng: Optional[random.Random] = None,
+        optimize: Optional[OptimizationSettings] = None,
+        single_cycle: bool = False,
+        use_time_budget: bool = True
+    ):
         self.repository = repository
         self.history = history
-        self.validator = AssignmentValidator()
-        self.max_attempts = 1000
+        self.rng = rng or random.Random()
+        self.optimize = optimize
+        self.single_cycle = single_cycle
+        # Passed on to the PreferenceOptimizer; off for reproducible draws
+        self.use_time_budget = use_time_budget
+        # Set by assign() when optimising
+        self.optimizer: Optional[PreferenceOptimizer] = None
+        self.score: Optional[float] = None
+        # 1 when the swap repair succeeds, 2 when the matcher had to finish;
+        # draws built for a single-cycle draw
+        self.attempts_used = 0
+        # Givers whose shuffled receiver was forbidden and had to be repaired
+        self.repairs = 0
 
     def assign(self) -> List[Assignment]:
-        for attempt in range(self.max_attempts):
-            try:
-                assignments = self._attempt_assignment()
-                if self._validate_all_assignments(assignments):
-                    return assignments
-            except Exception:
-                continue
+        return self.assign_indexed().materialize()
+
+    def assign_indexed(self) -> IndexedAssignments:
+        """assign() without building an Assignment model per pair"""
+        roster = CompactRoster(self.repository, self.history)
+        if self.single_cycle:
+            return roster.indexed(self._assign_chain(roster))
         
-        raise AssignmentFailedException(
-            f"Could not generate valid assignments after {self.max_attempts} attempts. "
-            "This may happen if constraints are too restrictive."
-        )
+        receivers = self._valid_draw(roster)
+        
+        if self.optimize is not None:
+            self.optimizer = PreferenceOptimizer(roster, self.optimize, self.rng, self.use_time_budget)
+            receivers = self.optimizer.improve(receivers)
+            self.score = self.optimizer.score(receivers)
+        
+        return roster.indexed(receivers)
 
-    def _attempt_assignment(self) -> List[Assignment]:
-        employees = self.repository.get_all_employees()
-        givers = employees.copy()
-        receivers = employees.copy()
+    def _valid_draw(self, roster: CompactRoster) -> array:
+        """receivers[giver] -> receiver with every pair allowed, or _infeasible()"""
+        receivers, stuck = self._attempt_assignment(roster)
+        self.attempts_used = 1
         
-        # Shuffle receivers for randomization
-        random.shuffle(receivers)
+        if stuck:
+            self.attempts_used = 2
+            result = AssignmentMatcher(roster.size, roster.allowed).solve(receivers, stuck)
+            if not result.feasible:
+                raise self._infeasible(roster, result.blocking_givers)
+            receivers = result.receivers
+        return receivers
+
+    def _assign_chain(self, roster: CompactRoster) -> array:
+        """receivers forming one cycle through the whole roster
         
-        assignments = []
-        for giver, receiver in zip(givers, receivers):
-            is_valid, error_msg = self.validator.validate(giver, receiver, self.history)
-            if not is_valid:
-                raise ValueError(error_msg)
-            
-            assignments.append(Assignment(
-                employee_name=giver.name,
-                employee_email=giver.email,
-                secret_child_name=receiver.name,
-                secret_child_email=receiver.email
-            ))
+        A valid draw is built as for a plain draw, so a chain only fails
+        as impossible (InfeasibleAssignmentException) when no valid draw
+        exists at all; its loops are then joined by a GiftChain. A draw with
+        a loop no swap can join is redrawn, up to max_chain_attempts times,
+        before giving up with AssignmentFailedException. That only happens
+        when the rules leave very few allowed pairs.
+        """
+        chain = GiftChain(roster, self.rng)
+        chain.swap_samples = self.swap_samples
+        repairs = 0
+        for attempt in range(1, self.max_chain_attempts + 1):
+            receivers = self._valid_draw(roster)
+            repairs += self.repairs
+            chain.join(receivers)
+            if not chain.stuck:
+                break
+        else:
+            # Not a proof that no chain exists, only that the splicing gave up
+            raise AssignmentFailedException(
+                f"No single gift chain found after {self.max_chain_attempts} attempts; "
+                f"{len(chain.stuck)} employee(s) only formed loops of their own, try a draw without single_cycle"
+            )
+        self.attempts_used = attempt
+        self.repairs = repairs
         
-        return assignments
+        if self.optimize is not None:
+            self.optimizer = PreferenceOptimizer(roster, self.optimize, self.rng, self.use_time_budget)
+            receivers = GiftChain.receivers(self.optimizer.improve_cycle(GiftChain.order(receivers)))
+            self.score = self.optimizer.score(receivers)
+        return receivers
 
-    def _validate_all_assignments(self, assignments: List[Assignment]) -> bool:
+    def _attempt_assignment(self, roster: CompactRoster) -> Tuple[array, Set[int]]:
+        """Shuffle once and repair conflicts in place.
 
-        # Check each person is assigned exactly once as receiver
-        receivers = set()
-        for assignment in assignments:
-            if assignment.secret_child_email in receivers:
-                return False
-            receivers.add(assignment.secret_child_email)
+        Returns receivers[giver_index] -> receiver_index and the givers whose
+        conflict no single swap could fix.
+        """
+        receivers = array('i', range(roster.size))
+        self.rng.shuffle(receivers)
         
-        # Check we have the right number of assignments
-        return len(receivers) == self.repository.get_employee_count()
+        allowed = roster.allowed
+        stuck = set()
+        repairs = 0
+        for giver in range(roster.size):
+            if not allowed(giver, receivers[giver]):
+                repairs += 1
+                if not self._repair(roster, receivers, giver):
+                    stuck.add(giver)
+        
+        self.repairs = repairs
+        return receivers, stuck
+
+    def _repair(self, roster: CompactRoster, receivers: array, giver: int) -> bool:
+        """Swap receivers with another giver so that both pairs are valid"""
+        return find_swap(
+            self.rng, min(self.swap_samples, roster.size), (giver,), range(roster.size),
+            partial(self._try_swap, roster, receivers)
+        )
+
+    @staticmethod
+    def _try_swap(roster: CompactRoster, receivers: array, giver: int, other: int) -> bool:
+        if other == giver:
+            return False
+        if roster.allowed(giver, receivers[other]) and roster.allowed(other, receivers[giver]):
+            receivers[giver], receivers[other] = receivers[other], receivers[giver]
+            return True
+        return False
+
+    @staticmethod
+    def _infeasible(roster: CompactRoster, blocking_givers: List[int]) -> InfeasibleAssignmentException:
+        blocking = [roster.employees[g].email for g in blocking_givers]
+        # The alternating search that found them reached one receiver fewer
+        shown = ', '.join(blocking[:10])
+        if len(blocking) > 10:
+            shown += f" and {len(blocking) - 10} more"
+        return InfeasibleAssignmentException(
+            f"No valid assignment exists: {len(blocking)} employee(s) ({shown}) "
+            f"can only be assigned among {len(blocking) - 1} possible secret child(ren)",
+            blocking_employees=blocking
+        )
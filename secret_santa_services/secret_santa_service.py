@@ -1,26 +1,482 @@
-from typing import List
-from models import Employee, Assignment
+import datetime
+import hashlib
+import inspect
+import itertools
+import random
+import secrets
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from models import Employee, Assignment, OptimizationSettings
 from employee_repository import EmployeeRepository
-from assignment_history import AssignmentHistory
-from secret_santa_assigner import SecretSantaAssigner
+from assignment_history import AssignmentHistory, Pair
+from assignment_executor import AssignmentExecutor
+from compact_roster import IndexedAssignments
+from history_store import HistoryStore
+from secret_santa_assigner import SecretSantaAssigner, ALGORITHM_VERSION, SUPPORTED_ALGORITHM_VERSIONS
+from result_cache import ResultCache, draw_fingerprint
+from exceptions import UnsupportedAlgorithmException
+from request_profiler import ProfileReport, run_profiled
+import metrics
+
+
+class DrawResult:
+    """Assignments plus everything needed to regenerate and verify them
+
+    A fresh draw keeps its pairs as IndexedAssignments; the Assignment
+    models are only built the first time .assignments is read, so
+    responses serialised from .indexed never create them.
+    """
+
+    def __init__(
+        self,
+        assignments: Union[List[Assignment], IndexedAssignments],
+        seed: int,
+        algorithm_version: int,
+        digest: str,
+        stats: Optional[Dict[str, float]] = None,
+        score: Optional[float] = None
+    ):
+        if isinstance(assignments, IndexedAssignments):
+            self._indexed = assignments
+            self._assignments = None
+        else:
+            self._indexed = None
+            self._assignments = assignments
+        self.seed = seed
+        self.algorithm_version = algorithm_version
+        self.digest = digest
+        # Stage timings and counts collected while solving; see metrics.record_draw
+        self.stats = stats or {}
+        # Total soft-preference score of an optimised draw
+        self.score = score
+
+    @property
+    def assignments(self) -> List[Assignment]:
+        if self._assignments is None:
+            self._assignments = self._indexed.materialize()
+        return self._assignments
+
+    @property
+    def indexed(self) -> IndexedAssignments:
+        if self._indexed is None:
+            self._indexed = IndexedAssignments.from_assignments(self._assignments)
+        return self._indexed
+
+    def in_order_of(self, employees: List[Employee]) -> 'DrawResult':
+        """This draw with the givers listed in the order of employees, e.g. for a cache hit"""
+        if all(a.email == b.email for a, b in zip(self.indexed.employees, employees)):
+            return self
+        return DrawResult(
+            self.indexed.reordered([emp.email for emp in employees]),
+            self.seed, self.algorithm_version, self.digest, self.stats, self.score
+        )
+
+    @property
+    def total_assignments(self) -> int:
+        return len(self._indexed if self._indexed is not None else self._assignments)
 
 
 class SecretSantaService:
     """Service layer for ops"""
 
-    def generate_assignments(
+    def __init__(
+        self,
+        executor: Optional[AssignmentExecutor] = None,
+        history_store: Optional[HistoryStore] = None,
+        cache: Optional[ResultCache] = None
+    ):
+        # Backend used by the async entry points; see AssignmentExecutor
+        self.executor = executor or AssignmentExecutor.from_env()
+        # When set, past draws are read from and committed to this store
+        self.history_store = history_store if history_store is not None else HistoryStore.from_env()
+        # Identical draw requests (same roster, history, seed, ...) are served from here
+        self.cache = cache if cache is not None else ResultCache.from_env()
+
+    def __getstate__(self):
+        # Pools and locks cannot cross into a worker process, and a worker
+        # always runs the work inline anyway
+        state = self.__dict__.copy()
+        state['executor'] = None
+        # The parent process owns the cache
+        state['cache'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.executor = AssignmentExecutor('inline')
+
+    def generate_draw(
         self,
         employees: List[Employee],
-        previous_assignments: List[Assignment] = None
-    ) -> List[Assignment]:
+        previous_assignments: List[Assignment] = None,
+        previous_years: Optional[Dict[int, List[Assignment]]] = None,
+        lookback_years: Optional[int] = None,
+        seed: Optional[int] = None,
+        algorithm_version: int = ALGORITHM_VERSION,
+        year: Optional[int] = None,
+        group: str = '',
+        previous_pairs: Optional[List[Pair]] = None,
+        optimize: Optional[OptimizationSettings] = None,
+        single_cycle: bool = False
+    ) -> DrawResult:
+        """Generate a reproducible draw
+
+        Without a seed a random one is chosen and returned, so every draw can
+        be regenerated later from the same roster, history, seed and version.
+
+        With a history store, stored draws from before year (default: the
+        current year) are excluded alongside any history passed in, and the
+        new draw is committed to the store as that year's draw for group.
+
+        previous_pairs are (giver_email, receiver_email) pairs from last
+        year's draw, an alternative to previous_assignments that skips the
+        names; see CSVHandler.iter_history_pairs.
+        
+        With optimize, the draw is improved for soft preferences
+        (cross-department, cross-office, not one's manager); see
+        PreferenceOptimizer.
+        
+        With single_cycle, everybody is in one gift chain (A gives to B,
+        B to C, ..., back to A) instead of possibly several loops; see
+        GiftChain.
+        
+        Results are cached by a canonical fingerprint of all of the above, so
+        a retried request returns the same draw without solving again. With a
+        history store nothing is cached: the stored history is not part of
+        the fingerprint and changes with every committed draw.
+        """
+        year = year or datetime.date.today().year
+        key = self._cache_key(
+            employees, previous_assignments, previous_years, lookback_years, seed, algorithm_version, year, group,
+            previous_pairs, optimize, single_cycle
+        )
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached.in_order_of(employees)
+        
+        result = self._generate_draw(
+            employees, previous_assignments, previous_years, lookback_years, seed, algorithm_version, year, group,
+            previous_pairs, optimize, single_cycle
+        )
+        self._save_draw(result, year, group)
+        if key:
+            self.cache.put(key, result, weight=result.total_assignments)
+        return result
+
+    def _generate_draw(
+        self,
+        employees: List[Employee],
+        previous_assignments: Optional[List[Assignment]],
+        previous_years: Optional[Dict[int, List[Assignment]]],
+        lookback_years: Optional[int],
+        seed: Optional[int],
+        algorithm_version: int,
+        year: int,
+        group: str,
+        previous_pairs: Optional[List[Pair]] = None,
+        optimize: Optional[OptimizationSettings] = None,
+        single_cycle: bool = False
+    ) -> DrawResult:
+        if algorithm_version not in SUPPORTED_ALGORITHM_VERSIONS:
+            raise UnsupportedAlgorithmException(
+                f"Unsupported algorithm version {algorithm_version}; "
+                f"supported: {', '.join(map(str, SUPPORTED_ALGORITHM_VERSIONS))}"
+            )
+        # A seeded optimisation must not stop on the clock, or the seed would not reproduce it
+        use_time_budget = seed is None
+        if seed is None:
+            seed = secrets.randbits(63)
+        
+        stats = {}
+        
         # Create repository and validate employees
-        repository = EmployeeRepository(employees)
+        with metrics.span('validation', stats):
+            repository = EmployeeRepository(employees)
         
         # Load assignment history
-        history = AssignmentHistory(previous_assignments)
+        with metrics.span('history', stats):
+            history = self._load_history(
+                previous_assignments, previous_years, lookback_years, year, group, previous_pairs
+            )
         
         # Generate assignments
-        assigner = SecretSantaAssigner(repository, history)
-        assignments = assigner.assign()
+        with metrics.span('assignment', stats):
+            assigner = SecretSantaAssigner(
+                repository, history, random.Random(seed), optimize, single_cycle, use_time_budget
+            )
+            indexed = assigner.assign_indexed()
+        
+        if assigner.optimizer is not None:
+            stats['optimization_iterations'] = assigner.optimizer.iterations_run
+            stats['optimization_truncated'] = int(assigner.optimizer.truncated)
+        stats['attempts'] = assigner.attempts_used
+        stats['repairs'] = assigner.repairs
+        stats['employees'] = len(indexed)
+        stats['history_pairs'] = len(previous_assignments or ()) + len(previous_pairs or ()) + sum(
+            len(year_assignments) for year_assignments in (previous_years or {}).values()
+        )
+        metrics.record_draw(stats, stages=False)
+        
+        return DrawResult(
+            indexed, seed, algorithm_version,
+            self.draw_digest(indexed.pairs(), seed, algorithm_version),
+            stats,
+            assigner.score
+        )
+
+    def generate_assignments(
+        self,
+        employees: List[Employee],
+        previous_assignments: List[Assignment] = None,
+        previous_years: Optional[Dict[int, List[Assignment]]] = None,
+        lookback_years: Optional[int] = None,
+        seed: Optional[int] = None,
+        algorithm_version: int = ALGORITHM_VERSION,
+        year: Optional[int] = None
+    ) -> List[Assignment]:
+        return self.generate_draw(
+            employees, previous_assignments, previous_years, lookback_years, seed, algorithm_version, year
+        ).assignments
+
+    def _draw_arguments(self, *args, **kwargs) -> Dict[str, Any]:
+        """generate_draw() arguments by name in _generate_draw() order, defaults applied"""
+        bound = inspect.signature(self.generate_draw).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        arguments['year'] = arguments['year'] or datetime.date.today().year
+        return arguments
+
+    def _save_draw(self, result: DrawResult, year: int, group: str):
+        """Commit a draw to the history store, if there is one"""
+        if self.history_store is not None:
+            with metrics.span('persist', result.stats):
+                self.history_store.save_draw(year, result.indexed.materialize(), group)
+
+    def _caching(self) -> bool:
+        return self.cache is not None and self.history_store is None
+
+    def _cache_key(self, *arguments) -> Optional[str]:
+        return draw_fingerprint(*arguments) if self._caching() else None
+
+    def _load_history(
+        self,
+        previous_assignments: Optional[List[Assignment]],
+        previous_years: Optional[Dict[int, List[Assignment]]],
+        lookback_years: Optional[int],
+        year: int,
+        group: str = '',
+        previous_pairs: Optional[List[Pair]] = None
+    ) -> AssignmentHistory:
+        last_year = year - 1
+        if self.history_store is None and not previous_pairs and last_year not in (previous_years or {}):
+            return AssignmentHistory(previous_assignments, previous_years, lookback_years)
+        
+        year_pairs = {}
+        if self.history_store is not None:
+            year_pairs = self.history_store.load_pairs(
+                before_year=year, lookback_years=lookback_years, group=group
+            )
+        for previous_year, assignments in (previous_years or {}).items():
+            year_pairs[previous_year] = AssignmentHistory.pairs(assignments)
+        recent = None
+        if previous_assignments or previous_pairs:
+            recent = itertools.chain(AssignmentHistory.pairs(previous_assignments or ()), previous_pairs or ())
+            # Last year's draw given twice (passed in and stored) still takes one lookback year
+            if last_year in year_pairs:
+                year_pairs[last_year] = itertools.chain(year_pairs[last_year], recent)
+                recent = None
+        return AssignmentHistory.from_pairs(recent, year_pairs, lookback_years)
+
+    def reassign(
+        self,
+        current_assignments: List[Assignment],
+        joined: Optional[List[Employee]] = None,
+        left: Optional[List[str]] = None,
+        previous_assignments: List[Assignment] = None,
+        previous_years: Optional[Dict[int, List[Assignment]]] = None,
+        lookback_years: Optional[int] = None,
+        seed: Optional[int] = None,
+        year: Optional[int] = None,
+        group: str = ''
+    ) -> Tuple[List[Assignment], List[str]]:
+        """Update an existing draw for roster changes, touching O(1) pairs per change
+
+        Returns the updated assignments and the emails of givers whose secret
+        child changed. With a history store the updated draw replaces the
+        stored one for year.
+        """
+        year = year or datetime.date.today().year
+        assignments, changed = self._reassign(
+            current_assignments, joined, left, previous_assignments, previous_years, lookback_years, seed, year, group
+        )
+        if self.history_store is not None:
+            self.history_store.save_draw(year, assignments, group)
+        return assignments, changed
+
+    def _reassign(
+        self,
+        current_assignments: List[Assignment],
+        joined: Optional[List[Employee]],
+        left: Optional[List[str]],
+        previous_assignments: Optional[List[Assignment]],
+        previous_years: Optional[Dict[int, List[Assignment]]],
+        lookback_years: Optional[int],
+        seed: Optional[int],
+        year: int,
+        group: str
+    ) -> Tuple[List[Assignment], List[str]]:
+        """reassign() without committing the result"""
+        from incremental_reassigner import IncrementalReassigner
+        
+        history = self._load_history(previous_assignments, previous_years, lookback_years, year, group)
+        reassigner = IncrementalReassigner(current_assignments, history, random.Random(seed))
+        assignments = reassigner.apply(joined, left)
+        
+        # The updated roster must still be a valid roster on its own
+        EmployeeRepository([
+            Employee.model_construct(name=a.employee_name, email=a.employee_email) for a in assignments
+        ])
         
-        return assignments
\ No newline at end of file
+        changed = [a.employee_email for a in assignments if a.employee_email in reassigner.changed]
+        return assignments, changed
+
+    async def reassign_async(self, *args, **kwargs) -> Tuple[List[Assignment], List[str]]:
+        """reassign() on the configured execution backend
+
+        The updated draw is committed here once it is back, so a reassignment
+        that outlives the request timeout leaves the stored draw alone.
+        """
+        bound = inspect.signature(self.reassign).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        arguments['year'] = arguments['year'] or datetime.date.today().year
+        with self._instrumented('reassign'):
+            assignments, changed = await self.executor.run(self._reassign, *arguments.values())
+            if self.history_store is not None:
+                await self.executor.run_local(
+                    self.history_store.save_draw, arguments['year'], assignments, arguments['group']
+                )
+        return assignments, changed
+
+    async def generate_batch_async(self, groups: Dict[str, dict]) -> Dict[str, Union[DrawResult, Exception]]:
+        """Run independent draws in parallel on the configured execution backend
+
+        groups maps a group id to generate_draw() keyword arguments. A failing
+        group yields its exception instead of aborting the others.
+        """
+        if self.history_store is None:
+            calls = [partial(self.generate_draw, group=group_id, **kwargs) for group_id, kwargs in groups.items()]
+        else:
+            # Solved without committing and committed here, as in generate_draw_async
+            arguments = {
+                group_id: self._draw_arguments(group=group_id, **kwargs) for group_id, kwargs in groups.items()
+            }
+            calls = [partial(self._generate_draw, *group_arguments.values()) for group_arguments in arguments.values()]
+        with self._instrumented('batch'):
+            outcomes = dict(zip(groups, await self.executor.run_batch(calls)))
+            if self.history_store is not None:
+                years = {group_id: group_arguments['year'] for group_id, group_arguments in arguments.items()}
+                outcomes = await self.executor.run_local(self._save_batch, outcomes, years)
+        
+        for outcome in outcomes.values():
+            if isinstance(outcome, Exception):
+                metrics.FAILURES.inc(1, 'draw', type(outcome).__name__)
+            elif self.executor.mode == 'process':
+                # Solved in a worker process
+                metrics.record_draw(outcome.stats)
+        return outcomes
+
+    def _save_batch(
+        self,
+        outcomes: Dict[str, Union[DrawResult, Exception]],
+        years: Dict[str, int]
+    ) -> Dict[str, Union[DrawResult, Exception]]:
+        """Commit each solved group's draw; a group whose commit fails yields that exception"""
+        for group_id, outcome in outcomes.items():
+            if not isinstance(outcome, Exception):
+                try:
+                    self._save_draw(outcome, years[group_id], group_id)
+                except Exception as e:
+                    outcomes[group_id] = e
+        return outcomes
+
+    async def generate_draw_async(self, *args, **kwargs) -> DrawResult:
+        """generate_draw() on the configured execution backend"""
+        with self._instrumented('draw'):
+            if self.history_store is not None:
+                # Committed here once the draw is back: a solve still running after the
+                # caller timed out must not overwrite the draw its retry committed
+                arguments = self._draw_arguments(*args, **kwargs)
+                result = await self.executor.run(self._generate_draw, *arguments.values())
+                if self.executor.mode == 'process':
+                    metrics.record_draw(result.stats)
+                await self.executor.run_local(self._save_draw, result, arguments['year'], arguments['group'])
+                return result
+            if self.executor.mode != 'process':
+                return await self.executor.run(self.generate_draw, *args, **kwargs)
+            if not self._caching():
+                result = await self.executor.run(self.generate_draw, *args, **kwargs)
+                metrics.record_draw(result.stats)
+                return result
+            
+            # Worker processes have no cache, so look up and store results here
+            arguments = self._draw_arguments(*args, **kwargs)
+            key = await self.executor.run_local(draw_fingerprint, *arguments.values())
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached.in_order_of(arguments['employees'])
+            result = await self.executor.run(self._generate_draw, *arguments.values())
+            metrics.record_draw(result.stats)
+            self.cache.put(key, result, weight=result.total_assignments)
+            return result
+
+    async def profile_draw_async(self, *args, **kwargs) -> Tuple[DrawResult, ProfileReport]:
+        """generate_draw_async() under cProfile, in the worker that solves it
+
+        The cache is bypassed so that the profile shows a real solve.
+        """
+        arguments = self._draw_arguments(*args, **kwargs)
+        with self._instrumented('draw'):
+            result, report = await self.executor.run(run_profiled, self._generate_draw, *arguments.values())
+        if self.executor.mode == 'process':
+            metrics.record_draw(result.stats)
+        await self.executor.run_local(self._save_draw, result, arguments['year'], arguments['group'])
+        return result, report
+
+    async def generate_assignments_async(self, *args, **kwargs) -> List[Assignment]:
+        """generate_assignments() on the configured execution backend"""
+        return await self.executor.run(self.generate_assignments, *args, **kwargs)
+
+    async def prewarm(self):
+        """Start the executor's workers and run a throwaway draw in each
+
+        The draw touches no history store or cache; it only loads and warms
+        the validation and assignment code so the first real request starts hot.
+        """
+        self.warm_up()
+        await self.executor.prewarm(SecretSantaService.warm_up)
+
+    @staticmethod
+    def warm_up():
+        employees = [Employee(name=f"Warm Up {i}", email=f"warm-up-{i}@example.com") for i in range(3)]
+        SecretSantaAssigner(EmployeeRepository(employees), AssignmentHistory(), random.Random(0)).assign()
+
+    @staticmethod
+    @contextmanager
+    def _instrumented(operation: str):
+        """Time an async entry point end to end (queueing included) and count its failures"""
+        try:
+            with metrics.span(operation):
+                yield
+        except Exception as e:
+            metrics.FAILURES.inc(1, operation, type(e).__name__)
+            raise
+
+    @staticmethod
+    def draw_digest(pairs: Iterable[Pair], seed: int, algorithm_version: int) -> str:
+        """Short fingerprint of a draw's (giver_email, receiver_email) pairs, independent of their order"""
+        digest = hashlib.sha256(f"v{algorithm_version}:{seed}\n".encode('utf-8'))
+        for giver, receiver in sorted(pairs):
+            digest.update(f"{giver}>{receiver}\n".encode('utf-8'))
+        return digest.hexdigest()[:32]
@@ -0,0 +1,31 @@
+import random
+from typing import Callable, Sequence
+
+
+def find_swap(
+    rng: random.Random,
+    samples: int,
+    givers: Sequence[int],
+    partners: Sequence[int],
+    try_swap: Callable[[int, int], bool]
+) -> bool:
+    """Find a (giver, partner) pair for which try_swap() succeeds
+
+    samples random pairs are probed first; under sparse constraints one of
+    them almost always works. Then every pair is tried, starting from a
+    random partner offset, which keeps the scan order unpredictable. A
+    single giver is used as it is, without drawing from rng.
+    """
+    randrange = rng.randrange
+    for _ in range(samples):
+        giver = givers[0] if len(givers) == 1 else givers[randrange(len(givers))]
+        if try_swap(giver, partners[randrange(len(partners))]):
+            return True
+    
+    start = randrange(len(partners))
+    for giver in givers:
+        for offset in range(len(partners)):
+            if try_swap(giver, partners[(start + offset) % len(partners)]):
+                return True
+    
+    return False
@@ -0,0 +1,91 @@
+import pytest
+from models import Employee, Assignment
+from assignment_validator import AssignmentValidator
+
+
+@pytest.fixture
+def sample_csv_employees():
+    return (
+        "Employee_Name,Employee_EmailID\n"
+        "Alice Smith,alice@acme.com\n"
+        "Bob Jones,bob@acme.com\n"
+        "Charlie Brown,charlie@acme.com\n"
+    )
+
+
+@pytest.fixture
+def sample_csv_assignments():
+    return (
+        "Employee_Name,Employee_EmailID,Secret_Child_Name,Secret_Child_EmailID\n"
+        "Alice Smith,alice@acme.com,Bob Jones,bob@acme.com\n"
+        "Bob Jones,bob@acme.com,Charlie Brown,charlie@acme.com\n"
+    )
+
+
+@pytest.fixture
+def sample_assignments():
+    return [
+        Assignment(
+            employee_name="Alice Smith",
+            employee_email="alice@acme.com",
+            secret_child_name="Charlie Brown",
+            secret_child_email="charlie@acme.com"
+        ),
+        Assignment(
+            employee_name="Bob Jones",
+            employee_email="bob@acme.com",
+            secret_child_name="Alice Smith",
+            secret_child_email="alice@acme.com"
+        )
+    ]
+
+
+@pytest.fixture
+def make_employees():
+    """Roster factory: name_groups limits the distinct names, org_chart adds departments and managers"""
+    def make(count, name_groups=None, org_chart=False):
+        name_groups = name_groups or count
+        return [
+            Employee(
+                name=f"Employee {i % name_groups}",
+                email=f"employee{i}@acme.com",
+                department=("Sales" if i % 2 else "Engineering") if org_chart else None,
+                manager_email=f"employee{i - i % 5}@acme.com" if org_chart and i % 5 else None
+            )
+            for i in range(count)
+        ]
+    return make
+
+
+@pytest.fixture
+def pair():
+    """Assignment factory: pair("alice", "bob") is alice@acme.com -> bob@acme.com"""
+    def make(giver, receiver):
+        return Assignment(
+            employee_name=giver.title(),
+            employee_email=f"{giver}@acme.com",
+            secret_child_name=receiver.title(),
+            secret_child_email=f"{receiver}@acme.com"
+        )
+    return make
+
+
+@pytest.fixture
+def assert_valid():
+    """Check that a draw is a permutation, of employees if given, breaking no rule"""
+    def check(assignments, history, employees=None):
+        givers = [a.employee_email for a in assignments]
+        receivers = [a.secret_child_email for a in assignments]
+        assert len(set(givers)) == len(givers)
+        assert set(givers) == set(receivers)
+        if employees is not None:
+            assert set(givers) == {emp.email for emp in employees}
+            assert len(givers) == len(employees)
+        for a in assignments:
+            is_valid, _ = AssignmentValidator.validate(
+                Employee(name=a.employee_name, email=a.employee_email),
+                Employee(name=a.secret_child_name, email=a.secret_child_email),
+                history
+            )
+            assert is_valid
+    return check
@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from main import app
+from request_profiler import RequestProfiler
 
 client = TestClient(app)
 
@@ -103,3 +104,412 @@ class TestAPIEndpoints:
         response = client.post("/assign/csv", files=files)
         assert response.status_code == 200
         assert response.headers["content-type"] == "text/csv; charset=utf-8"
+
+    def test_assign_infeasible_constraints(self):
+        """Test that impossible constraints are reported as a client error"""
+        data = {
+            "current_employees": [
+                {"name": "Alice", "email": "alice1@acme.com"},
+                {"name": "Alice", "email": "alice2@acme.com"}
+            ]
+        }
+        response = client.post("/assign", json=data)
+        assert response.status_code == 400
+        assert "No valid assignment exists" in response.json()["detail"]
+
+    def test_assign_with_multiple_previous_years(self):
+        """Test that every year in previous_years is excluded"""
+        employees = [
+            {"name": "Alice", "email": "alice@acme.com"},
+            {"name": "Bob", "email": "bob@acme.com"},
+            {"name": "Charlie", "email": "charlie@acme.com"},
+            {"name": "Dana", "email": "dana@acme.com"}
+        ]
+        def pair(giver, receiver):
+            return {
+                "employee_name": giver["name"],
+                "employee_email": giver["email"],
+                "secret_child_name": receiver["name"],
+                "secret_child_email": receiver["email"]
+            }
+        data = {
+            "current_employees": employees,
+            "previous_years": {
+                "2023": [pair(employees[0], employees[1])],
+                "2022": [pair(employees[0], employees[2])]
+            },
+            "lookback_years": 2
+        }
+        response = client.post("/assign", json=data)
+        assert response.status_code == 200
+        alice_assignment = next(
+            a for a in response.json()["assignments"]
+            if a["employee_email"] == "alice@acme.com"
+        )
+        assert alice_assignment["secret_child_email"] == "dana@acme.com"
+
+    def test_seeded_draw_is_reproducible(self):
+        """Test that the same seed gives the same draw and digest in any roster order"""
+        employees = [
+            {"name": f"Employee {i}", "email": f"employee{i}@acme.com"} for i in range(20)
+        ]
+        first = client.post("/assign", json={"current_employees": employees, "seed": 42}).json()
+        second = client.post(
+            "/assign", json={"current_employees": list(reversed(employees)), "seed": 42}
+        ).json()
+        assert first["seed"] == 42
+        assert first["algorithm_version"] == 1
+        assert first["digest"] == second["digest"]
+        pairs = lambda result: sorted(
+            (a["employee_email"], a["secret_child_email"]) for a in result["assignments"]
+        )
+        assert pairs(first) == pairs(second)
+
+    def test_unseeded_draw_returns_its_seed(self):
+        """Test that an unseeded draw can be regenerated from the returned seed"""
+        data = {
+            "current_employees": [
+                {"name": f"Employee {i}", "email": f"employee{i}@acme.com"} for i in range(10)
+            ]
+        }
+        first = client.post("/assign", json=data).json()
+        replay = client.post("/assign", json={**data, "seed": first["seed"]}).json()
+        assert replay["digest"] == first["digest"]
+
+    def test_unsupported_algorithm_version(self):
+        """Test that an unknown algorithm version is a client error"""
+        data = {
+            "current_employees": [
+                {"name": "Alice", "email": "alice@acme.com"},
+                {"name": "Bob", "email": "bob@acme.com"}
+            ],
+            "algorithm_version": 99
+        }
+        response = client.post("/assign", json=data)
+        assert response.status_code == 400
+
+    def test_csv_upload_with_seed(self, sample_csv_employees):
+        """Test that the CSV endpoint accepts a seed and reports the digest"""
+        files = {
+            'employees_file': ('employees.csv', sample_csv_employees, 'text/csv')
+        }
+        first = client.post("/assign/csv", files=files, data={"seed": "7"})
+        second = client.post("/assign/csv", files=files, data={"seed": "7"})
+        assert first.headers["x-draw-seed"] == "7"
+        assert first.headers["x-draw-digest"] == second.headers["x-draw-digest"]
+        assert first.content == second.content
+
+    def test_update_assignments_after_join(self):
+        """Test the incremental update endpoint"""
+        employees = [
+            {"name": f"Employee {i}", "email": f"employee{i}@acme.com"} for i in range(6)
+        ]
+        draw = client.post("/assign", json={"current_employees": employees}).json()
+        data = {
+            "current_assignments": draw["assignments"],
+            "joined": [{"name": "Newcomer", "email": "newcomer@acme.com"}]
+        }
+        response = client.post("/assign/update", json=data)
+        assert response.status_code == 200
+        result = response.json()
+        assert result["total_assignments"] == 7
+        assert len(result["changed_assignments"]) == 2
+
+    def test_batch_assignments(self):
+        """Test that groups are solved independently and failures stay per group"""
+        data = {
+            "groups": [
+                {
+                    "group_id": "london",
+                    "current_employees": [
+                        {"name": f"London {i}", "email": f"london{i}@acme.com"} for i in range(5)
+                    ]
+                },
+                {
+                    "group_id": "paris",
+                    "current_employees": [{"name": "Solo", "email": "solo@acme.com"}]
+                }
+            ]
+        }
+        response = client.post("/assign/batch", json=data)
+        assert response.status_code == 200
+        result = response.json()
+        assert result["success"] is False
+        assert result["failed_groups"] == ["paris"]
+        assert result["results"]["london"]["total_assignments"] == 5
+        assert result["results"]["paris"]["success"] is False
+
+    def test_cache_stats(self):
+        """Test that retrying an identical request is a cache hit"""
+        data = {
+            "current_employees": [
+                {"name": f"Cached {i}", "email": f"cached{i}@acme.com"} for i in range(5)
+            ]
+        }
+        before = client.get("/cache/stats").json()
+        first = client.post("/assign", json=data).json()
+        second = client.post("/assign", json=data).json()
+        after = client.get("/cache/stats").json()
+        assert first["digest"] == second["digest"]
+        assert after["hits"] == before["hits"] + 1
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics exposes stage timings in Prometheus format"""
+        data = {
+            "current_employees": [
+                {"name": f"Metric {i}", "email": f"metric{i}@acme.com"} for i in range(4)
+            ]
+        }
+        client.post("/assign", json=data)
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'secret_santa_stage_seconds_count{stage="assignment"}' in response.text
+        assert 'secret_santa_stage_seconds_count{stage="draw"}' in response.text
+        assert "# TYPE secret_santa_assignment_attempts histogram" in response.text
+        assert "secret_santa_cache_misses_total" in response.text
+
+    def test_profiled_request(self, tmp_path, monkeypatch):
+        """Test that a request with the profiling token returns a downloadable profile"""
+        import main
+        
+        monkeypatch.setattr(main, "profiler", RequestProfiler(token="secret", directory=str(tmp_path)))
+        data = {
+            "current_employees": [
+                {"name": f"Profiled {i}", "email": f"profiled{i}@acme.com"} for i in range(4)
+            ]
+        }
+        assert client.post("/assign", json=data, headers={"X-Profile-Token": "wrong"}).status_code == 403
+        response = client.post("/assign", json=data, headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+        
+        assert client.get(f"/profiles/{profile_id}").status_code == 403
+        download = client.get(f"/profiles/{profile_id}", headers={"X-Profile-Token": "secret"})
+        assert download.status_code == 200
+        assert len(download.content) > 0
+
+    def test_unsaved_profile_has_no_profile_header(self, monkeypatch):
+        """Test that a profile only logged, with nowhere to save it, is not offered for download"""
+        import main
+        
+        monkeypatch.setattr(main, "profiler", RequestProfiler(token="secret"))
+        data = {"current_employees": [{"name": f"Logged {i}", "email": f"logged{i}@acme.com"} for i in range(3)]}
+        response = client.post("/assign", json=data, headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+
+    def test_unprofiled_request_has_no_profile_header(self):
+        """Test that requests are not profiled by default"""
+        data = {"current_employees": [{"name": f"Plain {i}", "email": f"plain{i}@acme.com"} for i in range(3)]}
+        response = client.post("/assign", json=data)
+        assert "X-Profile-Id" not in response.headers
+
+    def test_csv_upload_excludes_previous_pairs(self, sample_csv_employees, sample_csv_assignments):
+        """Test that last year's pairs from the history file are excluded"""
+        files = {
+            "employees_file": ("employees.csv", sample_csv_employees, "text/csv"),
+            "previous_assignments_file": ("previous.csv", sample_csv_assignments, "text/csv"),
+        }
+        response = client.post("/assign/csv", files=files)
+        assert response.status_code == 200
+        rows = response.text.strip().splitlines()[1:]
+        pairs = {tuple(row.split(",")[1::2]) for row in rows}
+        assert pairs == {
+            ("alice@acme.com", "charlie@acme.com"),
+            ("bob@acme.com", "alice@acme.com"),
+            ("charlie@acme.com", "bob@acme.com"),
+        }
+
+    def test_optimized_draw_reports_score(self):
+        """Test that an optimised draw returns its preference score"""
+        data = {
+            "current_employees": [
+                {"name": f"Team {i}", "email": f"team{i}@acme.com", "department": "A" if i % 2 else "B"}
+                for i in range(6)
+            ],
+            "optimize": {"cross_office": 0, "avoid_manager": 0},
+            "seed": 1
+        }
+        response = client.post("/assign", json=data)
+        assert response.status_code == 200
+        assert response.json()["score"] == 6.0
+        assert client.post("/assign", json={**data, "optimize": None}).json()["score"] is None
+
+    def test_job_submit_poll_and_ranged_download(self):
+        """Test the background job flow end to end"""
+        data = {"current_employees": [{"name": f"Job {i}", "email": f"job{i}@acme.com"} for i in range(8)]}
+        response = client.post("/jobs", json=data)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        
+        import time
+        for _ in range(500):
+            status = client.get(f"/jobs/{job_id}").json()
+            if status["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.01)
+        assert status["status"] == "succeeded"
+        assert status["result_url"] == f"/jobs/{job_id}/result"
+        
+        full = client.get(status["result_url"])
+        assert full.status_code == 200
+        assert len(full.text.strip().splitlines()) == 9
+        assert full.headers["X-Draw-Digest"] == status["digest"]
+        partial = client.get(status["result_url"], headers={"Range": "bytes=0-9"})
+        assert partial.status_code == 206
+        assert partial.content == full.content[:10]
+
+    def test_job_validates_body_in_the_job(self):
+        """Test that an invalid /jobs body is accepted at once and fails in the job"""
+        data = {"current_employees": [{"name": "Alice", "email": "not-an-email"}]}
+        response = client.post("/jobs", json=data)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        
+        import time
+        for _ in range(500):
+            status = client.get(f"/jobs/{job_id}").json()
+            if status["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.01)
+        assert status["status"] == "failed"
+        assert status["message"].startswith("Invalid request")
+
+    def test_unknown_job(self):
+        """Test that unknown job ids are 404"""
+        assert client.get("/jobs/nope").status_code == 404
+        assert client.get("/jobs/nope/result").status_code == 404
+
+    def test_assign_compact_encodings(self):
+        """Test that Accept selects the compact JSON and binary encodings of the same draw"""
+        import compact_format
+        
+        data = {
+            "current_employees": [{"name": f"Employee {i}", "email": f"employee{i}@acme.com"} for i in range(40)],
+            "seed": 3
+        }
+        full = client.post("/assign", json=data).json()
+        expected = {(a["employee_email"], a["secret_child_email"]) for a in full["assignments"]}
+        
+        compact = client.post("/assign", json=data, headers={"Accept": compact_format.COMPACT_JSON})
+        assert compact.headers["content-type"] == compact_format.COMPACT_JSON
+        body = compact.json()
+        emails = [email for _, email in body["employees"]]
+        assert {(emails[i], emails[r]) for i, r in enumerate(body["receivers"])} == expected
+        assert body["digest"] == full["digest"]
+        
+        binary = client.post(
+            "/assign", json=data,
+            headers={"Accept": compact_format.ROSTER_BINARY, "Accept-Encoding": "gzip"}
+        )
+        assert binary.headers["content-encoding"] == "gzip"
+        assert binary.headers["x-draw-digest"] == full["digest"]
+        assert set(compact_format.decode_roster(binary.content).pairs()) == expected
+
+    def test_csv_upload_compact_encoding(self, sample_csv_employees):
+        """Test that the CSV endpoint also negotiates the compact encoding"""
+        import compact_format
+        
+        files = {'employees_file': ('employees.csv', sample_csv_employees, 'text/csv')}
+        response = client.post(
+            "/assign/csv", files=files, data={"seed": "7"}, headers={"Accept": compact_format.ROSTER_BINARY}
+        )
+        assert response.status_code == 200
+        assert response.headers["x-draw-seed"] == "7"
+        assert len(compact_format.decode_roster(response.content)) == 3
+
+    def test_fast_assign_matches_assign(self):
+        """Test that /assign/fast answers exactly what /assign does"""
+        data = {
+            "current_employees": [
+                {"name": f" Employee {i} ", "email": f"employee{i}@ACME.com", "department": "A" if i % 2 else "B"}
+                for i in range(12)
+            ],
+            "previous_years": {"2023": [
+                {"employee_name": "Employee 0", "employee_email": "employee0@acme.com",
+                 "secret_child_name": "Employee 1", "secret_child_email": "employee1@acme.com"}
+            ]},
+            "seed": 11,
+            "optimize": {"time_budget_ms": 100}
+        }
+        expected = client.post("/assign", json=data)
+        fast = client.post("/assign/fast", json=data)
+        assert fast.status_code == 200
+        assert fast.headers["content-type"] == "application/json"
+        assert fast.json() == expected.json()
+
+    def test_bulk_validation_is_imported_on_first_use(self):
+        """Test that starting the API does not load the bulk validation modules"""
+        import subprocess
+        import sys
+        
+        script = "import sys, main; print('bulk_validator' in sys.modules, 'fast_json' in sys.modules)"
+        loaded = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout.split()
+        assert loaded == ["False", "False"]
+
+    def test_fast_assign_reports_validation_errors(self):
+        """Test that /assign/fast rejects bad payloads with the usual 422 details"""
+        data = {
+            "current_employees": [
+                {"name": "Alice", "email": "not-an-email"},
+                {"name": "Bob", "email": "bob@acme.com"}
+            ]
+        }
+        expected = client.post("/assign", json=data)
+        fast = client.post("/assign/fast", json=data)
+        assert fast.status_code == 422
+        assert fast.json() == expected.json()
+        
+        assert client.post("/assign/fast", json={**data, "seed": -1}).status_code == 422
+        broken = client.post("/assign/fast", content=b"{not json", headers={"Content-Type": "application/json"})
+        assert broken.status_code == 422
+        assert broken.json()["detail"][0]["type"] == "json_invalid"
+
+    @pytest.mark.parametrize(
+        "email", ["a@b.test", "x@example.local", f"{'a' * 65}@acme.com", "a@xn--bcher-kva.com"]
+    )
+    def test_fast_assign_agrees_on_edge_case_emails(self, email):
+        """Test that /assign/fast accepts and refuses the same emails as /assign"""
+        data = {
+            "current_employees": [
+                {"name": "Alice", "email": email},
+                {"name": "Bob", "email": "bob@acme.com"}
+            ],
+            "seed": 3
+        }
+        expected = client.post("/assign", json=data)
+        fast = client.post("/assign/fast", json=data)
+        assert fast.status_code == expected.status_code
+        assert fast.json() == expected.json()
+
+    def test_assign_single_cycle(self):
+        """Test that single_cycle gives one gift chain and is part of the cache key"""
+        data = {
+            "current_employees": [{"name": f"Chain {i}", "email": f"chain{i}@acme.com"} for i in range(30)],
+            "seed": 4
+        }
+        chain = client.post("/assign", json={**data, "single_cycle": True}).json()
+        receivers = {a["employee_email"]: a["secret_child_email"] for a in chain["assignments"]}
+        current, length = receivers["chain0@acme.com"], 1
+        while current != "chain0@acme.com":
+            current, length = receivers[current], length + 1
+        assert length == 30
+        assert client.post("/assign", json=data).json()["digest"] != chain["digest"]
+
+    def test_assignments_keep_upload_order(self):
+        """Test that results list givers in upload order while the draw ignores it"""
+        employees = [{"name": name, "email": f"{name.lower()}@acme.com"} for name in ("Zed", "Amy", "Max", "Bea")]
+        forward = client.post("/assign", json={"current_employees": employees, "seed": 2}).json()
+        backward = client.post("/assign", json={"current_employees": employees[::-1], "seed": 2}).json()
+        assert [a["employee_name"] for a in forward["assignments"]] == ["Zed", "Amy", "Max", "Bea"]
+        assert [a["employee_name"] for a in backward["assignments"]] == ["Bea", "Max", "Amy", "Zed"]
+        assert forward["digest"] == backward["digest"]
+        
+        fast = client.post("/assign/fast", json={"current_employees": employees, "seed": 2}).json()
+        assert fast["assignments"] == forward["assignments"]
+        
+        csv_body = "Employee_Name,Employee_EmailID\n" + "".join(f"{e['name']},{e['email']}\n" for e in employees)
+        files = {'employees_file': ('employees.csv', csv_body, 'text/csv')}
+        rows = client.post("/assign/csv", files=files, data={"seed": "2"}).text.strip().splitlines()[1:]
+        assert [row.split(",")[0] for row in rows] == ["Zed", "Amy", "Max", "Bea"]
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+import pytest
+from models import Employee
+from assignment_executor import AssignmentExecutor
+from secret_santa_service import SecretSantaService
+from exceptions import ServiceOverloadedException, AssignmentTimeoutException, InsufficientEmployeesException
+
+
+EMPLOYEES = [
+    Employee(name="Alice", email="alice@acme.com"),
+    Employee(name="Bob", email="bob@acme.com"),
+    Employee(name="Charlie", email="charlie@acme.com")
+]
+
+
+class TestAssignmentExecutor:
+    """Test cases for AssignmentExecutor"""
+
+    def test_unknown_mode_rejected(self):
+        """Test that a typo in the mode fails loudly"""
+        with pytest.raises(ValueError):
+            AssignmentExecutor('threads')
+
+    def test_thread_mode_runs_off_the_event_loop(self):
+        """Test that work runs on a worker thread"""
+        executor = AssignmentExecutor('thread')
+        caller = threading.get_ident()
+        worker = asyncio.run(executor.run(threading.get_ident))
+        executor.shutdown()
+        assert worker != caller
+
+    def test_queue_limit_returns_overloaded(self):
+        """Test backpressure once workers and queue are full"""
+        executor = AssignmentExecutor('thread', max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(executor.run(release.wait))
+            second = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(ServiceOverloadedException):
+                await executor.run(release.wait)
+            release.set()
+            await asyncio.gather(first, second)
+
+        asyncio.run(scenario())
+        executor.shutdown()
+        assert executor.pending == 0
+
+    def test_timeout(self):
+        """Test that a slow call raises once its time limit passes"""
+        executor = AssignmentExecutor('thread', timeout=0.05)
+        with pytest.raises(AssignmentTimeoutException):
+            asyncio.run(executor.run(time.sleep, 0.5))
+        executor.shutdown(wait=True)
+        assert executor.pending == 0
+
+    @pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+    def test_service_runs_on_every_backend(self, mode):
+        """Test the service end to end on each backend"""
+        service = SecretSantaService(AssignmentExecutor(mode, max_workers=1))
+        assignments = asyncio.run(service.generate_assignments_async(EMPLOYEES))
+        service.executor.shutdown()
+        assert len(assignments) == 3
+
+    @pytest.mark.parametrize("mode", ["inline", "thread"])
+    def test_batch_keeps_failures_per_group(self, mode):
+        """Test that one failing group does not abort the batch"""
+        service = SecretSantaService(AssignmentExecutor(mode, max_workers=2))
+        results = asyncio.run(service.generate_batch_async({
+            "ok": {"employees": EMPLOYEES},
+            "too-small": {"employees": EMPLOYEES[:1]}
+        }))
+        service.executor.shutdown()
+        assert len(results["ok"].assignments) == 3
+        assert isinstance(results["too-small"], InsufficientEmployeesException)
+
+    def test_thread_mode_batch_stays_on_threads(self):
+        """Test that a batch in thread mode does not start worker processes"""
+        executor = AssignmentExecutor('thread', max_workers=2)
+        results = asyncio.run(executor.run_batch([threading.current_thread] * 3))
+        assert executor._process_pool is None
+        executor.shutdown()
+        assert all(thread.name.startswith('secret-santa') for thread in results)
+
+    def test_prewarm_starts_every_worker(self):
+        """Test that prewarm runs the warm-up once in each worker thread"""
+        executor = AssignmentExecutor('thread', max_workers=2)
+        threads = set()
+        
+        def warm_up():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+        
+        asyncio.run(executor.prewarm(warm_up))
+        executor.shutdown()
+        assert len(threads) == 2
+
+    def test_service_prewarm_leaves_no_state(self):
+        """Test that the warm-up draw is neither cached nor stored"""
+        service = SecretSantaService(executor=AssignmentExecutor('inline'))
+        asyncio.run(service.prewarm())
+        assert service.cache.stats()["entries"] == 0
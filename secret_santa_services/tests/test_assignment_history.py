@@ -0,0 +1,55 @@
+from assignment_history import AssignmentHistory
+
+
+class TestAssignmentHistory:
+    """Test cases for AssignmentHistory"""
+
+    def test_empty_history_allows_everything(self):
+        """Test that no history means no exclusions"""
+        history = AssignmentHistory()
+        assert history.can_assign("alice@acme.com", "bob@acme.com")
+        assert history.get_previous_child("alice@acme.com") is None
+
+    def test_last_year_excluded(self, pair):
+        """Test the single-year behaviour"""
+        history = AssignmentHistory([pair("alice", "bob")])
+        assert not history.can_assign("alice@acme.com", "bob@acme.com")
+        assert history.can_assign("bob@acme.com", "alice@acme.com")
+        assert history.get_previous_child("alice@acme.com") == "bob@acme.com"
+
+    def test_multiple_years_merged(self, pair):
+        """Test that every loaded year is excluded"""
+        history = AssignmentHistory(
+            [pair("alice", "bob")],
+            previous_years={2022: [pair("alice", "carol")], 2021: [pair("alice", "dave")]}
+        )
+        assert not history.can_assign("alice@acme.com", "bob@acme.com")
+        assert not history.can_assign("alice@acme.com", "carol@acme.com")
+        assert not history.can_assign("alice@acme.com", "dave@acme.com")
+        assert history.can_assign("alice@acme.com", "erin@acme.com")
+        assert history.get_previous_child("alice@acme.com") == "bob@acme.com"
+
+    def test_lookback_window(self, pair):
+        """Test that years older than the window are ignored"""
+        history = AssignmentHistory(
+            previous_years={
+                2023: [pair("alice", "bob")],
+                2022: [pair("alice", "carol")],
+                2021: [pair("alice", "dave")]
+            },
+            lookback_years=2
+        )
+        assert not history.can_assign("alice@acme.com", "bob@acme.com")
+        assert not history.can_assign("alice@acme.com", "carol@acme.com")
+        assert history.can_assign("alice@acme.com", "dave@acme.com")
+        assert sorted(history.get_excluded_children("alice@acme.com")) == [
+            "bob@acme.com", "carol@acme.com"
+        ]
+
+    def test_integer_id_lookup(self, pair):
+        """Test that id lookups agree with email lookups"""
+        history = AssignmentHistory([pair("alice", "bob")])
+        alice = history.interner.get("alice@acme.com")
+        bob = history.interner.get("bob@acme.com")
+        assert not history.can_assign_ids(alice, bob)
+        assert history.can_assign_ids(bob, alice)
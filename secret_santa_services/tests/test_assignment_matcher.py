@@ -0,0 +1,70 @@
+import itertools
+import random
+from assignment_matcher import AssignmentMatcher
+
+
+def brute_force_feasible(size, forbidden):
+    return any(
+        all((g, r) not in forbidden for g, r in enumerate(perm))
+        for perm in itertools.permutations(range(size))
+    )
+
+
+class TestAssignmentMatcher:
+    """Test cases for AssignmentMatcher"""
+
+    def test_finds_perfect_matching(self):
+        """Test a derangement is found when self-gifting is the only rule"""
+        matcher = AssignmentMatcher(50, lambda g, r: g != r)
+        result = matcher.solve()
+        assert result.feasible
+        assert sorted(result.receivers) == list(range(50))
+        assert all(g != r for g, r in enumerate(result.receivers))
+
+    def test_keeps_valid_initial_pairs(self):
+        """Test that a partial assignment is completed, not rebuilt"""
+        initial = [1, 0, 2, 3]
+        matcher = AssignmentMatcher(4, lambda g, r: g != r)
+        result = matcher.solve(initial, unmatched={2, 3})
+        assert result.receivers[:2] == [1, 0]
+        assert result.receivers[2:] == [3, 2]
+
+    def test_single_employee_is_infeasible(self):
+        """Test that one giver with no allowed receiver is the blocking set"""
+        result = AssignmentMatcher(1, lambda g, r: g != r).solve()
+        assert not result.feasible
+        assert result.blocking_givers == [0]
+
+    def test_hall_violator(self):
+        """Test that the blocking set really has too few allowed receivers"""
+        # Givers 0-2 may only give to receivers 3 and 4
+        def allowed(g, r):
+            if g < 3:
+                return r in (3, 4)
+            return g != r
+        result = AssignmentMatcher(6, allowed).solve()
+        assert not result.feasible
+        blocking = result.blocking_givers
+        reachable = {r for g in blocking for r in range(6) if allowed(g, r)}
+        assert len(reachable) < len(blocking)
+
+    def test_matches_brute_force(self):
+        """Test feasibility against exhaustive search on random small graphs"""
+        rng = random.Random(7)
+        for _ in range(300):
+            size = rng.randint(1, 6)
+            forbidden = {(g, g) for g in range(size)}
+            forbidden.update(
+                (rng.randrange(size), rng.randrange(size)) for _ in range(rng.randint(0, size * 2))
+            )
+            allowed = lambda g, r: (g, r) not in forbidden
+            initial = list(range(size))
+            rng.shuffle(initial)
+            result = AssignmentMatcher(size, allowed).solve(initial)
+            assert result.feasible == brute_force_feasible(size, forbidden)
+            if result.feasible:
+                assert sorted(result.receivers) == list(range(size))
+                assert all(allowed(g, r) for g, r in enumerate(result.receivers))
+            else:
+                reachable = {r for g in result.blocking_givers for r in range(size) if allowed(g, r)}
+                assert len(reachable) < len(result.blocking_givers)
@@ -0,0 +1,64 @@
+import pytest
+from bulk_validator import BulkValidator
+from csv_handler import CSVHandler
+from exceptions import InvalidEmployeeDataException
+
+
+class TestBulkValidator:
+    """Test cases for BulkValidator"""
+
+    def test_valid_columns(self):
+        """Test that valid columns become employees with stripped names"""
+        employees = BulkValidator.validate_employees(
+            [2, 3], ["  Alice ", "Bob"], ["alice@ACME.com", "bob@acme.com"]
+        )
+        assert [e.name for e in employees] == ["Alice", "Bob"]
+        assert employees[0].email == "alice@acme.com"
+
+    def test_every_invalid_row_reported(self):
+        """Test that all bad rows are listed with their line numbers"""
+        with pytest.raises(InvalidEmployeeDataException) as exc_info:
+            BulkValidator.validate_employees(
+                [2, 3, 4], ["Alice", " ", "Carol"], ["alice@acme.com", "bob@acme.com", "carol"]
+            )
+        message = str(exc_info.value)
+        assert message.startswith("2 invalid employee row(s)")
+        assert "line 3: employee name cannot be empty" in message
+        assert "line 4: invalid email 'carol'" in message
+
+    def test_unusual_addresses_fall_back_to_email_str(self):
+        """Test that addresses outside the fast pattern are still accepted"""
+        normalized, invalid = BulkValidator.check_emails(["jöhn@acme.com", "a@b.c", "nope"])
+        assert invalid == [2]
+        assert normalized[0] == "jöhn@acme.com"
+
+    def test_agrees_with_email_str(self):
+        """Test that the fast path accepts and normalises exactly what EmailStr does"""
+        from pydantic import EmailStr, TypeAdapter, ValidationError
+        
+        adapter = TypeAdapter(EmailStr)
+        addresses = [
+            "alice@acme.com", "Alice@ACME.Com", "a.b+c@sub.acme.co.uk", "a@b.test", "x@foo.localhost",
+            "a@b.invalid", "a@example.onion", "a@b.local", "a@in-addr.arpa", "a@test.acme.com", "a@b.example",
+            "a@b.internal", "x" * 65 + "@acme.com", "a@" + "b" * 63 + "." + "c" * 63 + "." + "d" * 63 + ".com",
+            "a..b@acme.com", "a@exa_mple.com", "a@-acme.com", "a@acme.c0m", "a@acme", "@acme.com",
+            "a@xn--bcher-kva.com", "a@mail.XN--BCHER-KVA.com", "a@xn--zz.com",
+        ]
+        normalized, invalid = BulkValidator.check_emails(addresses)
+        for i, address in enumerate(addresses):
+            try:
+                expected = adapter.validate_python(address)
+            except ValidationError:
+                expected = None
+            assert (None if i in invalid else normalized[i]) == expected, address
+
+    def test_csv_reports_all_invalid_rows(self):
+        """Test the CSV path reports every invalid row in one error"""
+        csv_content = (
+            "Employee_Name,Employee_EmailID\n"
+            "Alice,alice@acme.com\n"
+            "Bob,not-an-email\n"
+            ",carol@acme.com\n"
+        )
+        with pytest.raises(InvalidEmployeeDataException, match="line 3.*line 4"):
+            CSVHandler.parse_employees(csv_content)
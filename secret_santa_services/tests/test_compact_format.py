@@ -0,0 +1,60 @@
+import gzip
+import random
+import pytest
+from models import Employee
+from employee_repository import EmployeeRepository
+from assignment_history import AssignmentHistory
+from secret_santa_assigner import SecretSantaAssigner
+from compact_roster import IndexedAssignments
+import compact_format
+
+
+def make_indexed(count):
+    employees = [Employee(name=f"Émployee {i}", email=f"employee{i}@acme.com") for i in range(count)]
+    assigner = SecretSantaAssigner(EmployeeRepository(employees), AssignmentHistory(), random.Random(1))
+    return assigner.assign_indexed()
+
+
+class TestCompactFormat:
+    """Test cases for the compact result encodings"""
+
+    def test_roster_round_trip(self):
+        """Test that decode_roster() restores names, emails and pairs"""
+        indexed = make_indexed(50)
+        decoded = compact_format.decode_roster(compact_format.encode_roster(indexed))
+        assert list(decoded.rows()) == list(indexed.rows())
+
+    def test_roster_rejects_bad_data(self):
+        """Test that foreign or truncated data is refused"""
+        data = compact_format.encode_roster(make_indexed(5))
+        with pytest.raises(ValueError):
+            compact_format.decode_roster(b'XXXX' + data[4:])
+        with pytest.raises(ValueError):
+            compact_format.decode_roster(data[:-3])
+
+    def test_indexed_matches_materialized(self):
+        """Test that IndexedAssignments round-trips through Assignment models"""
+        indexed = make_indexed(20)
+        assignments = indexed.materialize()
+        assert [(a.employee_email, a.secret_child_email) for a in assignments] == list(indexed.pairs())
+        assert list(IndexedAssignments.from_assignments(assignments).rows()) == list(indexed.rows())
+
+    def test_negotiate(self):
+        """Test media type selection from the Accept header"""
+        offered = ["application/json", compact_format.COMPACT_JSON, compact_format.ROSTER_BINARY]
+        assert compact_format.negotiate(None, offered) == "application/json"
+        assert compact_format.negotiate("*/*", offered) == "application/json"
+        assert compact_format.negotiate("text/html", offered) == "application/json"
+        assert compact_format.negotiate(compact_format.ROSTER_BINARY, offered) == compact_format.ROSTER_BINARY
+        accept = f"application/json;q=0.5, {compact_format.COMPACT_JSON}"
+        assert compact_format.negotiate(accept, offered) == compact_format.COMPACT_JSON
+
+    def test_compress_only_when_accepted_and_large(self):
+        """Test that gzip is applied only when accepted and worth it"""
+        body = b'x' * 4096
+        assert compact_format.compress(body, None) == (body, None)
+        assert compact_format.compress(b'small', 'gzip') == (b'small', None)
+        assert compact_format.compress(body, 'gzip;q=0') == (body, None)
+        compressed, encoding = compact_format.compress(body, 'br, gzip')
+        assert encoding == 'gzip'
+        assert gzip.decompress(compressed) == body
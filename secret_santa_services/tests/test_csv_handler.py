@@ -57,3 +57,55 @@ class TestCSVHandler:
         
         assert len(assignments) == len(re_parsed)
         assert assignments[0].employee_name == re_parsed[0].employee_name
+
+    def test_parse_employees_from_byte_chunks(self, sample_csv_employees):
+        """Test that a chunked byte stream parses like the whole text"""
+        data = ("\ufeff" + sample_csv_employees.replace("Bob Jones", "Zoë Jones")).encode('utf-8')
+        chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+        employees = CSVHandler.parse_employees(iter(chunks))
+        assert len(employees) == 3
+        assert employees[0].name == "Alice Smith"
+        assert employees[1].name == "Zoë Jones"
+
+    def test_iter_employees_is_lazy(self):
+        """Test that rows are parsed as chunks arrive"""
+        consumed = []
+
+        def chunks():
+            for chunk in (b"Employee_Name,Employee_EmailID\n", b"Ann,ann@acme.com\n", b"Ben,ben@acme.com\n"):
+                consumed.append(chunk)
+                yield chunk
+
+        employees = CSVHandler.iter_employees(chunks())
+        assert next(employees).name == "Ann"
+        assert len(consumed) == 2
+
+    def test_parse_csv_short_row(self):
+        """Test that a row missing values reports its line number"""
+        csv_content = "Employee_Name,Employee_EmailID\nJohn Doe,john@acme.com\nJane Doe\n"
+        with pytest.raises(InvalidEmployeeDataException, match="line 3"):
+            CSVHandler.parse_employees(csv_content)
+
+    def test_iter_csv_chunks(self, sample_assignments):
+        """Test that streamed chunks respect the size and join to generate_csv"""
+        chunks = list(CSVHandler.iter_csv(sample_assignments * 50, chunk_size=256))
+        assert len(chunks) > 1
+        assert all(len(chunk) < 256 + 100 for chunk in chunks)
+        assert b"".join(chunks).decode('utf-8') == CSVHandler.generate_csv(sample_assignments * 50)
+
+    def test_history_pairs_read_only_email_columns(self):
+        """Test that history pairs need only the email columns, normalised and deduplicated"""
+        csv_content = (
+            "Employee_EmailID,Secret_Child_EmailID,Notes\n"
+            "ann@ACME.com,ben@acme.com,x\n"
+            "ann@acme.com,ben@acme.com,duplicate\n"
+            "ben@acme.com,ann@acme.com,y\n"
+        )
+        pairs = CSVHandler.parse_history_pairs(csv_content)
+        assert pairs == [("ann@acme.com", "ben@acme.com"), ("ben@acme.com", "ann@acme.com")]
+
+    def test_history_pairs_report_every_invalid_row(self, sample_csv_assignments):
+        """Test that invalid history emails are reported with their line numbers"""
+        csv_content = sample_csv_assignments + "Bad,not-an-email,Ann,ann@acme.com\nWorse,x@acme.com,Y,nope\n"
+        with pytest.raises(InvalidEmployeeDataException, match="2 invalid assignment row\\(s\\)"):
+            CSVHandler.parse_history_pairs(csv_content)
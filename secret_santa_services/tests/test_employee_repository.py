@@ -0,0 +1,51 @@
+import pytest
+from models import Employee
+from employee_repository import EmployeeRepository
+from exceptions import InsufficientEmployeesException, DuplicateEmailException
+
+
+class TestEmployeeRepository:
+    """Test cases for EmployeeRepository"""
+
+    def test_valid_roster(self):
+        """Test lookups on a valid roster"""
+        repository = EmployeeRepository([
+            Employee(name="Alice", email="alice@acme.com"),
+            Employee(name="Bob", email="bob@acme.com")
+        ])
+        assert repository.get_employee_count() == 2
+        assert repository.find_by_email("bob@acme.com").name == "Bob"
+        assert repository.find_by_email("carol@acme.com") is None
+
+    def test_insufficient_employees(self):
+        """Test that a single employee is rejected"""
+        with pytest.raises(InsufficientEmployeesException):
+            EmployeeRepository([Employee(name="Alice", email="alice@acme.com")])
+
+    def test_all_duplicates_reported_together(self):
+        """Test that exact and case-only duplicates are reported in one error"""
+        employees = [
+            Employee(name="Alice", email="alice@acme.com"),
+            Employee(name="Alice 2", email="alice@acme.com"),
+            Employee(name="Bob", email="bob@acme.com"),
+            Employee(name="Bob 2", email="BOB@acme.com"),
+            Employee(name="Carol", email="carol@acme.com")
+        ]
+        with pytest.raises(DuplicateEmailException) as exc_info:
+            EmployeeRepository(employees)
+        message = str(exc_info.value)
+        assert "alice@acme.com" in message
+        assert "bob@acme.com / BOB@acme.com" in message
+        assert "carol@acme.com" not in message
+
+    def test_name_groups(self):
+        """Test that employees sharing a name share a name-group id"""
+        repository = EmployeeRepository([
+            Employee(name="Sam", email="sam1@acme.com"),
+            Employee(name="Alex", email="alex@acme.com"),
+            Employee(name="Sam", email="sam2@acme.com")
+        ])
+        groups = repository.name_group_ids
+        assert groups[0] == groups[2] != groups[1]
+        assert repository.get_name_group_count() == 2
+        assert repository.get_duplicate_names() == {"Sam": ["sam1@acme.com", "sam2@acme.com"]}
@@ -0,0 +1,52 @@
+import pytest
+from pydantic import ValidationError
+from models import AssignmentRequest
+import fast_json
+
+
+def body(**fields):
+    return fast_json.dumps(fields)
+
+
+class TestFastJson:
+    """Test cases for the fast /assign request parser"""
+
+    def test_parse_matches_model_validation(self):
+        """Test that the column-wise parse gives what AssignmentRequest does"""
+        data = {
+            "current_employees": [
+                {"name": "  Alice ", "email": "alice@ACME.com", "manager_email": "bob@acme.com"},
+                {"name": "Bob", "email": "bob@acme.com", "department": "Sales", "office": None}
+            ],
+            "previous_assignments": [
+                {"employee_name": "Alice", "employee_email": "alice@acme.com",
+                 "secret_child_name": "Bob", "secret_child_email": "bob@acme.com"}
+            ],
+            "previous_years": {"2022": []},
+            "lookback_years": 2,
+            "seed": 5,
+            "optimize": {"avoid_manager": 3}
+        }
+        parsed = fast_json.parse_assignment_request(fast_json.dumps(data))
+        assert parsed.model_dump() == AssignmentRequest.model_validate(data).model_dump()
+
+    def test_unusual_payloads_fall_back_to_the_model(self):
+        """Test that payloads outside the fast path get the model's own errors"""
+        with pytest.raises(ValidationError):
+            fast_json.parse_assignment_request(body(current_employees=[{"name": "", "email": "a@acme.com"}]))
+        with pytest.raises(ValidationError):
+            fast_json.parse_assignment_request(body(current_employees=[{"name": 5, "email": "a@acme.com"}]))
+        with pytest.raises(ValidationError):
+            fast_json.parse_assignment_request(
+                body(current_employees=[{"name": "A", "email": "a@acme.com", "manager_email": ""}])
+            )
+        with pytest.raises(ValidationError):
+            fast_json.parse_assignment_request(body(seed=1))
+        with pytest.raises(ValidationError):
+            fast_json.parse_assignment_request(b'[]')
+
+    def test_invalid_json(self):
+        """Test that a body that is not JSON raises ValueError"""
+        with pytest.raises(ValueError) as error:
+            fast_json.parse_assignment_request(b'{"current_employees": [')
+        assert fast_json.validation_errors(error.value)[0]["type"] == "json_invalid"
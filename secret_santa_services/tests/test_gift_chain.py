@@ -0,0 +1,95 @@
+import random
+import pytest
+from models import Employee, OptimizationSettings
+from employee_repository import EmployeeRepository
+from assignment_history import AssignmentHistory
+from secret_santa_assigner import SecretSantaAssigner
+from exceptions import AssignmentFailedException, InfeasibleAssignmentException
+
+
+def assert_single_cycle(assignments):
+    receivers = {a.employee_email: a.secret_child_email for a in assignments}
+    start = next(iter(receivers))
+    current, length = receivers[start], 1
+    while current != start:
+        current, length = receivers[current], length + 1
+    assert length == len(assignments)
+
+
+def chain_draw(employees, history=None, seed=3, optimize=None):
+    history = history or AssignmentHistory()
+    assigner = SecretSantaAssigner(
+        EmployeeRepository(employees), history, random.Random(seed), optimize, single_cycle=True
+    )
+    return assigner, assigner.assign()
+
+
+class TestGiftChain:
+    """Test cases for single-cycle draws"""
+
+    def test_single_cycle_respects_rules(self, make_employees, assert_valid):
+        """Test a large roster with duplicate names and last year's chain excluded"""
+        employees = make_employees(3000, name_groups=60)
+        history = AssignmentHistory.from_pairs(
+            (employees[i].email, employees[(i + 1) % 3000].email) for i in range(3000)
+        )
+        assigner, assignments = chain_draw(employees, history)
+        assert_valid(assignments, history, employees)
+        assert_single_cycle(assignments)
+        assert assigner.attempts_used == 1
+        assert assigner.repairs > 0
+
+    @pytest.mark.parametrize("size", [501, 4000])
+    def test_half_the_roster_sharing_one_name(self, size, assert_valid):
+        """Test a roster where the only chains alternate between one shared name and the rest"""
+        employees = [
+            Employee(name="Alex Smith" if i % 2 else f"Employee {i}", email=f"employee{i}@acme.com")
+            for i in range(size)
+        ]
+        assigner, assignments = chain_draw(employees)
+        assert_valid(assignments, AssignmentHistory(), employees)
+        assert_single_cycle(assignments)
+        assert assigner.attempts_used == 1
+
+    def test_seeded_chain_is_reproducible(self, make_employees):
+        """Test that the same seed gives the same chain"""
+        employees = make_employees(50)
+        first = chain_draw(employees, seed=9)[1]
+        second = chain_draw(list(reversed(employees)), seed=9)[1]
+        assert {(a.employee_email, a.secret_child_email) for a in first} == \
+            {(a.employee_email, a.secret_child_email) for a in second}
+
+    def test_two_employees(self, make_employees):
+        """Test the smallest chain"""
+        employees = make_employees(2)
+        assignments = chain_draw(employees)[1]
+        assert_single_cycle(assignments)
+
+    def test_optimised_chain_stays_single_cycle(self):
+        """Test that the preference search keeps one cycle"""
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@acme.com", department="A" if i < 20 else "B")
+            for i in range(40)
+        ]
+        settings = OptimizationSettings(cross_office=0, avoid_manager=0)
+        assigner, assignments = chain_draw(employees, optimize=settings)
+        assert_single_cycle(assignments)
+        department = {emp.email: emp.department for emp in employees}
+        assert assigner.optimizer.iterations_run > 0
+        assert assigner.score == sum(
+            department[a.employee_email] != department[a.secret_child_email] for a in assignments
+        )
+        assert assigner.score >= 30
+
+    def test_no_single_cycle(self, make_employees, assert_valid):
+        """Test a roster whose only valid draws are two separate loops"""
+        employees = make_employees(4)
+        emails = [emp.email for emp in employees]
+        history = AssignmentHistory.from_pairs(
+            (emails[g], emails[r]) for g in range(4) for r in range(4) if g // 2 != r // 2
+        )
+        assert_valid(SecretSantaAssigner(EmployeeRepository(employees), history).assign(), history, employees)
+        with pytest.raises(AssignmentFailedException, match="No single gift chain") as failure:
+            chain_draw(employees, history)
+        # Giving up on the chain is not a proof that none exists
+        assert not isinstance(failure.value, InfeasibleAssignmentException)
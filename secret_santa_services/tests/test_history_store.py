@@ -0,0 +1,128 @@
+import asyncio
+import pickle
+import time
+import pytest
+from models import Employee
+from assignment_executor import AssignmentExecutor
+from exceptions import AssignmentTimeoutException
+from history_store import HistoryStore
+from secret_santa_service import SecretSantaService
+
+
+class TestHistoryStore:
+    """Test cases for HistoryStore"""
+
+    def test_save_and_load(self, tmp_path, pair):
+        """Test that draws round-trip per year, newest first"""
+        store = HistoryStore(str(tmp_path / "history.db"))
+        store.save_draw(2022, [pair("alice", "bob")])
+        store.save_draw(2023, [pair("alice", "carol")])
+        assert store.years() == [2023, 2022]
+        assert store.load_pairs() == {
+            2023: [("alice@acme.com", "carol@acme.com")],
+            2022: [("alice@acme.com", "bob@acme.com")]
+        }
+        assert store.previous_children("alice@acme.com") == [
+            (2023, "carol@acme.com"), (2022, "bob@acme.com")
+        ]
+        assert store.previous_santas("bob@acme.com") == [(2022, "alice@acme.com")]
+
+    def test_load_window(self, tmp_path, pair):
+        """Test that only years before the draw and inside the window are read"""
+        store = HistoryStore(str(tmp_path / "history.db"))
+        for year in (2020, 2021, 2022, 2023):
+            store.save_draw(year, [pair("alice", f"child{year}")])
+        assert sorted(store.load_pairs(before_year=2023, lookback_years=2)) == [2021, 2022]
+
+    def test_save_replaces_year(self, tmp_path, pair):
+        """Test that redrawing a year overwrites it"""
+        store = HistoryStore(str(tmp_path / "history.db"))
+        store.save_draw(2023, [pair("alice", "bob")])
+        store.save_draw(2023, [pair("alice", "carol")])
+        assert store.load_pairs() == {2023: [("alice@acme.com", "carol@acme.com")]}
+
+    def test_pickles_as_path(self, tmp_path, pair):
+        """Test that a store can be sent to a worker process"""
+        store = HistoryStore(str(tmp_path / "history.db"))
+        store.save_draw(2023, [pair("alice", "bob")])
+        copy = pickle.loads(pickle.dumps(store))
+        assert copy.years() == [2023]
+
+    def test_service_commits_and_excludes_draws(self, tmp_path):
+        """Test that each year's draw is stored and excluded the next year"""
+        store = HistoryStore(str(tmp_path / "history.db"))
+        service = SecretSantaService(AssignmentExecutor('inline'), store)
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@acme.com") for i in range(8)
+        ]
+        seen = {}
+        for year in (2021, 2022, 2023):
+            for a in service.generate_assignments(employees, seed=year, year=year):
+                assert a.secret_child_email not in seen.get(a.employee_email, set())
+                seen.setdefault(a.employee_email, set()).add(a.secret_child_email)
+        assert store.years() == [2023, 2022, 2021]
+
+    def test_last_year_passed_and_stored_counts_once(self, tmp_path, pair):
+        """Test that last year's draw in both the request and the store takes one lookback year"""
+        store = HistoryStore(str(tmp_path / "history.db"))
+        store.save_draw(2022, [pair("alice", "carol")])
+        store.save_draw(2021, [pair("alice", "dave")])
+        service = SecretSantaService(AssignmentExecutor('inline'), store)
+        
+        history = service._load_history([pair("alice", "bob")], None, 2, 2023)
+        assert sorted(history.get_excluded_children("alice@acme.com")) == [
+            "bob@acme.com", "carol@acme.com", "dave@acme.com"
+        ]
+        history = service._load_history(
+            [pair("alice", "bob")], {2022: [pair("alice", "erin")]}, 2, 2023
+        )
+        assert sorted(history.get_excluded_children("alice@acme.com")) == [
+            "bob@acme.com", "dave@acme.com", "erin@acme.com"
+        ]
+
+    def test_timed_out_draw_is_not_committed(self, tmp_path):
+        """Test that draws finishing after their request timed out leave the store alone"""
+        class SlowService(SecretSantaService):
+            def _generate_draw(self, *args):
+                time.sleep(0.2)
+                return super()._generate_draw(*args)
+            
+            def _reassign(self, *args):
+                time.sleep(0.2)
+                return super()._reassign(*args)
+        
+        store = HistoryStore(str(tmp_path / "history.db"))
+        service = SlowService(AssignmentExecutor('thread', timeout=0.05), store)
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@acme.com") for i in range(8)
+        ]
+        with pytest.raises(AssignmentTimeoutException):
+            asyncio.run(service.generate_draw_async(employees, year=2023))
+        service.executor.shutdown(wait=True)
+        with pytest.raises(AssignmentTimeoutException):
+            asyncio.run(service.generate_batch_async({"": {"employees": employees, "year": 2023}}))
+        service.executor.shutdown(wait=True)
+        assert store.years() == []
+        
+        service.executor.timeout = None
+        draw = asyncio.run(service.generate_draw_async(employees, year=2023))
+        outcomes = asyncio.run(service.generate_batch_async({"": {"employees": employees, "year": 2022}}))
+        service.executor.shutdown()
+        assert not isinstance(outcomes[""], Exception)
+        assert store.years() == [2023, 2022]
+        
+        stored = store.load_pairs(before_year=2024, lookback_years=1)
+        service.executor.timeout = 0.05
+        with pytest.raises(AssignmentTimeoutException):
+            asyncio.run(service.reassign_async(draw.assignments, left=["employee0@acme.com"], year=2023))
+        service.executor.shutdown(wait=True)
+        assert store.load_pairs(before_year=2024, lookback_years=1) == stored
+
+    def test_groups_are_isolated(self, tmp_path, pair):
+        """Test that each group keeps its own draws"""
+        store = HistoryStore(str(tmp_path / "history.db"))
+        store.save_draw(2023, [pair("alice", "bob")], group="london")
+        store.save_draw(2023, [pair("carol", "dave")], group="paris")
+        assert store.load_pairs(group="london") == {2023: [("alice@acme.com", "bob@acme.com")]}
+        assert store.load_pairs(group="paris") == {2023: [("carol@acme.com", "dave@acme.com")]}
+        assert store.years() == []
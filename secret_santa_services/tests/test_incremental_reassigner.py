@@ -0,0 +1,97 @@
+import random
+import pytest
+from models import Employee, Assignment
+from assignment_history import AssignmentHistory
+from incremental_reassigner import IncrementalReassigner
+from exceptions import InvalidEmployeeDataException
+
+
+def chain(employees):
+    """A single gift chain employees[0] -> employees[1] -> ... -> employees[0]"""
+    return [
+        Assignment(
+            employee_name=giver.name,
+            employee_email=giver.email,
+            secret_child_name=receiver.name,
+            secret_child_email=receiver.email
+        )
+        for giver, receiver in zip(employees, employees[1:] + employees[:1])
+    ]
+
+
+EMPLOYEES = [Employee(name=f"Employee {i}", email=f"employee{i}@acme.com") for i in range(50)]
+
+
+class TestIncrementalReassigner:
+    """Test cases for IncrementalReassigner"""
+
+    def test_join_touches_one_link(self, assert_valid):
+        """Test that a joiner is spliced into a single existing link"""
+        history = AssignmentHistory()
+        reassigner = IncrementalReassigner(chain(EMPLOYEES), history, random.Random(1))
+        newcomer = Employee(name="Newcomer", email="newcomer@acme.com")
+        result = reassigner.apply(joined=[newcomer])
+        assert_valid(result, history)
+        assert len(result) == 51
+        assert len(reassigner.changed) == 2
+        assert "newcomer@acme.com" in reassigner.changed
+
+    def test_leave_bridges_the_gap(self, assert_valid):
+        """Test that a leaver's Santa takes over their secret child"""
+        history = AssignmentHistory()
+        reassigner = IncrementalReassigner(chain(EMPLOYEES), history, random.Random(1))
+        result = reassigner.apply(left=["employee10@acme.com"])
+        assert_valid(result, history)
+        assert reassigner.changed == {"employee9@acme.com"}
+        santa = next(a for a in result if a.employee_email == "employee9@acme.com")
+        assert santa.secret_child_email == "employee11@acme.com"
+
+    def test_leave_swaps_when_bridge_is_forbidden(self, assert_valid):
+        """Test the two-link swap when the bridged pair breaks a rule"""
+        previous = chain([EMPLOYEES[9], EMPLOYEES[11]])
+        history = AssignmentHistory(previous)
+        reassigner = IncrementalReassigner(chain(EMPLOYEES), history, random.Random(1))
+        result = reassigner.apply(left=["employee10@acme.com"])
+        assert_valid(result, history)
+        assert len(reassigner.changed) == 2
+
+    def test_leave_from_two_person_loop(self, assert_valid):
+        """Test removing someone whose Santa is also their secret child"""
+        assignments = chain(EMPLOYEES[:2]) + chain(EMPLOYEES[2:10])
+        history = AssignmentHistory()
+        result = IncrementalReassigner(assignments, history, random.Random(3)).apply(
+            left=["employee0@acme.com"]
+        )
+        assert_valid(result, history)
+        assert len(result) == 9
+
+    def test_joiners_added_before_leavers_removed(self, assert_valid):
+        """Test that all but one leaving while someone joins leaves a valid pair"""
+        history = AssignmentHistory()
+        newcomer = Employee(name="Newcomer", email="newcomer@acme.com")
+        result = IncrementalReassigner(chain(EMPLOYEES[:3]), history, random.Random(0)).apply(
+            joined=[newcomer], left=["employee0@acme.com", "employee1@acme.com"]
+        )
+        assert_valid(result, history)
+        assert {(a.employee_email, a.secret_child_email) for a in result} == {
+            ("employee2@acme.com", "newcomer@acme.com"), ("newcomer@acme.com", "employee2@acme.com")
+        }
+
+    def test_unknown_leaver_rejected(self):
+        """Test that leaving requires being in the draw"""
+        reassigner = IncrementalReassigner(chain(EMPLOYEES), AssignmentHistory())
+        with pytest.raises(InvalidEmployeeDataException):
+            reassigner.apply(left=["stranger@acme.com"])
+
+    def test_many_changes(self, assert_valid):
+        """Test a season of churn stays valid throughout"""
+        history = AssignmentHistory()
+        rng = random.Random(5)
+        assignments = chain(EMPLOYEES)
+        for round_number in range(20):
+            leaver = rng.choice(assignments).employee_email
+            joiner = Employee(name=f"Joiner {round_number}", email=f"joiner{round_number}@acme.com")
+            reassigner = IncrementalReassigner(assignments, history, rng)
+            assignments = reassigner.apply(joined=[joiner], left=[leaver])
+            assert_valid(assignments, history)
+            assert len(reassigner.changed) <= 4
@@ -0,0 +1,89 @@
+import io
+import os
+import time
+import pytest
+from models import Employee
+from assignment_executor import AssignmentExecutor
+from job_manager import Job, JobManager
+from secret_santa_service import SecretSantaService
+from exceptions import ServiceOverloadedException
+
+
+EMPLOYEES = [Employee(name=f"Employee {i}", email=f"employee{i}@acme.com") for i in range(10)]
+
+
+def wait_for(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.snapshot()
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = JobManager(SecretSantaService(executor=AssignmentExecutor('inline'), cache=None), str(tmp_path))
+    yield manager
+    manager.shutdown()
+
+
+class TestJobManager:
+    """Test cases for JobManager"""
+
+    def test_draw_job_writes_result(self, manager):
+        """Test that a finished job has its CSV on disk"""
+        job = manager.submit_draw(employees=EMPLOYEES, seed=3)
+        snapshot = wait_for(job)
+        assert snapshot["status"] == "succeeded"
+        assert snapshot["progress"] == 1.0
+        assert snapshot["total_assignments"] == 10
+        with open(job.result_path) as f:
+            assert len(f.read().strip().splitlines()) == 11
+
+    def test_csv_job_reports_stages(self, manager, sample_csv_employees, monkeypatch):
+        """Test that the job passes through every stage in order"""
+        stages = []
+        original = Job.advance
+        
+        def record(job, stage, progress=None):
+            if stage not in stages:
+                stages.append(stage)
+            original(job, stage, progress)
+        
+        monkeypatch.setattr(Job, "advance", record)
+        job = manager.submit_csv(io.BytesIO(sample_csv_employees.encode('utf-8')))
+        assert wait_for(job)["status"] == "succeeded"
+        assert stages == ["parse", "validate", "solve", "serialize"]
+
+    def test_failed_job_keeps_message(self, manager):
+        """Test that a failing draw is reported on the job"""
+        job = manager.submit_draw(employees=EMPLOYEES[:1])
+        snapshot = wait_for(job)
+        assert snapshot["status"] == "failed"
+        assert "At least 2 employees" in snapshot["message"]
+
+    def test_queue_limit(self, tmp_path):
+        """Test that a full queue is refused"""
+        manager = JobManager(SecretSantaService(executor=AssignmentExecutor('inline')), str(tmp_path), max_queue=1)
+        manager.workers = 0
+        manager.submit_draw(employees=EMPLOYEES)
+        with pytest.raises(ServiceOverloadedException):
+            manager.submit_draw(employees=EMPLOYEES)
+
+    def test_finished_jobs_expire(self, manager):
+        """Test that old finished jobs and their files are removed"""
+        job = manager.submit_draw(employees=EMPLOYEES)
+        wait_for(job)
+        manager.ttl_seconds = 0
+        job.finished_at -= 1
+        manager.submit_draw(employees=EMPLOYEES)
+        assert manager.get(job.job_id) is None
+
+    def test_shutdown_fails_queued_jobs(self):
+        """Test that shutdown does not wait for queued jobs and removes its temporary directory"""
+        manager = JobManager(SecretSantaService(executor=AssignmentExecutor('inline')), max_queue=2)
+        manager.workers = 0
+        queued = [manager.submit_draw(employees=EMPLOYEES) for _ in range(2)]
+        directory = manager.directory
+        manager.shutdown()
+        assert [job.snapshot()["status"] for job in queued] == ["failed", "failed"]
+        assert not os.path.exists(directory)
@@ -0,0 +1,52 @@
+from models import Employee
+from metrics import MetricsRegistry, Histogram, STAGE_SECONDS, ASSIGNMENT_ATTEMPTS, span
+from assignment_executor import AssignmentExecutor
+from secret_santa_service import SecretSantaService
+
+
+class TestMetrics:
+    """Test cases for the metrics module"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test Prometheus histogram rendering"""
+        histogram = Histogram("test_seconds", "Test", (1, 5), ("stage",))
+        histogram.observe(0.5, "a")
+        histogram.observe(3, "a")
+        histogram.observe(10, "a")
+        lines = list(histogram.samples())
+        assert 'test_seconds_bucket{stage="a",le="1"} 1' in lines
+        assert 'test_seconds_bucket{stage="a",le="5"} 2' in lines
+        assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+        assert 'test_seconds_sum{stage="a"} 13.5' in lines
+        assert 'test_seconds_count{stage="a"} 3' in lines
+
+    def test_registry_render(self):
+        """Test HELP/TYPE headers, counters and collectors"""
+        registry = MetricsRegistry()
+        counter = registry.counter("test_failures", "Failures", ("reason",))
+        counter.inc(2, 'bad "input"')
+        registry.add_collector(lambda: [("test_entries", "gauge", "Entries", 4)])
+        text = registry.render()
+        assert "# TYPE test_failures counter" in text
+        assert 'test_failures_total{reason="bad \\"input\\""} 2' in text
+        assert "# TYPE test_entries gauge\ntest_entries 4" in text
+
+    def test_span_records_stage(self):
+        """Test that a span is observed and stored in stats"""
+        stats = {}
+        before = STAGE_SECONDS.count("test_stage")
+        with span("test_stage", stats):
+            pass
+        assert STAGE_SECONDS.count("test_stage") == before + 1
+        assert stats["test_stage"] >= 0
+
+    def test_draw_collects_stats(self):
+        """Test that a draw records its stages and attempt count"""
+        service = SecretSantaService(executor=AssignmentExecutor('inline'), cache=None)
+        employees = [Employee(name=f"Employee {i}", email=f"employee{i}@acme.com") for i in range(6)]
+        before = ASSIGNMENT_ATTEMPTS.count()
+        draw = service.generate_draw(employees, seed=1)
+        assert ASSIGNMENT_ATTEMPTS.count() == before + 1
+        assert draw.stats["attempts"] in (1, 2)
+        assert draw.stats["employees"] == 6
+        assert {"validation", "history", "assignment"} <= set(draw.stats)
@@ -0,0 +1,68 @@
+import random
+from models import OptimizationSettings
+from employee_repository import EmployeeRepository
+from assignment_history import AssignmentHistory
+from secret_santa_assigner import SecretSantaAssigner
+from csv_handler import CSVHandler
+from secret_santa_service import SecretSantaService
+from assignment_executor import AssignmentExecutor
+
+
+def draw(employees, settings, seed=7):
+    assigner = SecretSantaAssigner(
+        EmployeeRepository(employees), AssignmentHistory(), random.Random(seed), settings
+    )
+    return assigner, assigner.assign()
+
+
+class TestPreferenceOptimizer:
+    """Test cases for PreferenceOptimizer"""
+
+    def test_reaches_every_preference_when_possible(self, make_employees):
+        """Test that every pair crosses departments and avoids the manager"""
+        employees = make_employees(20, org_chart=True)
+        assigner, assignments = draw(employees, OptimizationSettings(cross_office=0))
+        departments = {emp.email: emp.department for emp in employees}
+        managers = {emp.email: emp.manager_email for emp in employees}
+        assert all(departments[a.employee_email] != departments[a.secret_child_email] for a in assignments)
+        assert all(
+            managers[a.employee_email] != a.secret_child_email and managers[a.secret_child_email] != a.employee_email
+            for a in assignments
+        )
+        assert assigner.score == 20 * 3.0
+
+    def test_draw_stays_valid(self, make_employees):
+        """Test that the optimised draw is still a derangement"""
+        _, assignments = draw(make_employees(50, org_chart=True), OptimizationSettings())
+        assert sorted(a.secret_child_email for a in assignments) == sorted(a.employee_email for a in assignments)
+        assert all(a.employee_email != a.secret_child_email for a in assignments)
+
+    def test_seeded_optimisation_is_reproducible(self, make_employees):
+        """Test that the same seed gives the same optimised draw"""
+        employees = make_employees(30, org_chart=True)
+        first = [(a.employee_email, a.secret_child_email) for a in draw(employees, OptimizationSettings())[1]]
+        second = [(a.employee_email, a.secret_child_email) for a in draw(employees, OptimizationSettings())[1]]
+        assert first == second
+
+    def test_seeded_draw_ignores_time_budget(self, make_employees):
+        """Test that a seeded draw runs all its iterations, however short the time budget"""
+        employees = make_employees(200, org_chart=True)
+        settings = OptimizationSettings(iterations=50000, time_budget_ms=1)
+        first, second = (
+            SecretSantaService(AssignmentExecutor('inline')).generate_draw(employees, seed=5, optimize=settings)
+            for _ in range(2)
+        )
+        assert first.stats['optimization_truncated'] == 0
+        assert first.stats['optimization_iterations'] == 50000
+        assert first.digest == second.digest
+
+    def test_csv_preference_columns(self):
+        """Test that the optional preference columns are read from CSV"""
+        csv_content = (
+            "Employee_Name,Employee_EmailID,Department,Manager_EmailID\n"
+            "Ann,ann@acme.com,Sales,\n"
+            "Ben,ben@acme.com,,ann@acme.com\n"
+        )
+        ann, ben = CSVHandler.parse_employees(csv_content)
+        assert (ann.department, ann.office, ann.manager_email) == ("Sales", None, None)
+        assert (ben.department, ben.manager_email) == (None, "ann@acme.com")
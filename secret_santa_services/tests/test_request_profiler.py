@@ -0,0 +1,54 @@
+import asyncio
+import marshal
+import pytest
+from models import Employee
+from assignment_executor import AssignmentExecutor
+from exceptions import ProfilingNotAllowedException
+from request_profiler import RequestProfiler, run_profiled
+from secret_santa_service import SecretSantaService
+
+
+class TestRequestProfiler:
+    """Test cases for RequestProfiler"""
+
+    def test_run_profiled_summary(self):
+        """Test that the report names the profiled function"""
+        result, report = run_profiled(sorted, [3, 1, 2])
+        assert result == [1, 2, 3]
+        assert "function calls" in report.summary
+        assert isinstance(marshal.loads(report.data), dict)
+
+    def test_disabled_by_default(self):
+        """Test that nothing is profiled and tokens are refused without configuration"""
+        profiler = RequestProfiler()
+        assert not profiler.should_profile()
+        with pytest.raises(ProfilingNotAllowedException):
+            profiler.should_profile("anything")
+
+    def test_token_guard(self):
+        """Test that only the configured token enables profiling"""
+        profiler = RequestProfiler(token="secret")
+        assert profiler.should_profile("secret")
+        with pytest.raises(ProfilingNotAllowedException):
+            profiler.should_profile("wrong")
+
+    def test_sampling(self):
+        """Test that a sample rate of 1 profiles every request"""
+        assert RequestProfiler(sample_rate=1.0).should_profile()
+
+    def test_record_saves_artifact(self, tmp_path):
+        """Test that reports are saved and can be found by id"""
+        profiler = RequestProfiler(directory=str(tmp_path))
+        _, report = run_profiled(sum, [1, 2])
+        path = profiler.record(report, "test")
+        assert profiler.path_for(report.profile_id) == path
+        assert profiler.path_for("../etc/passwd") is None
+
+    def test_profile_draw_bypasses_cache(self):
+        """Test that a profiled draw is a real solve with the same result"""
+        service = SecretSantaService(executor=AssignmentExecutor('inline'))
+        employees = [Employee(name=f"Employee {i}", email=f"employee{i}@acme.com") for i in range(6)]
+        draw = service.generate_draw(employees, seed=5)
+        profiled, report = asyncio.run(service.profile_draw_async(employees, seed=5))
+        assert profiled.digest == draw.digest
+        assert "assign" in report.summary
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import pytest
+from models import Employee
+from assignment_executor import AssignmentExecutor
+from history_store import HistoryStore
+from result_cache import ResultCache, draw_fingerprint
+from secret_santa_service import SecretSantaService
+
+
+EMPLOYEES = [Employee(name=f"Employee {i}", email=f"employee{i}@acme.com") for i in range(10)]
+
+
+class TestResultCache:
+    """Test cases for ResultCache"""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted"""
+        cache = ResultCache()
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry goes first"""
+        cache = ResultCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats()["evictions"] == 1
+
+    def test_weight_limit(self):
+        """Test that total weight is bounded and oversized entries are skipped"""
+        cache = ResultCache(max_weight=10)
+        cache.put("a", 1, weight=6)
+        cache.put("b", 2, weight=6)
+        cache.put("huge", 3, weight=11)
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+        assert cache.get("huge") is None
+
+    def test_ttl(self):
+        """Test that entries expire"""
+        cache = ResultCache(ttl_seconds=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+    def test_fingerprint_ignores_order(self):
+        """Test that the roster order does not change the fingerprint"""
+        args = (None, None, None, 7, 1, 2024, '')
+        assert draw_fingerprint(EMPLOYEES, *args) == draw_fingerprint(list(reversed(EMPLOYEES)), *args)
+        assert draw_fingerprint(EMPLOYEES, *args) != draw_fingerprint(EMPLOYEES[1:], *args)
+
+    @pytest.mark.parametrize("mode", ["inline", "process"])
+    def test_service_returns_cached_draw(self, mode):
+        """Test that an identical unseeded retry gets the same draw"""
+        service = SecretSantaService(AssignmentExecutor(mode, max_workers=1), cache=ResultCache())
+        first = asyncio.run(service.generate_draw_async(EMPLOYEES))
+        second = asyncio.run(service.generate_draw_async(list(reversed(EMPLOYEES))))
+        service.executor.shutdown()
+        assert second.digest == first.digest
+        assert service.cache.stats()["hits"] == 1
+
+    def test_history_store_bypasses_cache(self, tmp_path):
+        """Test that a repeated request sees draws committed to the store since"""
+        service = SecretSantaService(
+            AssignmentExecutor('inline'), HistoryStore(str(tmp_path / "history.db")), ResultCache()
+        )
+        employees = EMPLOYEES[:3]
+        service.generate_draw(employees, seed=5, year=2026)
+        last_year = service.generate_draw(employees, seed=7, year=2025)
+        repeated = service.generate_draw(employees, seed=5, year=2026)
+        
+        pairs = lambda draw: {(a.employee_email, a.secret_child_email) for a in draw.assignments}
+        assert not pairs(repeated) & pairs(last_year)
+        assert service.cache.stats()["hits"] == 0
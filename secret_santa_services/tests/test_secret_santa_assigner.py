@@ -0,0 +1,73 @@
+import pytest
+from models import Employee, Assignment
+from employee_repository import EmployeeRepository
+from assignment_history import AssignmentHistory
+from secret_santa_assigner import SecretSantaAssigner
+from exceptions import InfeasibleAssignmentException
+
+
+class TestSecretSantaAssigner:
+    """Test cases for SecretSantaAssigner"""
+
+    def test_two_employees(self, make_employees, assert_valid):
+        """Test the smallest possible draw"""
+        employees = make_employees(2)
+        history = AssignmentHistory()
+        assignments = SecretSantaAssigner(EmployeeRepository(employees), history).assign()
+        assert_valid(assignments, history, employees)
+
+    def test_large_roster_with_duplicate_names(self, make_employees, assert_valid):
+        """Test that many same-name conflicts are repaired in a single shuffle"""
+        employees = make_employees(2000, name_groups=50)
+        history = AssignmentHistory()
+        assigner = SecretSantaAssigner(EmployeeRepository(employees), history)
+        assignments = assigner.assign()
+        assert_valid(assignments, history, employees)
+        assert assigner.attempts_used == 1
+
+    def test_previous_year_respected(self, make_employees, assert_valid):
+        """Test that every previous-year pair is avoided"""
+        employees = make_employees(200)
+        previous = [
+            Assignment(
+                employee_name=employees[i].name,
+                employee_email=employees[i].email,
+                secret_child_name=employees[(i + 1) % 200].name,
+                secret_child_email=employees[(i + 1) % 200].email
+            )
+            for i in range(200)
+        ]
+        history = AssignmentHistory(previous)
+        assignments = SecretSantaAssigner(EmployeeRepository(employees), history).assign()
+        assert_valid(assignments, history, employees)
+
+    def test_only_one_valid_assignment(self, make_employees, assert_valid):
+        """Test a 3-person roster where last year leaves a single valid cycle"""
+        employees = make_employees(3)
+        previous = [
+            Assignment(
+                employee_name=employees[i].name,
+                employee_email=employees[i].email,
+                secret_child_name=employees[(i + 1) % 3].name,
+                secret_child_email=employees[(i + 1) % 3].email
+            )
+            for i in range(3)
+        ]
+        history = AssignmentHistory(previous)
+        for _ in range(20):
+            assignments = SecretSantaAssigner(EmployeeRepository(employees), history).assign()
+            assert_valid(assignments, history, employees)
+
+    def test_infeasible_roster_reports_blocking_employees(self):
+        """Test that an impossible roster fails fast with a Hall violator"""
+        employees = [
+            Employee(name="Sam", email="sam1@acme.com"),
+            Employee(name="Sam", email="sam2@acme.com"),
+            Employee(name="Sam", email="sam3@acme.com"),
+            Employee(name="Alex", email="alex@acme.com"),
+        ]
+        assigner = SecretSantaAssigner(EmployeeRepository(employees), AssignmentHistory())
+        with pytest.raises(InfeasibleAssignmentException) as exc_info:
+            assigner.assign()
+        assert set(exc_info.value.blocking_employees) <= {e.email for e in employees[:3]}
+        assert len(exc_info.value.blocking_employees) >= 2